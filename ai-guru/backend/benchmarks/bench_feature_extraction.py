@@ -0,0 +1,229 @@
+"""
+Benchmark: interaction feature extraction (the write-behind enrichment step).
+Compares the previous per-keyword `in` scans with interaction_features.analyze_interaction()
+on messages up to 5000 characters, then shows how each approach scales as the lexicon grows.
+
+    cd backend && python benchmarks/bench_feature_extraction.py [--repeat 200]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+import interaction_features
+from interaction_features import KeywordMatcher
+
+SENTENCES = [
+    "Could you please explain the steps to become a data scientist? ",
+    "I want to learn programming and study computer science at school. ",
+    "This career guidance was great, thanks for the amazing help! ",
+    "Write a paragraph that describes the job market for software engineers. ",
+    "hey, the last answer was bad and a bit disappointing honestly. ",
+]
+
+RESPONSE = (
+    "**Getting Started**\n"
+    "1. Learn Python fundamentals\n"
+    "2. Practice with small projects\n"
+    "- Try Kaggle datasets and apply what you learn\n"
+    "Would you like a weekly plan for your studies?"
+)
+
+def make_message(length):
+    text = ""
+    i = 0
+    while len(text) < length:
+        text += SENTENCES[i % len(SENTENCES)]
+        i += 1
+    return text[:length]
+
+def legacy_analyze_input_patterns(user_input):
+    """Previous analyze_input_patterns(): one `in` scan per keyword"""
+    patterns = {
+        "request_type": "",
+        "formality_level": "",
+        "length_preference": "",
+        "keywords": []
+    }
+    
+    user_input_lower = user_input.lower()
+    
+    # Detect request type
+    if any(word in user_input_lower for word in ['paragraph', 'write', 'describe', 'tell me about', 'essay']):
+        patterns["request_type"] = "paragraph"
+    elif any(word in user_input_lower for word in ['explain', 'list', 'break down', 'steps', 'outline']):
+        patterns["request_type"] = "structured"
+    elif any(word in user_input_lower for word in ['hi', 'hello', 'thanks', 'how are you']):
+        patterns["request_type"] = "casual"
+    else:
+        patterns["request_type"] = "mixed"
+    
+    # Detect formality level
+    formal_indicators = ['please', 'could you', 'would you', 'kindly', 'sir', 'madam']
+    casual_indicators = ['hey', 'yo', 'sup', 'what\'s up', 'cool', 'awesome']
+    
+    if any(word in user_input_lower for word in formal_indicators):
+        patterns["formality_level"] = "formal"
+    elif any(word in user_input_lower for word in casual_indicators):
+        patterns["formality_level"] = "casual"
+    else:
+        patterns["formality_level"] = "neutral"
+    
+    # Length preference detection
+    if len(user_input) < 20:
+        patterns["length_preference"] = "short"
+    elif len(user_input) > 100:
+        patterns["length_preference"] = "detailed"
+    else:
+        patterns["length_preference"] = "medium"
+    
+    # Extract key topics/keywords
+    import re
+    words = re.findall(r'\b[a-zA-Z]{3,}\b', user_input.lower())
+    common_words = {'the', 'and', 'you', 'for', 'are', 'with', 'can', 'about', 'what', 'how', 'that', 'this'}
+    patterns["keywords"] = [word for word in words if word not in common_words][:10]
+    
+    return patterns
+
+def legacy_detect_response_format(bot_response):
+    """Analyze the format of bot response"""
+    if not bot_response:
+        return "empty"
+    
+    format_info = {
+        "has_bullets": bool(re.search(r'^[\s]*[-•*]', bot_response, re.MULTILINE)),
+        "has_numbering": bool(re.search(r'^[\s]*\d+\.', bot_response, re.MULTILINE)),
+        "has_sections": bool(re.search(r'\*\*.*\*\*', bot_response)),
+        "has_emojis": bool(re.search(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF]', bot_response)),
+        "length": len(bot_response),
+        "format_type": ""
+    }
+    
+    if format_info["has_sections"] and (format_info["has_bullets"] or format_info["has_numbering"]):
+        format_info["format_type"] = "structured"
+    elif not format_info["has_bullets"] and not format_info["has_numbering"] and not format_info["has_sections"]:
+        format_info["format_type"] = "paragraph"
+    else:
+        format_info["format_type"] = "mixed"
+    
+    return format_info
+
+def legacy_extract_context_features(user_input, bot_response):
+    """Extract contextual features for learning"""
+    return {
+        "topic": legacy_extract_topic(user_input),
+        "sentiment": legacy_detect_sentiment(user_input),
+        "complexity": legacy_assess_complexity(user_input),
+        "success_indicators": legacy_detect_success_patterns(user_input, bot_response)
+    }
+
+def legacy_extract_topic(text):
+    """Simple topic extraction"""
+    topics = {
+        'science': ['science', 'physics', 'chemistry', 'biology', 'research'],
+        'technology': ['AI', 'computer', 'software', 'programming', 'tech'],
+        'education': ['learn', 'study', 'school', 'education', 'knowledge'],
+        'career': ['job', 'career', 'work', 'profession', 'employment', 'gps']
+    }
+    
+    text_lower = text.lower()
+    for topic, keywords in topics.items():
+        if any(keyword in text_lower for keyword in keywords):
+            return topic
+    return 'general'
+
+def legacy_detect_sentiment(text):
+    """Simple sentiment detection"""
+    positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic']
+    negative_words = ['bad', 'terrible', 'awful', 'horrible', 'disappointing']
+    
+    text_lower = text.lower()
+    pos_count = sum(1 for word in positive_words if word in text_lower)
+    neg_count = sum(1 for word in negative_words if word in text_lower)
+    
+    if pos_count > neg_count:
+        return 'positive'
+    elif neg_count > pos_count:
+        return 'negative'
+    else:
+        return 'neutral'
+
+def legacy_assess_complexity(text):
+    """Assess text complexity"""
+    words = text.split()
+    if len(words) < 10:
+        return 'simple'
+    elif len(words) > 50:
+        return 'complex'
+    else:
+        return 'moderate'
+
+def legacy_detect_success_patterns(user_input, bot_response):
+    """Detect success patterns in interactions"""
+    return {
+        "follow_up_question": "?" in bot_response[-50:],  # Ends with question
+        "personalization": "you" in bot_response.lower() or "your" in bot_response.lower(),
+        "actionable": any(word in bot_response.lower() for word in ['try', 'use', 'apply', 'practice'])
+    }
+
+def legacy_analyze_interaction(user_input, bot_response):
+    return {
+        "input_patterns": legacy_analyze_input_patterns(user_input),
+        "response_format": legacy_detect_response_format(bot_response),
+        "interaction_context": legacy_extract_context_features(user_input, bot_response)
+    }
+
+def time_per_call(func, args, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def bench_message_lengths(repeat):
+    print(f"{'chars':>6} {'legacy µs':>10} {'compiled µs':>12} {'speedup':>8}")
+    for length in (20, 200, 1000, 5000):
+        message = make_message(length)
+        legacy = time_per_call(legacy_analyze_interaction, (message, RESPONSE), repeat)
+        compiled = time_per_call(interaction_features.analyze_interaction, (message, RESPONSE), repeat)
+        print(f"{length:>6} {legacy:>10.1f} {compiled:>12.1f} {legacy / compiled:>7.1f}x")
+
+def bench_lexicon_growth(repeat):
+    """Cost of matching a 5000-char message against N topics of 5 keywords each"""
+    message = make_message(5000).lower()
+    print(f"\n{'topics':>6} {'keywords':>9} {'`in` scans µs':>14} {'matcher µs':>11}")
+    for topic_count in (4, 50, 200, 1000):
+        topics = {f"topic{t}": [f"kw{t}x{k}" for k in range(5)] for t in range(topic_count)}
+        topics["career"] = ['job', 'career', 'work', 'profession', 'employment']
+        matcher = KeywordMatcher({"topic": topics})
+
+        def scan_in(text):
+            for keywords in topics.values():
+                if any(keyword in text for keyword in keywords):
+                    return
+
+        def scan_matcher(text):
+            matcher.first_label(matcher.scan(text), "topic", "general")
+
+        n = max(1, repeat // 10)
+        keyword_count = sum(len(k) for k in topics.values())
+        print(f"{len(topics):>6} {keyword_count:>9} {time_per_call(scan_in, (message,), n):>14.1f} "
+              f"{time_per_call(scan_matcher, (message,), n):>11.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    mismatches = [length for length in (20, 200, 1000, 5000)
+                  if legacy_analyze_interaction(make_message(length), RESPONSE) != interaction_features.analyze_interaction(make_message(length), RESPONSE)]
+    print(f"Output parity with legacy extraction: {'OK' if not mismatches else f'differs at {mismatches}'}\n")
+
+    bench_message_lengths(args.repeat)
+    bench_lexicon_growth(args.repeat)
+
+if __name__ == "__main__":
+    main()
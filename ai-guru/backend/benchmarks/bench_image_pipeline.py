@@ -0,0 +1,92 @@
+"""
+Benchmark: /image-chat image ingestion on 10-20 MB uploads.
+Compares the previous path (decode the full image, hand the PIL image to the Gemini
+SDK, which serializes it at full resolution) with image_pipeline.prepare_image().
+Each measurement runs in a fresh subprocess so peak RSS is not shared between runs.
+
+    cd backend && python benchmarks/bench_image_pipeline.py [--repeat 3]
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+from PIL import Image
+
+# (name, width, height, format, save options): phone-camera-sized photos and a large screenshot-like PNG
+IMAGES = [
+    ("photo_12mp.jpg", 4000, 3000, "JPEG", {"quality": 97}),
+    ("photo_24mp.jpg", 6000, 4000, "JPEG", {"quality": 95}),
+    ("scan_6mp.png", 3000, 2000, "PNG", {}),
+]
+
+def make_image(path, width, height, image_format, options):
+    """Noisy gradient: compresses about as badly as a real photo"""
+    base = Image.linear_gradient('L').resize((width, height))
+    channels = [Image.blend(base, Image.effect_noise((width, height), sigma), 0.5) for sigma in (40, 50, 60)]
+    Image.merge('RGB', channels).save(path, image_format, **options)
+
+def legacy_prepare(data):
+    """Previous path: full decode, then the SDK's own PIL serialization"""
+    from google.generativeai.types import content_types
+    pil_image = Image.open(io.BytesIO(data))
+    return len(content_types.image_to_blob(pil_image).data)
+
+def pipeline_prepare(data):
+    from services import image_pipeline
+    return len(image_pipeline.prepare_image(data)["data"])
+
+VARIANTS = {"legacy": legacy_prepare, "pipeline": pipeline_prepare}
+
+def run_worker(variant, path, repeat):
+    """Child process: import, measure baseline RSS, then time `repeat` runs"""
+    func = VARIANTS[variant]
+    with open(path, 'rb') as f:
+        data = f.read()
+    func(data)  # warm up imports and codecs
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output_bytes = func(data)
+        timings.append(time.perf_counter() - start)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"ms": min(timings) * 1000, "peak_rss_mb": peak_kb / 1024, "output_bytes": output_bytes}))
+
+def run_child(variant, path, repeat):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", variant, path, "--repeat", str(repeat)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", nargs=2, metavar=("VARIANT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'image':<16} {'upload MB':>9} {'variant':<9} {'best ms':>8} {'peak RSS MB':>12} {'to model KB':>12}")
+        for name, width, height, image_format, options in IMAGES:
+            path = os.path.join(tmp, name)
+            make_image(path, width, height, image_format, options)
+            upload_mb = os.path.getsize(path) / 1e6
+            for variant in VARIANTS:
+                result = run_child(variant, path, args.repeat)
+                print(f"{name:<16} {upload_mb:>9.1f} {variant:<9} {result['ms']:>8.0f} "
+                      f"{result['peak_rss_mb']:>12.0f} {result['output_bytes'] / 1024:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Cold-start benchmark: how long `import main` takes, parsed from `python -X importtime`.
+Runs in fresh interpreters with MongoDB pointed at an unreachable address, the case that
+used to block startup, and fails (exit code 1) when the best run is above --target-ms.
+
+    cd backend && python benchmarks/bench_import_time.py [--repeat 5] [--target-ms 1500] [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time:       self [us] |  cumulative | imported package"
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def run_once(module, env):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        sys.exit(f"❌ import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return wall, entries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1500.0, help="Budget for the best run's wall time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    parser.add_argument("--mongodb-uri", default="mongodb://127.0.0.1:1/", help="Default: unreachable")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.update({"GEMINI_API_KEY": env.get("GEMINI_API_KEY", "benchmark"), "MONGODB_URI": args.mongodb_uri})
+
+    runs = [run_once(args.module, env) for _ in range(args.repeat)]
+    wall, entries = min(runs, key=lambda run: run[0])
+    top_level = [entry for entry in entries if entry[1] <= 1]
+    imports_us = sum(cumulative for _, depth, _, cumulative in top_level if depth == 1)
+
+    print(f"{'top-level import':<40}{'cumulative ms':>15}")
+    for name, _, _, cumulative in sorted(top_level, key=lambda entry: entry[3], reverse=True)[:args.top]:
+        print(f"{name:<40}{cumulative / 1000:>15.1f}")
+    print()
+    print(f"modules imported: {len(entries)}")
+    print(f"import {args.module}: {imports_us / 1000:.0f} ms in imports, {wall * 1000:.0f} ms wall "
+          f"(best of {args.repeat}; median wall {sorted(run[0] for run in runs)[len(runs) // 2] * 1000:.0f} ms)")
+
+    verdict = "✅" if wall * 1000 <= args.target_ms else "❌"
+    print(f"{verdict} target: {args.target_ms:.0f} ms wall")
+    if wall * 1000 > args.target_ms:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: script classification and language detection on a realistic chat corpus.
+Compares the previous per-script scans with utils.classify_script(), and uncached
+langdetect with the memoized detect_language()/detect_language_many().
+
+    cd backend && python benchmarks/bench_language_detection.py [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+from langdetect import detect_langs
+import utils
+
+# Typical traffic: mostly English, some Hinglish/Tenglish, native-script and European messages
+CORPUS = [
+    "hi",
+    "hello, how are you?",
+    "what is machine learning",
+    "Can you explain the difference between a list and a tuple in Python?",
+    "Please write a paragraph about the importance of education in rural India.",
+    "bhai mujhe python seekhna hai, kahan se start karu?",
+    "nenu data science nerchukovali anukuntunnanu, ela start cheyali?",
+    "नमस्ते, मुझे मशीन लर्निंग के बारे में बताइए",
+    "मेरा नाम राहुल है and I want to become a software engineer",
+    "నాకు కెరీర్ గురించి సలహా కావాలి please help",
+    "எனக்கு ஒரு வேலை வேண்டும், என்ன படிக்க வேண்டும்?",
+    "আমি একজন ডেটা সায়েন্টিস্ট হতে চাই",
+    "¿Cómo puedo aprender a programar desde cero?",
+    "Bonjour, pouvez-vous m'aider avec mes devoirs de mathématiques?",
+    "Wie funktioniert ein neuronales Netz eigentlich genau?",
+    "Explain the steps to prepare for a data analyst interview, with a list of topics to revise " * 20,
+]
+
+def legacy_detect_mixed_indian_language(text):
+    """The eight sequential scans utils used before"""
+    if any('\u0c00' <= char <= '\u0c7f' for char in text):
+        return 'te'
+    if any('\u0900' <= char <= '\u097f' for char in text):
+        return 'hi'
+    if any('\u0980' <= char <= '\u09ff' for char in text):
+        return 'bn'
+    if any('\u0b80' <= char <= '\u0bff' for char in text):
+        return 'ta'
+    if any('\u0a80' <= char <= '\u0aff' for char in text):
+        return 'gu'
+    if any('\u0c80' <= char <= '\u0cff' for char in text):
+        return 'kn'
+    if any('\u0d00' <= char <= '\u0d7f' for char in text):
+        return 'ml'
+    if any('\u0a00' <= char <= '\u0a7f' for char in text):
+        return 'pa'
+    return None
+
+def legacy_detect_language(text):
+    """Previous detect_language(): script scans, then langdetect on every call"""
+    cleaned_text = text.strip()
+    if len(cleaned_text) < 5:
+        return ('en', 0.0, False)
+    indian_lang = legacy_detect_mixed_indian_language(cleaned_text)
+    if indian_lang:
+        return (indian_lang, 0.95, True)
+    top = detect_langs(cleaned_text)[0]
+    return (top.lang, top.prob, top.prob > 0.85 and top.lang != 'en')
+
+def timed(label, func, messages):
+    started = time.perf_counter()
+    func(messages)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<38} {elapsed * 1e6 / len(messages):9.1f} µs/message")
+    return elapsed
+
+def main(repeat):
+    messages = CORPUS * repeat
+    print(f"{len(messages)} messages ({len(CORPUS)} distinct, avg {sum(map(len, CORPUS)) // len(CORPUS)} chars)")
+
+    print("Script classification:")
+    legacy = timed("legacy 8-scan detect_mixed_indian", lambda ms: [legacy_detect_mixed_indian_language(m) for m in ms], messages)
+    current = timed("classify_script (single pass)", lambda ms: [utils.classify_script(m) for m in ms], messages)
+    print(f"  speedup: {legacy / current:.1f}x")
+
+    print("Full language detection:")
+    legacy = timed("legacy (langdetect every call)", lambda ms: [legacy_detect_language(m) for m in ms], messages)
+    utils._detect_langs_cached.cache_clear()
+    current = timed("detect_language (memoized)", lambda ms: [utils.detect_language(m) for m in ms], messages)
+    utils._detect_langs_cached.cache_clear()
+    batch = timed("detect_language_many (batch)", utils.detect_language_many, messages)
+    print(f"  speedup: {legacy / current:.1f}x memoized, {legacy / batch:.1f}x batch")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="times the corpus is replayed")
+    main(parser.parse_args().repeat)
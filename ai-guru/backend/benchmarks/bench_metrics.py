@@ -0,0 +1,104 @@
+"""
+Microbenchmark: per-span overhead of the metrics API (target: under 5µs per span).
+Each variant wraps an empty body, so the time measured is the instrumentation itself.
+
+    cd backend && python benchmarks/bench_metrics.py [--spans 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+import metrics
+
+TARGET_MICROSECONDS = 5.0
+
+HISTOGRAM = metrics.Histogram("bench_stage_seconds", "Benchmark spans", labelnames=("stage",))
+GAUGE = metrics.Gauge("bench_in_flight", "Benchmark in-flight", labelnames=("kind",))
+BOUND = HISTOGRAM.labels("bound")
+
+def with_bound_child(spans):
+    for _ in range(spans):
+        with BOUND.time():
+            pass
+
+def with_label_lookup(spans):
+    for _ in range(spans):
+        with HISTOGRAM.labels("lookup").time():
+            pass
+
+@HISTOGRAM.labels("decorated").time()
+def _decorated():
+    pass
+
+def with_decorator(spans):
+    for _ in range(spans):
+        _decorated()
+
+@HISTOGRAM.labels("decorated_async").time()
+async def _decorated_async():
+    pass
+
+def with_async_decorator(spans):
+    async def drive():
+        for _ in range(spans):
+            await _decorated_async()
+    asyncio.run(drive())
+
+def with_in_flight_gauge(spans):
+    child = GAUGE.labels("bench")
+    for _ in range(spans):
+        with child.track_inprogress():
+            pass
+
+def empty_loop(spans):
+    for _ in range(spans):
+        pass
+
+def async_empty_loop(spans):
+    async def nothing():
+        pass
+
+    async def drive():
+        for _ in range(spans):
+            await nothing()
+    asyncio.run(drive())
+
+def best_of(func, spans, repeats=5):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(spans)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=200000)
+    args = parser.parse_args()
+
+    loop_cost = best_of(empty_loop, args.spans)
+    async_loop_cost = best_of(async_empty_loop, args.spans)
+    variants = [
+        ("with child.time()", with_bound_child, loop_cost),
+        ("with labels(...).time()", with_label_lookup, loop_cost),
+        ("@labels(...).time() sync", with_decorator, loop_cost),
+        ("@labels(...).time() async", with_async_decorator, async_loop_cost),
+        ("with track_inprogress()", with_in_flight_gauge, loop_cost),
+    ]
+
+    print(f"{'variant':<28}{'µs/span':>10}")
+    worst = 0.0
+    for name, func, baseline in variants:
+        per_span = (best_of(func, args.spans) - baseline) / args.spans * 1e6
+        worst = max(worst, per_span)
+        print(f"{name:<28}{per_span:>10.2f}")
+    verdict = "✅" if worst < TARGET_MICROSECONDS else "❌"
+    print(f"{verdict} worst case {worst:.2f}µs per span (target < {TARGET_MICROSECONDS}µs)")
+
+if __name__ == "__main__":
+    main()
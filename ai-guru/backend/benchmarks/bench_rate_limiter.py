@@ -0,0 +1,84 @@
+"""
+Microbenchmark: rate limiting 100k distinct client IPs.
+Compares the previous list-of-datetimes limiter with the sliding-window-counter backend.
+
+    cd backend && python benchmarks/bench_rate_limiter.py [--ips 100000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+from rate_limit import InMemoryRateLimitBackend
+
+class LegacyRateLimiter:
+    """The limiter main.py used before: rebuilds a per-IP list on every request, never forgets IPs"""
+
+    def __init__(self, max_requests=30, time_window=60):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.requests = defaultdict(list)
+
+    async def acquire(self, client_ip):
+        now = datetime.now()
+        self.requests[client_ip] = [
+            req_time for req_time in self.requests[client_ip]
+            if now - req_time < timedelta(seconds=self.time_window)
+        ]
+        if len(self.requests[client_ip]) >= self.max_requests:
+            return False
+        self.requests[client_ip].append(now)
+        return True
+
+async def _drive(acquire, ips, hits_per_ip):
+    started = time.perf_counter()
+    for _ in range(hits_per_ip):
+        for ip in ips:
+            await acquire(ip)
+    return time.perf_counter() - started
+
+async def _measure(make_limiter, make_acquire, ips, hits_per_ip):
+    """Time a fresh limiter, then replay the same load under tracemalloc for retained memory"""
+    seconds = await _drive(make_acquire(make_limiter()), ips, hits_per_ip)
+
+    tracemalloc.start()
+    limiter = make_limiter()
+    await _drive(make_acquire(limiter), ips, hits_per_ip)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seconds, retained, limiter
+
+async def run(ip_count, hits_per_ip):
+    ips = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(ip_count)]
+    total = ip_count * hits_per_ip
+    now = 6000.0
+
+    legacy_seconds, legacy_memory, legacy = await _measure(
+        LegacyRateLimiter, lambda limiter: limiter.acquire, ips, hits_per_ip
+    )
+    counter_seconds, counter_memory, backend = await _measure(
+        lambda: InMemoryRateLimitBackend(max_keys=ip_count),
+        lambda limiter: (lambda ip: limiter.acquire(ip, 30, 60, now=now)),
+        ips, hits_per_ip
+    )
+
+    # One request two windows later evicts every idle key
+    await backend.acquire("late-client", 30, 60, now=now + 120)
+
+    print(f"{ip_count:,} IPs x {hits_per_ip} hits = {total:,} checks")
+    print(f"  legacy list limiter : {legacy_seconds / total * 1e6:6.2f} µs/check, {legacy_memory / 1e6:6.1f} MB retained, {len(legacy.requests):,} keys kept forever")
+    print(f"  sliding window      : {counter_seconds / total * 1e6:6.2f} µs/check, {counter_memory / 1e6:6.1f} MB retained, {len(backend)} key(s) after idle eviction")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=100000)
+    parser.add_argument("--hits", type=int, default=5, help="requests per IP")
+    args = parser.parse_args()
+    asyncio.run(run(args.ips, args.hits))
@@ -0,0 +1,257 @@
+"""
+Load generator: p50/p95/p99 latency and throughput per endpoint against a running backend.
+Start the server against a local MongoDB with the Gemini mock first, so no API quota is used:
+
+    cd backend && MOCK_GEMINI=True MONGODB_URI=mongodb://localhost:27017 uvicorn main:app --port 8001
+    cd backend && python benchmarks/load_test.py --endpoints chat image-chat career-gps --requests 200 --concurrency 16
+
+Repeatable before/after runs from recorded traffic: capture chat_history once, then replay the file
+(sessions keep their turn order; different sessions run concurrently).
+
+    cd backend && python benchmarks/load_test.py --capture traffic.jsonl --capture-limit 2000
+    cd backend && python benchmarks/load_test.py --replay traffic.jsonl --output before.json
+    cd backend && python benchmarks/load_test.py --replay traffic.jsonl --baseline before.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GEMINI_API_KEY', 'benchmark')
+
+import httpx
+
+QUESTIONS = [
+    "Explain recursion with a simple example",
+    "What is the difference between a list and a tuple in Python?",
+    "How do I prepare for a data science interview?",
+    "Give me a study plan for learning SQL in two weeks",
+    "What are the steps of the scientific method?",
+    "Summarize the causes of World War I",
+    "How does photosynthesis work?",
+    "Write a short poem about learning",
+]
+
+PROFILES = [
+    {"interests": ["coding", "math"], "skills": ["python"], "goal": "build software"},
+    {"interests": ["art", "design"], "skills": ["figma"], "goal": "design products"},
+    {"interests": ["biology", "helping people"], "skills": ["research"], "goal": "work in healthcare"},
+    {"interests": ["business", "writing"], "skills": ["communication"], "goal": "start a company"},
+]
+
+CAREERS = ["Data Scientist", "UX Designer", "Product Manager", "Software Engineer", "Registered Nurse"]
+
+def _sample_image():
+    from PIL import Image
+    image = Image.linear_gradient("L").resize((1024, 768)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+async def _chat(client, i):
+    return await client.post("/chat", json={"message": QUESTIONS[i % len(QUESTIONS)]})
+
+async def _chat_stream(client, i):
+    async with client.stream("POST", "/chat/stream", json={"message": QUESTIONS[i % len(QUESTIONS)]}) as response:
+        async for _ in response.aiter_bytes():
+            pass
+        return response
+
+_image_bytes = None
+
+async def _image_chat(client, i):
+    global _image_bytes
+    if _image_bytes is None:
+        _image_bytes = _sample_image()
+    return await client.post(
+        "/image-chat",
+        files={"image": ("sample.jpg", _image_bytes, "image/jpeg")},
+        data={"text": "What does this picture show?"}
+    )
+
+async def _career_gps(client, i):
+    profile = PROFILES[i % len(PROFILES)]
+    return await client.post(
+        "/career-gps/recommendations",
+        params={"goal": profile["goal"]},
+        json={"interests": profile["interests"], "skills": profile["skills"]}
+    )
+
+async def _roadmap(client, i):
+    return await client.get(f"/career-gps/roadmap/{CAREERS[i % len(CAREERS)]}", params={"progress": i % 100})
+
+async def _learning_path(client, i):
+    return await client.post(
+        "/career-gps/learning-path",
+        params={"career_name": CAREERS[i % len(CAREERS)], "match_percentage": 80},
+        json={"skills": ["python"]}
+    )
+
+SCENARIOS = OrderedDict([
+    ("chat", _chat),
+    ("chat-stream", _chat_stream),
+    ("image-chat", _image_chat),
+    ("career-gps", _career_gps),
+    ("roadmap", _roadmap),
+    ("learning-path", _learning_path),
+])
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def summarize(name, latencies, errors, wall_seconds):
+    latencies = sorted(latencies)
+    completed = len(latencies)
+    return {
+        "endpoint": name,
+        "requests": completed,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "throughput_rps": round(completed / wall_seconds, 2) if wall_seconds else 0.0
+    }
+
+async def _timed(call):
+    """(latency seconds, ok) for one request"""
+    started = time.perf_counter()
+    try:
+        response = await call
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    return time.perf_counter() - started, ok
+
+async def run_scenario(client, name, requests, concurrency):
+    scenario = SCENARIOS[name]
+    latencies, errors = [], 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            latency, ok = await _timed(scenario(client, i))
+            latencies.append(latency)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors, time.perf_counter() - started)
+
+async def run_replay(client, path, concurrency):
+    """Replay captured text turns; each session's turns are sent in order under a replay-prefixed id"""
+    sessions = OrderedDict()
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            turn = json.loads(line)
+            sessions.setdefault(turn["session_id"], []).append(turn["message"])
+
+    latencies, errors = [], 0
+    next_session = iter(sessions.items())
+
+    async def worker():
+        nonlocal errors
+        for session_id, messages in next_session:
+            for message in messages:
+                payload = {"message": message, "session_id": f"replay-{session_id}"}
+                latency, ok = await _timed(client.post("/chat", json=payload))
+                latencies.append(latency)
+                errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize("replay:/chat", latencies, errors, time.perf_counter() - started)
+
+def capture(path, limit):
+    """Write the oldest `limit` text turns of chat_history as JSONL for --replay"""
+    import database
+    if not database.is_db_available():
+        sys.exit("❌ MongoDB is not available; set MONGODB_URI to the database to capture from")
+    cursor = database.get_chat_collection().find(
+        {"input_type": "text"},
+        {"_id": 0, "session_id": 1, "user_input": 1}
+    ).sort("timestamp", 1).limit(limit)
+
+    written = 0
+    with open(path, "w", encoding="utf-8") as handle:
+        for document in cursor:
+            if document.get("session_id") and document.get("user_input"):
+                handle.write(json.dumps({"session_id": document["session_id"], "message": document["user_input"][:5000]}, ensure_ascii=False) + "\n")
+                written += 1
+    print(f"✅ Captured {written} turns to {path}")
+
+def print_results(results, baseline=None):
+    previous = {row["endpoint"]: row for row in (baseline or {}).get("results", [])}
+    print(f"{'endpoint':<16}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for row in results:
+        print(f"{row['endpoint']:<16}{row['requests']:>9}{row['errors']:>8}{row['p50_ms']:>10}"
+              f"{row['p95_ms']:>10}{row['p99_ms']:>10}{row['throughput_rps']:>9}")
+        before = previous.get(row["endpoint"])
+        if before:
+            deltas = "".join(
+                f"{_delta(before[key], row[key]):>10}" for key in ("p50_ms", "p95_ms", "p99_ms")
+            )
+            print(f"{'  vs baseline':<33}{deltas}{_delta(before['throughput_rps'], row['throughput_rps']):>9}")
+
+def _delta(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.0f}%"
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        if args.replay:
+            return [await run_replay(client, args.replay, args.concurrency)]
+        results = []
+        for name in args.endpoints:
+            if args.warmup:
+                await run_scenario(client, name, args.warmup, min(args.concurrency, args.warmup))
+            results.append(await run_scenario(client, name, args.requests, args.concurrency))
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--endpoints", nargs="+", choices=list(SCENARIOS), default=["chat", "career-gps"])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=0, help="Untimed requests per endpoint before measuring")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--capture", metavar="FILE", help="Write chat_history text turns to FILE and exit")
+    parser.add_argument("--capture-limit", type=int, default=1000)
+    parser.add_argument("--replay", metavar="FILE", help="Replay turns captured with --capture")
+    parser.add_argument("--output", metavar="FILE", help="Save results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against results saved with --output")
+    args = parser.parse_args()
+
+    if args.capture:
+        capture(args.capture, args.capture_limit)
+        return
+
+    results = asyncio.run(main_async(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+    print_results(results, baseline)
+
+    if args.output:
+        run = {"base_url": args.base_url, "concurrency": args.concurrency, "requests": args.requests,
+               "replay": args.replay, "results": results}
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(run, handle, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
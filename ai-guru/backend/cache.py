@@ -0,0 +1,241 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries also expire after `ttl` seconds.
+    With `sliding=True` every hit restarts the entry's TTL, so entries expire after `ttl` idle seconds.
+    """
+
+    def __init__(self, max_size=1024, ttl=3600, sliding=False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sliding = sliding
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            if self.sliding:
+                self._data[key] = (now + self.ttl, value)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+class PersistentCache:
+    """
+    Two-level cache: an in-process TTLCache in front of an optional Mongo collection.
+    Mongo documents carry an `expires_at` date so a TTL index can reap them.
+    """
+
+    def __init__(self, memory_cache, collection_getter=None):
+        self.memory = memory_cache
+        self.collection_getter = collection_getter
+        self.persistent_hits = 0
+        self.persistent_misses = 0
+        self._index_ready = False
+
+    # Shared by the sync and async variants, which differ only in how the collection is called
+
+    def _raw_collection(self):
+        return self.collection_getter() if self.collection_getter is not None else None
+
+    def _needs_index(self, collection):
+        return collection is not None and not self._index_ready
+
+    @staticmethod
+    def _lookup_query(key):
+        return {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}
+
+    def _document(self, key, value):
+        now = datetime.utcnow()
+        return {"_id": key, "value": value, "created_at": now, "expires_at": now + timedelta(seconds=self.memory.ttl)}
+
+    def _remember(self, key, document):
+        """Count a persistent lookup and promote a hit into memory; returns the value or None"""
+        if document is None:
+            self.persistent_misses += 1
+            return None
+        self.persistent_hits += 1
+        self.memory.set(key, document["value"])
+        return document["value"]
+
+    def _collection(self):
+        collection = self._raw_collection()
+        if self._needs_index(collection):
+            try:
+                collection.create_index("expires_at", expireAfterSeconds=0)
+                self._index_ready = True
+            except Exception as e:
+                print(f"⚠️ Failed to create cache TTL index: {e}")
+        return collection
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        collection = self._collection()
+        if collection is None:
+            return None
+        try:
+            document = collection.find_one(self._lookup_query(key))
+        except Exception as e:
+            print(f"⚠️ Cache lookup failed: {e}")
+            return None
+        return self._remember(key, document)
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        collection = self._collection()
+        if collection is None:
+            return
+        try:
+            collection.replace_one({"_id": key}, self._document(key, value), upsert=True)
+        except Exception as e:
+            print(f"⚠️ Cache write failed: {e}")
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats.update({
+            "persistent_hits": self.persistent_hits,
+            "persistent_misses": self.persistent_misses
+        })
+        return stats
+
+class AsyncPersistentCache(PersistentCache):
+    """PersistentCache for the event loop: `collection_getter` returns an asyncio collection, get/set are awaited"""
+
+    async def _collection(self):
+        collection = self._raw_collection()
+        if self._needs_index(collection):
+            try:
+                await collection.create_index("expires_at", expireAfterSeconds=0)
+                self._index_ready = True
+            except Exception as e:
+                print(f"⚠️ Failed to create cache TTL index: {e}")
+        return collection
+
+    async def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        collection = await self._collection()
+        if collection is None:
+            return None
+        try:
+            document = await collection.find_one(self._lookup_query(key))
+        except Exception as e:
+            print(f"⚠️ Cache lookup failed: {e}")
+            return None
+        return self._remember(key, document)
+
+    async def set(self, key, value):
+        self.memory.set(key, value)
+        collection = await self._collection()
+        if collection is None:
+            return
+        try:
+            await collection.replace_one({"_id": key}, self._document(key, value), upsert=True)
+        except Exception as e:
+            print(f"⚠️ Cache write failed: {e}")
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the function,
+    callers arriving while it is in flight wait and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self):
+        return {"in_flight": len(self._flights), "executions": self.executions, "coalesced": self.coalesced}
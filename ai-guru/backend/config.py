@@ -12,6 +12,117 @@ DEBUG_MODE = os.getenv('FLASK_DEBUG', 'True').lower() in ["true", "1", "t"]
 MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 10485760))  # 10MB default
 RATE_LIMIT_MAX_REQUESTS = int(os.getenv('RATE_LIMIT_MAX_REQUESTS', 30))
 RATE_LIMIT_TIME_WINDOW = int(os.getenv('RATE_LIMIT_TIME_WINDOW', 60))
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')  # 'memory' (per worker) or 'redis' (shared)
+RATE_LIMIT_MAX_TRACKED_KEYS = int(os.getenv('RATE_LIMIT_MAX_TRACKED_KEYS', 100000))
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+
+# --- LLM Client ---
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 16))  # In-flight Gemini calls per worker
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', 60))
+LLM_DISCONNECT_POLL_SECONDS = float(os.getenv('LLM_DISCONNECT_POLL_SECONDS', 0.5))
+
+# --- Mock Gemini (load testing) ---
+MOCK_GEMINI = os.getenv('MOCK_GEMINI', 'False').lower() in ["true", "1", "t"]  # Use the local stand-in in mock_gemini.py
+MOCK_GEMINI_LATENCY_MS = float(os.getenv('MOCK_GEMINI_LATENCY_MS', 800))  # Median time to first token
+MOCK_GEMINI_LATENCY_SIGMA = float(os.getenv('MOCK_GEMINI_LATENCY_SIGMA', 0.5))  # Lognormal spread; 0 = fixed latency
+MOCK_GEMINI_TOKENS_PER_SECOND = float(os.getenv('MOCK_GEMINI_TOKENS_PER_SECOND', 80))
+MOCK_GEMINI_RESPONSE_TOKENS = int(os.getenv('MOCK_GEMINI_RESPONSE_TOKENS', 250))  # Length of plain-text answers
+MOCK_GEMINI_ERROR_RATE = float(os.getenv('MOCK_GEMINI_ERROR_RATE', 0.0))
+MOCK_GEMINI_SEED = os.getenv('MOCK_GEMINI_SEED')  # Set for repeatable latency/error sequences
+
+# --- Batch Chat ---
+CHAT_BATCH_MAX_ITEMS = int(os.getenv('CHAT_BATCH_MAX_ITEMS', 200))  # Questions per /chat/batch request
+CHAT_BATCH_CONCURRENCY = int(os.getenv('CHAT_BATCH_CONCURRENCY', 8))  # In-flight Gemini calls per batch (within LLM_MAX_CONCURRENCY)
+
+# --- Prompt Assembly ---
+PROMPT_CHAT_TOKEN_BUDGET = int(os.getenv('PROMPT_CHAT_TOKEN_BUDGET', 2048))  # System prompt + user message
+CAREER_GPS_PROMPT_TOKEN_BUDGET = int(os.getenv('CAREER_GPS_PROMPT_TOKEN_BUDGET', 1536))
+PROMPT_TOKENIZER_ENCODING = os.getenv('PROMPT_TOKENIZER_ENCODING', 'cl100k_base')
+PROMPT_LOG_TOKEN_USAGE = os.getenv('PROMPT_LOG_TOKEN_USAGE', 'True').lower() in ["true", "1", "t"]  # Per-section token counts for every prompt
+
+# --- Language Detection ---
+LANGUAGE_DETECTION_CACHE_SIZE = int(os.getenv('LANGUAGE_DETECTION_CACHE_SIZE', 4096))
+
+# --- Image Ingestion ---
+IMAGE_MAX_EDGE = int(os.getenv('IMAGE_MAX_EDGE', 1536))  # Longest side sent to the vision model, in pixels
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 85))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', 50000000))  # Reject decompression bombs before decoding
+IMAGE_PROCESSING_WORKERS = int(os.getenv('IMAGE_PROCESSING_WORKERS', 2))
+
+# --- Vision Response Cache ---
+VISION_CACHE_ENABLED = os.getenv('VISION_CACHE_ENABLED', 'True').lower() in ["true", "1", "t"]
+VISION_CACHE_MAX_ENTRIES = int(os.getenv('VISION_CACHE_MAX_ENTRIES', 512))
+VISION_CACHE_TTL_SECONDS = int(os.getenv('VISION_CACHE_TTL_SECONDS', 86400))
+VISION_CACHE_USE_MONGO = os.getenv('VISION_CACHE_USE_MONGO', 'True').lower() in ["true", "1", "t"]  # Survive restarts, share across workers
+
+# --- Career GPS ---
+CAREER_GPS_CACHE_MAX_ENTRIES = int(os.getenv('CAREER_GPS_CACHE_MAX_ENTRIES', 1024))
+CAREER_GPS_CACHE_TTL_SECONDS = int(os.getenv('CAREER_GPS_CACHE_TTL_SECONDS', 21600))  # Recommendations per quiz profile
+CAREER_CONTENT_MAX_ENTRIES = int(os.getenv('CAREER_CONTENT_MAX_ENTRIES', 512))
+CAREER_CONTENT_TTL_SECONDS = int(os.getenv('CAREER_CONTENT_TTL_SECONDS', 604800))  # Shared roadmaps/learning paths per career
+
+# --- Metrics ---
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in ["true", "1", "t"]  # Serve Prometheus metrics at /metrics
+
+# --- Analytics ---
+ANALYTICS_CACHE_TTL_SECONDS = int(os.getenv('ANALYTICS_CACHE_TTL_SECONDS', 30))  # How long /analytics responses are reused
+
+# --- MongoDB Connection ---
+# Connected in the background after startup; requests run in in-memory mode until MongoDB answers
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_RECONNECT_INITIAL_SECONDS = float(os.getenv('MONGO_RECONNECT_INITIAL_SECONDS', 1))  # Backoff doubles per failed attempt
+MONGO_RECONNECT_MAX_SECONDS = float(os.getenv('MONGO_RECONNECT_MAX_SECONDS', 30))
+MONGO_HEALTHCHECK_INTERVAL_SECONDS = float(os.getenv('MONGO_HEALTHCHECK_INTERVAL_SECONDS', 15))  # Ping interval while connected
+# Requests use an asyncio client; the small sync pool serves health pings, index builds, jobs and Career GPS threads
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 5))
+MONGO_SYNC_MAX_POOL_SIZE = int(os.getenv('MONGO_SYNC_MAX_POOL_SIZE', 10))
+
+# --- Health Checks ---
+READINESS_REQUIRES_DB = os.getenv('READINESS_REQUIRES_DB', 'True').lower() in ["true", "1", "t"]  # /readyz is 503 until MongoDB is connected
+
+# --- MongoDB Indexes ---
+# Create the hot-query indexes at startup (idempotent); disable to manage them with `python -m jobs.ensure_indexes`
+MONGO_ENSURE_INDEXES_ON_STARTUP = os.getenv('MONGO_ENSURE_INDEXES_ON_STARTUP', 'True').lower() in ["true", "1", "t"]
+
+# --- Data Export ---
+EXPORT_ENABLED = os.getenv('EXPORT_ENABLED', 'False').lower() in ["true", "1", "t"]  # Serve /export/chat-history and /export/feedback (never in production)
+EXPORT_API_TOKEN = os.getenv('EXPORT_API_TOKEN', '')  # Required as "Authorization: Bearer <token>"; exports stay off while unset
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 500))  # Documents per cursor round trip while streaming
+
+# --- Chat History Retention ---
+# Interactions older than CHAT_RETENTION_DAYS are moved to compressed JSONL files by `python -m jobs.archive_chat_history`
+CHAT_RETENTION_DAYS = int(os.getenv('CHAT_RETENTION_DAYS', 180))  # 0 keeps everything in MongoDB
+CHAT_ARCHIVE_DIR = os.getenv('CHAT_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive', 'chat_history'))
+CHAT_ARCHIVE_COMPRESSION = os.getenv('CHAT_ARCHIVE_COMPRESSION', 'gzip')  # 'gzip' or 'zstd' (requires the zstandard package)
+CHAT_ARCHIVE_BATCH_SIZE = int(os.getenv('CHAT_ARCHIVE_BATCH_SIZE', 5000))  # Interactions per archive file and delete
+
+# --- Interaction Feature Extraction ---
+FEATURE_LEXICON_PATH = os.getenv('FEATURE_LEXICON_PATH')  # Optional JSON with extra keywords/topics
+
+# --- Chat Response Cache ---
+CHAT_CACHE_ENABLED = os.getenv('CHAT_CACHE_ENABLED', 'True').lower() in ["true", "1", "t"]
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', 2048))
+CHAT_CACHE_TTL_SECONDS = int(os.getenv('CHAT_CACHE_TTL_SECONDS', 3600))
+CHAT_CACHE_USE_MONGO = os.getenv('CHAT_CACHE_USE_MONGO', 'False').lower() in ["true", "1", "t"]  # Share entries across workers
+CHAT_CACHE_SKIP_WITH_CONTEXT = os.getenv('CHAT_CACHE_SKIP_WITH_CONTEXT', 'True').lower() in ["true", "1", "t"]
+
+# --- Session Context Cache ---
+SESSION_CACHE_MAX_SESSIONS = int(os.getenv('SESSION_CACHE_MAX_SESSIONS', 10000))
+# Per worker: assumes a session's turns are served by one worker (see services/session_cache.py)
+SESSION_CACHE_TTL_SECONDS = int(os.getenv('SESSION_CACHE_TTL_SECONDS', 1800))  # Sessions idle this long fall back to Mongo
+SESSION_CACHE_MAX_EXCHANGES = int(os.getenv('SESSION_CACHE_MAX_EXCHANGES', 3))
+
+# --- Interaction Write-Behind Queue ---
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv('WRITE_BEHIND_QUEUE_SIZE', 1000))
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv('WRITE_BEHIND_BATCH_SIZE', 50))
+WRITE_BEHIND_FLUSH_INTERVAL_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_INTERVAL_SECONDS', 0.5))
+WRITE_BEHIND_PUT_TIMEOUT_SECONDS = float(os.getenv('WRITE_BEHIND_PUT_TIMEOUT_SECONDS', 2))
+
+# --- Preference Learning ---
+PREFERENCE_KEYWORD_HALF_LIFE_DAYS = float(os.getenv('PREFERENCE_KEYWORD_HALF_LIFE_DAYS', 7))
+PREFERENCE_MAX_TRACKED_KEYWORDS = int(os.getenv('PREFERENCE_MAX_TRACKED_KEYWORDS', 200))
+PREFERENCE_FEEDBACK_WEIGHT = int(os.getenv('PREFERENCE_FEEDBACK_WEIGHT', 3))  # Feedback counts as N interactions
 
 # --- API Keys & URIs ---
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
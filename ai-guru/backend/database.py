@@ -1,49 +1,236 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import threading
+from datetime import datetime
+from pymongo import MongoClient, AsyncMongoClient, ASCENDING, DESCENDING
 import config
+import metrics
 
+DATABASE_NAME = "guru_multibot"
+
+# Synchronous client: connection monitoring, index builds, CLI jobs and code that already runs in
+# worker threads (Career GPS generation). Requests use the asyncio client through repositories.py.
 client = None
 db = None
-chat_collection = None
-learning_collection = None
-feedback_collection = None
+async_client = None
 
-try:
-    # Configure MongoDB client with proper settings
-    client = MongoClient(
-        config.MONGODB_URI,
-        serverSelectionTimeoutMS=5000,  # Shorter timeout
+# Nothing connects at import time. The server pings MongoDB from a background monitor thread
+# (start_connection_monitor) that reconnects with backoff; scripts and jobs without a monitor
+# connect synchronously on their first database access. The asyncio client follows that state.
+_lock = threading.Lock()
+_status = {
+    "connected": False,
+    "attempts": 0,
+    "last_error": None,
+    "last_checked": None,
+    "connected_since": None,
+}
+_connect_callbacks = []
+_monitor_thread = None
+_monitor_stop = threading.Event()
+
+def _client_options():
+    return dict(
+        serverSelectionTimeoutMS=config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
         connectTimeoutMS=5000,
         socketTimeoutMS=5000,
-        maxPoolSize=50, # Allow more connections
-        minPoolSize=5
+        event_listeners=[metrics.MongoCommandMetrics()]  # Per-command latency for /metrics
+    )
+
+def _create_client():
+    return MongoClient(config.MONGODB_URI, maxPoolSize=config.MONGO_SYNC_MAX_POOL_SIZE, **_client_options())
+
+def _create_async_client():
+    return AsyncMongoClient(
+        config.MONGODB_URI,
+        maxPoolSize=config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=config.MONGO_MIN_POOL_SIZE,
+        **_client_options()
     )
-    # Test the connection
-    client.admin.command('ping')
+
+def connect():
+    """
+    Ping MongoDB, creating the client on the first call, and record the outcome in connection_status().
+    Returns whether the database is reachable; never raises. on_connect callbacks run when it becomes reachable.
+    """
+    global client, db
+    with _lock:
+        was_connected = _status["connected"]
+        _status["attempts"] += 1
+        _status["last_checked"] = datetime.utcnow()
+        try:
+            if client is None:
+                client = _create_client()
+            client.admin.command('ping')
+        except Exception as e:
+            _status["connected"] = False
+            _status["last_error"] = str(e)
+            if was_connected:
+                print(f"[ERROR] MongoDB connection lost: {e}")
+            elif _status["attempts"] == 1:
+                print(f"[ERROR] MongoDB connection failed: {e}")
+                print("[INFO] Fallback: running in in-memory mode until MongoDB is reachable.")
+            return False
+
+        _status["connected"] = True
+        _status["last_error"] = None
+        if was_connected:
+            return True
+        if db is None:
+            db = client[DATABASE_NAME]
+        _status["connected_since"] = _status["last_checked"]
+        callbacks = list(_connect_callbacks)
     print("✅ MongoDB connection successful")
-    db = client.guru_multibot
-    chat_collection = db.chat_history
-    learning_collection = db.learned_patterns
-    feedback_collection = db.user_feedback
-
-except ConnectionFailure as e:
-    print(f"[ERROR] MongoDB connection failed: {e}")
-    print("[INFO] Fallback: Application will not be able to persist data.")
-    # In a real application, you might want to exit or have a more robust fallback.
-except Exception as e:
-    print(f"[ERROR] An unexpected error occurred with MongoDB: {e}")
+
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠️ MongoDB on-connect callback failed: {e}")
+    return True
+
+def on_connect(callback):
+    """Run `callback()` every time MongoDB becomes reachable, and right away if it already is"""
+    with _lock:
+        if callback in _connect_callbacks:
+            return
+        _connect_callbacks.append(callback)
+        connected = _status["connected"]
+    if connected:
+        callback()
+
+def _monitor_loop():
+    delay = config.MONGO_RECONNECT_INITIAL_SECONDS
+    while not _monitor_stop.is_set():
+        if connect():
+            delay = config.MONGO_RECONNECT_INITIAL_SECONDS
+            wait = config.MONGO_HEALTHCHECK_INTERVAL_SECONDS
+        else:
+            wait = delay
+            delay = min(delay * 2, config.MONGO_RECONNECT_MAX_SECONDS)
+        _monitor_stop.wait(wait)
+
+def start_connection_monitor():
+    """Connect and keep checking MongoDB from a daemon thread (reconnecting with exponential backoff)"""
+    global _monitor_thread
+    if _monitor_thread is not None and _monitor_thread.is_alive():
+        return
+    _monitor_stop.clear()
+    _monitor_thread = threading.Thread(target=_monitor_loop, name="mongo-connection-monitor", daemon=True)
+    _monitor_thread.start()
+
+def stop_connection_monitor(timeout=5):
+    global _monitor_thread
+    _monitor_stop.set()
+    if _monitor_thread is not None:
+        _monitor_thread.join(timeout)
+        _monitor_thread = None
+
+def _ensure_connection():
+    # Without a monitor (CLI jobs, scripts) the first access connects synchronously, once
+    if _monitor_thread is None and _status["attempts"] == 0:
+        connect()
+
+def connection_status():
+    """Snapshot for health checks: connected, attempts, last_error, last_checked, connected_since"""
+    with _lock:
+        status = dict(_status)
+    status["monitor_running"] = _monitor_thread is not None and _monitor_thread.is_alive()
+    return status
+
+# Indexes behind every hot query, per collection: (keys, create_index options)
+INDEXES = {
+    "chat_history": [
+        # Recent context, session message pages, per-session counts and deletes
+        ([("session_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+        # Time-range analytics
+        ([("timestamp", DESCENDING)], {}),
+        # Exports stream in (timestamp, _id) order; without this an unfiltered export sorts in memory
+        ([("timestamp", ASCENDING), ("_id", ASCENDING)], {}),
+        # Archive candidates that were rehydrated (only those documents carry the field)
+        ([("rehydrated_at", ASCENDING)], {"sparse": True}),
+    ],
+    "learned_patterns": [
+        # One preference document per session: concurrent first upserts must not create two
+        ([("session_id", ASCENDING)], {"unique": True}),
+    ],
+    "user_feedback": [
+        ([("feedback_timestamp", DESCENDING)], {}),
+        # Feedback export, whole collection and per session, in (feedback_timestamp, _id) order
+        ([("feedback_timestamp", ASCENDING), ("_id", ASCENDING)], {}),
+        ([("session_id", ASCENDING), ("feedback_timestamp", ASCENDING), ("_id", ASCENDING)], {}),
+    ],
+    "sessions": [
+        # Sidebar listing and its keyset cursor
+        ([("latest_timestamp", DESCENDING), ("_id", DESCENDING)], {}),
+    ],
+    "response_cache": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "vision_cache": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "career_content": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+def ensure_indexes(target_db=None):
+    """Create INDEXES; create_index is a no-op for indexes that already exist, so this is safe on every start"""
+    target_db = target_db if target_db is not None else get_db()
+    if target_db is None:
+        return []
+    created = []
+    for collection_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                created.append(f"{collection_name}.{target_db[collection_name].create_index(keys, **options)}")
+            except Exception as e:
+                print(f"⚠️ Failed to create index {keys} on {collection_name}: {e}")
+    return created
 
 def get_db():
+    _ensure_connection()
     return db
 
-def get_chat_collection():
-    return chat_collection
+def _get_collection(name):
+    database = get_db()
+    return database[name] if database is not None else None
 
-def get_learning_collection():
-    return learning_collection
+def get_chat_collection():
+    return _get_collection("chat_history")
 
 def get_feedback_collection():
-    return feedback_collection
+    return _get_collection("user_feedback")
+
+def get_sessions_collection():
+    return _get_collection("sessions")
+
+def get_rollups_collection():
+    return _get_collection("analytics_rollups")
+
+def get_career_content_collection():
+    return _get_collection("career_content")
+
+def get_chat_archive_collection():
+    return _get_collection("chat_archive")
 
 def is_db_available():
-    return client is not None and db is not None
+    _ensure_connection()
+    return _status["connected"] and db is not None
+
+def get_async_db():
+    """
+    The database on the asyncio client, or None while MongoDB is unreachable.
+    The client is created on first use inside the running event loop; close_async_client() releases it.
+    """
+    global async_client
+    if not is_db_available():
+        return None
+    if async_client is None:
+        async_client = _create_async_client()
+    return async_client[DATABASE_NAME]
+
+async def close_async_client():
+    global async_client
+    mongo_client, async_client = async_client, None
+    if mongo_client is not None:
+        await mongo_client.close()
@@ -0,0 +1,51 @@
+"""
+The Gemini SDK module: google.generativeai, or the local stand-in in mock_gemini.py when MOCK_GEMINI is set.
+The SDK alone takes about a second to import, so the server imports it in a worker thread at
+startup (start_loading) and async callers go through load(), never importing on the event loop.
+"""
+import asyncio
+import threading
+import config
+
+_genai = None
+_models = {}
+_lock = threading.Lock()
+
+def get_genai():
+    """The SDK module, imported and configured with GEMINI_API_KEY on the first call"""
+    global _genai
+    if _genai is None:
+        with _lock:
+            if _genai is None:
+                if config.MOCK_GEMINI:
+                    import mock_gemini as sdk
+                    print("🧪 MOCK_GEMINI enabled: Gemini calls are served by the local mock")
+                else:
+                    import google.generativeai as sdk
+                sdk.configure(api_key=config.GEMINI_API_KEY)
+                _genai = sdk
+    return _genai
+
+def start_loading():
+    """Import and configure the SDK in a worker thread without delaying startup; returns the task"""
+    return asyncio.create_task(asyncio.to_thread(get_genai))
+
+async def load():
+    """The SDK module for event-loop callers: reuses the startup import, otherwise imports in a worker thread"""
+    if _genai is None:
+        # Waits on the lock while the startup import is still running
+        await asyncio.to_thread(get_genai)
+    return _genai
+
+def get_model(model_name):
+    """Shared GenerativeModel for `model_name`, created on first use"""
+    model = _models.get(model_name)
+    if model is None:
+        genai = get_genai()
+        with _lock:
+            model = _models.setdefault(model_name, genai.GenerativeModel(model_name))
+    return model
+
+def is_loaded():
+    """Whether the SDK has been imported yet (it is loaded in the background at startup)"""
+    return _genai is not None
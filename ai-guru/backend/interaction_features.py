@@ -0,0 +1,235 @@
+import json
+import re
+from itertools import islice
+import config
+
+# Keyword dictionaries per feature family. Labels are in precedence order: the first label
+# with a matching keyword wins. Keywords match as case-insensitive substrings, like the
+# `word in text.lower()` checks they replace; all-caps keywords are acronyms and match whole
+# words only ('AI' matches "ai" or "AI" but not "explain"). Adding keywords or topics does not add scans.
+INPUT_LEXICON = {
+    "request_type": {
+        "paragraph": ['paragraph', 'write', 'describe', 'tell me about', 'essay'],
+        "structured": ['explain', 'list', 'break down', 'steps', 'outline'],
+        "casual": ['hi', 'hello', 'thanks', 'how are you'],
+    },
+    "formality_level": {
+        "formal": ['please', 'could you', 'would you', 'kindly', 'sir', 'madam'],
+        "casual": ['hey', 'yo', 'sup', 'what\'s up', 'cool', 'awesome'],
+    },
+    "topic": {
+        "science": ['science', 'physics', 'chemistry', 'biology', 'research'],
+        "technology": ['AI', 'artificial intelligence', 'computer', 'software', 'programming', 'tech'],
+        "education": ['learn', 'study', 'school', 'education', 'knowledge'],
+        "career": ['job', 'career', 'work', 'profession', 'employment', 'gps'],
+    },
+    "sentiment": {
+        "positive": ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic'],
+        "negative": ['bad', 'terrible', 'awful', 'horrible', 'disappointing'],
+    },
+}
+
+RESPONSE_LEXICON = {
+    "personalization": {"personalization": ['you', 'your']},
+    "actionable": {"actionable": ['try', 'use', 'apply', 'practice']},
+}
+
+COMMON_WORDS = frozenset({'the', 'and', 'you', 'for', 'are', 'with', 'can', 'about', 'what', 'how', 'that', 'this'})
+
+_KEYWORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+_BULLETS_RE = re.compile(r'^[\s]*[-•*]', re.MULTILINE)
+_NUMBERING_RE = re.compile(r'^[\s]*\d+\.', re.MULTILINE)
+_SECTIONS_RE = re.compile(r'\*\*.*\*\*')
+_EMOJI_RE = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF]')
+
+def _trie_regex(keywords):
+    """Compile keywords into one alternation shaped like a trie, so the engine never re-tries shared prefixes"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # A keyword ends here but longer ones continue: optional (greedy) tail prefers the longest
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+class KeywordMatcher:
+    """Finds every lexicon keyword in a text with a single precompiled regex scan"""
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+        self._labels = {}  # keyword -> [(family, label)]
+        self._word_labels = {}  # whole-word (acronym) keyword -> [(family, label)]
+        for family, labels in lexicon.items():
+            for label, keywords in labels.items():
+                for keyword in keywords:
+                    target = self._word_labels if keyword.isupper() else self._labels
+                    target.setdefault(keyword.lower(), []).append((family, label))
+
+        keywords = sorted(self._labels)
+        # The scan reports the longest keyword at each position; it also implies every
+        # keyword contained in it ("how are you" contains "yo"), as substring checks would
+        self._implied = {keyword: [other for other in keywords if other in keyword] for keyword in keywords}
+        self._pattern = re.compile(_trie_regex(keywords))
+        # Acronyms need word boundaries: a bare substring 'ai' would hit "explain", "again", ...
+        # The start boundary is checked in scan(); a leading \b would stop re from searching
+        # for the literal prefix and cost a full-speed pass over the text
+        self._word_pattern = re.compile('(?:' + _trie_regex(sorted(self._word_labels)) + r')\b') if self._word_labels else None
+
+    def scan(self, text_lower):
+        """Return {family: {label: {matched keywords}}}"""
+        hits = {}
+        for keyword in set(self._pattern.findall(text_lower)):
+            for implied in self._implied[keyword]:
+                for family, label in self._labels[implied]:
+                    hits.setdefault(family, {}).setdefault(label, set()).add(implied)
+        if self._word_pattern is not None:
+            for match in self._word_pattern.finditer(text_lower):
+                start = match.start()
+                if start and (text_lower[start - 1].isalnum() or text_lower[start - 1] == '_'):
+                    continue
+                for family, label in self._word_labels[match.group()]:
+                    hits.setdefault(family, {}).setdefault(label, set()).add(match.group())
+        return hits
+
+    def first_label(self, hits, family, default):
+        """Highest-precedence label of `family` that matched"""
+        family_hits = hits.get(family, {})
+        for label in self.lexicon[family]:
+            if label in family_hits:
+                return label
+        return default
+
+def _load_lexicon_extensions(path):
+    """Merge extra keywords/topics from a JSON file shaped like INPUT_LEXICON"""
+    with open(path, encoding='utf-8') as f:
+        extensions = json.load(f)
+    for family, labels in extensions.items():
+        family_labels = INPUT_LEXICON.setdefault(family, {})
+        for label, keywords in labels.items():
+            family_labels.setdefault(label, []).extend(keywords)
+
+if config.FEATURE_LEXICON_PATH:
+    _load_lexicon_extensions(config.FEATURE_LEXICON_PATH)
+
+INPUT_MATCHER = KeywordMatcher(INPUT_LEXICON)
+RESPONSE_MATCHER = KeywordMatcher(RESPONSE_LEXICON)
+
+def analyze_interaction(user_input, bot_response):
+    """Every learning feature of an interaction, scanning each text once"""
+    input_hits = INPUT_MATCHER.scan(user_input.lower())
+    return {
+        "input_patterns": analyze_input_patterns(user_input, input_hits),
+        "response_format": detect_response_format(bot_response),
+        "interaction_context": extract_context_features(user_input, bot_response, input_hits)
+    }
+
+def analyze_input_patterns(user_input, input_hits=None):
+    """Analyze patterns in user input to learn preferences"""
+    user_input_lower = user_input.lower()
+    if input_hits is None:
+        input_hits = INPUT_MATCHER.scan(user_input_lower)
+    
+    patterns = {
+        "request_type": INPUT_MATCHER.first_label(input_hits, "request_type", "mixed"),
+        "formality_level": INPUT_MATCHER.first_label(input_hits, "formality_level", "neutral"),
+        "length_preference": "",
+        "keywords": []
+    }
+    
+    # Length preference detection
+    if len(user_input) < 20:
+        patterns["length_preference"] = "short"
+    elif len(user_input) > 100:
+        patterns["length_preference"] = "detailed"
+    else:
+        patterns["length_preference"] = "medium"
+    
+    # Extract key topics/keywords
+    # Stop at the tenth keyword instead of tokenizing the whole (up to 5000-char) message
+    words = (match.group() for match in _KEYWORD_RE.finditer(user_input_lower))
+    patterns["keywords"] = list(islice((word for word in words if word not in COMMON_WORDS), 10))
+    
+    return patterns
+
+def detect_response_format(bot_response):
+    """Analyze the format of bot response"""
+    if not bot_response:
+        return "empty"
+    
+    format_info = {
+        "has_bullets": bool(_BULLETS_RE.search(bot_response)),
+        "has_numbering": bool(_NUMBERING_RE.search(bot_response)),
+        "has_sections": bool(_SECTIONS_RE.search(bot_response)),
+        "has_emojis": bool(_EMOJI_RE.search(bot_response)),
+        "length": len(bot_response),
+        "format_type": ""
+    }
+    
+    if format_info["has_sections"] and (format_info["has_bullets"] or format_info["has_numbering"]):
+        format_info["format_type"] = "structured"
+    elif not format_info["has_bullets"] and not format_info["has_numbering"] and not format_info["has_sections"]:
+        format_info["format_type"] = "paragraph"
+    else:
+        format_info["format_type"] = "mixed"
+    
+    return format_info
+
+def extract_context_features(user_input, bot_response, input_hits=None):
+    """Extract contextual features for learning"""
+    if input_hits is None:
+        input_hits = INPUT_MATCHER.scan(user_input.lower())
+    return {
+        "topic": extract_topic(user_input, input_hits),
+        "sentiment": detect_sentiment(user_input, input_hits),
+        "complexity": assess_complexity(user_input),
+        "success_indicators": detect_success_patterns(user_input, bot_response)
+    }
+
+def extract_topic(text, input_hits=None):
+    """Simple topic extraction"""
+    if input_hits is None:
+        input_hits = INPUT_MATCHER.scan(text.lower())
+    return INPUT_MATCHER.first_label(input_hits, "topic", "general")
+
+def detect_sentiment(text, input_hits=None):
+    """Simple sentiment detection"""
+    if input_hits is None:
+        input_hits = INPUT_MATCHER.scan(text.lower())
+    sentiment_hits = input_hits.get("sentiment", {})
+    pos_count = len(sentiment_hits.get("positive", ()))
+    neg_count = len(sentiment_hits.get("negative", ()))
+    
+    if pos_count > neg_count:
+        return 'positive'
+    elif neg_count > pos_count:
+        return 'negative'
+    else:
+        return 'neutral'
+
+def assess_complexity(text):
+    """Assess text complexity"""
+    words = text.split()
+    if len(words) < 10:
+        return 'simple'
+    elif len(words) > 50:
+        return 'complex'
+    else:
+        return 'moderate'
+
+def detect_success_patterns(user_input, bot_response):
+    """Detect success patterns in interactions"""
+    response_hits = RESPONSE_MATCHER.scan(bot_response.lower())
+    return {
+        "follow_up_question": "?" in bot_response[-50:],  # Ends with question
+        "personalization": "personalization" in response_hits,
+        "actionable": "actionable" in response_hits
+    }
@@ -0,0 +1,27 @@
+"""
+Move chat_history interactions older than the retention window to the compressed cold archive.
+Run it from cron (e.g. nightly); safe to re-run, and an interrupted run only re-archives its last batch.
+
+    cd backend && python -m jobs.archive_chat_history [--days 180] [--batch-size 5000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import services.chat_archive as chat_archive
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=config.CHAT_RETENTION_DAYS, help="retention window; 0 archives nothing")
+    parser.add_argument("--batch-size", type=int, default=config.CHAT_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--archive-dir", default=config.CHAT_ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    stats = chat_archive.archive_expired(days=args.days, batch_size=args.batch_size, archive_dir=args.archive_dir)
+    print(f"✅ Archived {stats['evicted']} interactions ({stats['written']} written to {stats['files']} files under {args.archive_dir})")
+
+if __name__ == "__main__":
+    main()
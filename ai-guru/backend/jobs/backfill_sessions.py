@@ -0,0 +1,46 @@
+"""
+Build the `sessions` collection from existing chat_history in bulk.
+Safe to re-run: each session summary is recomputed and replaced.
+
+    cd backend && python -m jobs.backfill_sessions [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import services.session_summaries as session_summaries
+
+def backfill(batch_size=1000):
+    chat_collection = database.get_chat_collection()
+    sessions_collection = database.get_sessions_collection()
+    if chat_collection is None or sessions_collection is None:
+        raise RuntimeError("MongoDB unavailable")
+
+    written = 0
+    batch = []
+    for operation in session_summaries.summarize_history(chat_collection):
+        batch.append(operation)
+        if len(batch) >= batch_size:
+            sessions_collection.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        sessions_collection.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    database.ensure_indexes()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    written = backfill(args.batch_size)
+    print(f"✅ Backfilled {written} session summaries")
+
+if __name__ == "__main__":
+    main()
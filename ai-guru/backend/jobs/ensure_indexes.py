@@ -0,0 +1,37 @@
+"""
+Create the MongoDB indexes the API relies on (idempotent), optionally checking
+every hot query's plan afterwards.
+
+    cd backend && python -m jobs.ensure_indexes [--explain]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import query_diagnostics
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--explain", action="store_true", help="explain() every hot query and fail on a COLLSCAN or in-memory SORT")
+    args = parser.parse_args()
+
+    if not database.is_db_available():
+        print("❌ MongoDB unavailable")
+        sys.exit(1)
+
+    for index in database.ensure_indexes():
+        print(f"✅ {index}")
+
+    if args.explain:
+        results = query_diagnostics.explain_hot_queries(database.get_db())
+        for result in results:
+            marker = "✅" if result["ok"] else "❌"
+            print(f"{marker} {result['name']} ({result['collection']}): {' > '.join(result['stages'])}")
+        if not all(result["ok"] for result in results):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Erase archived interactions of deleted sessions from the chat archive files.
+Deletes already rewrite the affected files; this sweeps up lines left by a delete whose purge failed
+or raced another worker. Run it from cron after jobs.archive_chat_history; safe to re-run.
+
+    cd backend && python -m jobs.purge_chat_archive [--grace-seconds 3600]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import services.chat_archive as chat_archive
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--archive-dir", default=config.CHAT_ARCHIVE_DIR)
+    parser.add_argument("--grace-seconds", type=int, default=3600,
+                        help="skip files written more recently, which an archive run may not have indexed yet")
+    args = parser.parse_args()
+
+    stats = chat_archive.purge_unindexed(archive_dir=args.archive_dir, grace_seconds=args.grace_seconds)
+    print(f"✅ Purged {stats['removed']} interactions from {stats['files']} files ({stats['deleted_files']} deleted)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Recompute the analytics_rollups collection from chat_history and user_feedback.
+Run once for a database that predates the rollups, or to repair drifted counters.
+
+    cd backend && python -m jobs.rebuild_analytics_rollups
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.analytics_rollups as analytics_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    written = analytics_rollups.rebuild()
+    print(f"✅ Rebuilt {written} analytics rollup documents")
+
+if __name__ == "__main__":
+    main()
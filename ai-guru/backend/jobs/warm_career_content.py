@@ -0,0 +1,50 @@
+"""
+Pre-generate the shared roadmap and learning path of popular careers so the first
+user to open them does not wait on the model. Already-stored careers are skipped.
+
+    cd backend && python -m jobs.warm_career_content --top 10
+    cd backend && python -m jobs.warm_career_content --careers "Data Scientist" "UX Designer"
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.career_content_store as career_content_store
+import services.career_gps_service as career_gps_service
+
+GENERATORS = {
+    career_content_store.ROADMAP: lambda name: career_gps_service.get_career_roadmap(name, 0),
+    career_content_store.LEARNING_PATH: lambda name: career_gps_service.generate_personalized_learning_path(name, "", {}, 0),
+}
+
+def warm(kind, career_name):
+    if career_content_store.is_stored(kind, career_name):
+        return "skipped"
+    GENERATORS[kind](career_name)
+    return "stored" if career_content_store.is_stored(kind, career_name) else "failed"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--top", type=int, default=len(career_content_store.POPULAR_CAREERS),
+                        help="Warm the first N popular careers")
+    parser.add_argument("--careers", nargs="+", help="Warm these careers instead of the popular list")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(GENERATORS), default=sorted(GENERATORS))
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent generations")
+    args = parser.parse_args()
+
+    careers = args.careers or career_content_store.POPULAR_CAREERS[:args.top]
+    tasks = [(kind, career) for career in careers for kind in args.kinds]
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        results = list(executor.map(lambda task: warm(*task), tasks))
+
+    for (kind, career), result in zip(tasks, results):
+        print(f"{'✅' if result != 'failed' else '⚠️'} {kind:<14} {career}: {result}")
+    print(f"✅ Warmed {results.count('stored')} item(s), {results.count('skipped')} already stored, "
+          f"{results.count('failed')} failed")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 """List available Gemini models"""
-import google.generativeai as genai
-import config
+import genai_backend
 
-genai.configure(api_key=config.GEMINI_API_KEY)
+genai = genai_backend.get_genai()
 
 print("📋 Listing available Gemini models:\n")
 for model in genai.list_models():
@@ -3,71 +3,65 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import models
-from fastapi import FastAPI, Body, UploadFile, File, HTTPException, Depends, Request
+from fastapi import FastAPI, Body, UploadFile, File, HTTPException, Depends, Request, Query
 from typing import Optional
+from contextlib import asynccontextmanager
 from pymongo import MongoClient
 import tempfile
 import os
 import base64
 from fastapi.middleware.cors import CORSMiddleware
-import google.generativeai as genai
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from PIL import Image
 import io
 from datetime import datetime
 import uuid
-import re
-from models import ChatRequest, FeedbackRequest
-from collections import defaultdict
-from datetime import timedelta
+import json
+import secrets
+import asyncio
+from models import ChatRequest, BatchChatRequest, FeedbackRequest
 import langdetect
 from langdetect import detect, detect_langs, DetectorFactory
 from langdetect.lang_detect_exception import LangDetectException
 
 import services.gemini_service as gemini_service
+import services.response_cache as response_cache
+from services.interaction_writer import create_interaction_writer
+import services.preference_model as preference_model
+import services.session_cache as session_cache
+import services.session_summaries as session_summaries
+import services.analytics_rollups as analytics_rollups
+import services.image_pipeline as image_pipeline
+import services.vision_cache as vision_cache
+import services.career_content_store as career_content_store
+import services.career_gps_service as career_gps_service
+import services.chat_archive as chat_archive
+import services.data_export as data_export
+import services.prompt_builder as prompt_builder
 import utils
 import database
+import repositories
+import genai_backend
+import metrics
 import config
+import rate_limit
+import interaction_features
+import pagination
+import query_diagnostics
+from rate_limit import RateLimiter
 
 # Set seed for consistent language detection
 
-# Configure Gemini
-genai.configure(api_key=config.GEMINI_API_KEY)
-
-# Initialize the generative models
-text_model = genai.GenerativeModel('gemini-pro')
-vision_model = genai.GenerativeModel('gemini-pro-vision')
-
-
+# The Gemini SDK is imported in the background at startup and models are created on first use (see genai_backend)
 
-# Security: Rate limiting
-class RateLimiter:
-    def __init__(self, max_requests: int = 30, time_window: int = 60):
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.requests = defaultdict(list)
-    
-    async def check_rate_limit(self, client_ip: str):
-        now = datetime.now()
-        
-        # Clean old requests
-        self.requests[client_ip] = [
-            req_time for req_time in self.requests[client_ip]
-            if now - req_time < timedelta(seconds=self.time_window)
-        ]
-        
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.max_requests:
-            raise HTTPException(
-                status_code=429, 
-                detail="Rate limit exceeded. Please try again later."
-            )
-        
-        # Add current request
-        self.requests[client_ip].append(now)
 
 # Global rate limiter instance
-rate_limiter = RateLimiter(max_requests=config.RATE_LIMIT_MAX_REQUESTS, time_window=config.RATE_LIMIT_TIME_WINDOW)
+rate_limiter = RateLimiter(
+    max_requests=config.RATE_LIMIT_MAX_REQUESTS,
+    time_window=config.RATE_LIMIT_TIME_WINDOW,
+    backend=rate_limit.create_backend()
+)
 
 # Allowed MIME types for image uploads
 allowed_types = [
@@ -80,42 +74,28 @@ allowed_types = [
 
 
 
-def store_interaction(input_type, user_input, bot_response, session_id=None, language_code=None, user_feedback=None):
+async def store_interaction(input_type, user_input, bot_response, session_id=None, language_code=None, user_feedback=None):
+    """
+    Queue an interaction for persistence and return immediately.
+    Feature analysis, the insert and preference learning run in the write-behind worker.
+    """
     # Generate session_id if not provided
-    if not session_id:
-        session_id = str(uuid.uuid4())[:8]  # Short session ID
+    new_session = not session_id
+    if new_session:
+        session_id = new_session_id()
     
     interaction_id = None
     
+    # Write-through to the session cache so the next turn needs no Mongo read
+    session_cache.record_exchange(session_id, user_input, bot_response, new_session=new_session)
+    
     # Only store in MongoDB if connection is available
     if database.is_db_available():
         try:
-            # Generate a unique interaction ID
-            interaction_id = str(uuid.uuid4())
-            
-            # Create document for MongoDB with learning data
-            document = {
-                "_id": interaction_id,
-                "input_type": input_type,
-                "user_input": user_input,
-                "bot_response": bot_response,
-                "session_id": session_id,
-                "language_code": language_code,
-                "language_name": utils.LANGUAGE_NAMES.get(language_code, 'Unknown') if language_code else None,
-                "timestamp": datetime.utcnow(),
-                "user_feedback": user_feedback,  # Store user feedback for learning
-                "response_length": len(bot_response) if bot_response else 0,
-                "input_patterns": analyze_input_patterns(user_input),
-                "response_format": detect_response_format(bot_response),
-                "interaction_context": extract_context_features(user_input, bot_response)
-            }
-            
-            # Insert into MongoDB
-            database.get_chat_collection().insert_one(document)
-            print(f"💾 Stored interaction for session {session_id} (Language: {LANGUAGE_NAMES.get(language_code, 'Unknown')})")
+            document = build_interaction_document(input_type, user_input, bot_response, session_id, language_code, user_feedback)
+            interaction_id = document["_id"]
             
-            # Learn from this interaction for future improvements
-            learn_from_interaction(document)
+            await interaction_writer.submit(document)
             
         except Exception as e:
             print(f"⚠️ Failed to store interaction: {e}")
@@ -126,234 +106,159 @@ def store_interaction(input_type, user_input, bot_response, session_id=None, lan
     
     return session_id, interaction_id
 
-def analyze_input_patterns(user_input):
-    """Analyze patterns in user input to learn preferences"""
-    patterns = {
-        "request_type": "",
-        "formality_level": "",
-        "length_preference": "",
-        "keywords": []
-    }
-    
-    user_input_lower = user_input.lower()
-    
-    # Detect request type
-    if any(word in user_input_lower for word in ['paragraph', 'write', 'describe', 'tell me about', 'essay']):
-        patterns["request_type"] = "paragraph"
-    elif any(word in user_input_lower for word in ['explain', 'list', 'break down', 'steps', 'outline']):
-        patterns["request_type"] = "structured"
-    elif any(word in user_input_lower for word in ['hi', 'hello', 'thanks', 'how are you']):
-        patterns["request_type"] = "casual"
-    else:
-        patterns["request_type"] = "mixed"
-    
-    # Detect formality level
-    formal_indicators = ['please', 'could you', 'would you', 'kindly', 'sir', 'madam']
-    casual_indicators = ['hey', 'yo', 'sup', 'what\'s up', 'cool', 'awesome']
-    
-    if any(word in user_input_lower for word in formal_indicators):
-        patterns["formality_level"] = "formal"
-    elif any(word in user_input_lower for word in casual_indicators):
-        patterns["formality_level"] = "casual"
-    else:
-        patterns["formality_level"] = "neutral"
-    
-    # Length preference detection
-    if len(user_input) < 20:
-        patterns["length_preference"] = "short"
-    elif len(user_input) > 100:
-        patterns["length_preference"] = "detailed"
-    else:
-        patterns["length_preference"] = "medium"
-    
-    # Extract key topics/keywords
-    import re
-    words = re.findall(r'\b[a-zA-Z]{3,}\b', user_input.lower())
-    common_words = {'the', 'and', 'you', 'for', 'are', 'with', 'can', 'about', 'what', 'how', 'that', 'this'}
-    patterns["keywords"] = [word for word in words if word not in common_words][:10]
-    
-    return patterns
-
-def detect_response_format(bot_response):
-    """Analyze the format of bot response"""
-    if not bot_response:
-        return "empty"
-    
-    format_info = {
-        "has_bullets": bool(re.search(r'^[\s]*[-•*]', bot_response, re.MULTILINE)),
-        "has_numbering": bool(re.search(r'^[\s]*\d+\.', bot_response, re.MULTILINE)),
-        "has_sections": bool(re.search(r'\*\*.*\*\*', bot_response)),
-        "has_emojis": bool(re.search(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF]', bot_response)),
-        "length": len(bot_response),
-        "format_type": ""
-    }
-    
-    if format_info["has_sections"] and (format_info["has_bullets"] or format_info["has_numbering"]):
-        format_info["format_type"] = "structured"
-    elif not format_info["has_bullets"] and not format_info["has_numbering"] and not format_info["has_sections"]:
-        format_info["format_type"] = "paragraph"
-    else:
-        format_info["format_type"] = "mixed"
-    
-    return format_info
+def new_session_id():
+    return str(uuid.uuid4())[:8]  # Short session ID
 
-def extract_context_features(user_input, bot_response):
-    """Extract contextual features for learning"""
+def build_interaction_document(input_type, user_input, bot_response, session_id, language_code=None, user_feedback=None):
+    """Document for MongoDB; learning data is added by enrich_interaction()"""
     return {
-        "topic": extract_topic(user_input),
-        "sentiment": detect_sentiment(user_input),
-        "complexity": assess_complexity(user_input),
-        "success_indicators": detect_success_patterns(user_input, bot_response)
+        "_id": str(uuid.uuid4()),  # Unique interaction ID
+        "input_type": input_type,
+        "user_input": user_input,
+        "bot_response": bot_response,
+        "session_id": session_id,
+        "language_code": language_code,
+        "language_name": utils.LANGUAGE_NAMES.get(language_code, 'Unknown') if language_code else None,
+        "timestamp": datetime.utcnow(),
+        "user_feedback": user_feedback  # Store user feedback for learning
     }
 
-def extract_topic(text):
-    """Simple topic extraction"""
-    topics = {
-        'science': ['science', 'physics', 'chemistry', 'biology', 'research'],
-        'technology': ['AI', 'computer', 'software', 'programming', 'tech'],
-        'education': ['learn', 'study', 'school', 'education', 'knowledge'],
-        'career': ['job', 'career', 'work', 'profession', 'employment', 'gps']
-    }
-    
-    text_lower = text.lower()
-    for topic, keywords in topics.items():
-        if any(keyword in text_lower for keyword in keywords):
-            return topic
-    return 'general'
-
-def detect_sentiment(text):
-    """Simple sentiment detection"""
-    positive_words = ['good', 'great', 'excellent', 'amazing', 'wonderful', 'fantastic']
-    negative_words = ['bad', 'terrible', 'awful', 'horrible', 'disappointing']
-    
-    text_lower = text.lower()
-    pos_count = sum(1 for word in positive_words if word in text_lower)
-    neg_count = sum(1 for word in negative_words if word in text_lower)
-    
-    if pos_count > neg_count:
-        return 'positive'
-    elif neg_count > pos_count:
-        return 'negative'
-    else:
-        return 'neutral'
-
-def assess_complexity(text):
-    """Assess text complexity"""
-    words = text.split()
-    if len(words) < 10:
-        return 'simple'
-    elif len(words) > 50:
-        return 'complex'
-    else:
-        return 'moderate'
+@metrics.CHAT_STAGE_SECONDS.labels("feature_extraction").time()
+def enrich_interaction(document):
+    """Attach the learning features to a queued interaction document"""
+    user_input = document["user_input"]
+    bot_response = document["bot_response"]
+    document["response_length"] = len(bot_response) if bot_response else 0
+    document.update(interaction_features.analyze_interaction(user_input, bot_response))
 
-def detect_success_patterns(user_input, bot_response):
-    """Detect success patterns in interactions"""
-    return {
-        "follow_up_question": "?" in bot_response[-50:],  # Ends with question
-        "personalization": "you" in bot_response.lower() or "your" in bot_response.lower(),
-        "actionable": any(word in bot_response.lower() for word in ['try', 'use', 'apply', 'practice'])
-    }
+async def after_interactions_stored(documents):
+    """Post-insert work for a persisted batch: session summaries, analytics rollups, then preference learning"""
+    new_sessions = 0
+    try:
+        with metrics.CHAT_STAGE_SECONDS.labels("session_summaries").time():
+            new_sessions = await session_summaries.record_interactions(documents)
+    except Exception as e:
+        print(f"⚠️ Failed to update session summaries: {e}")
+    try:
+        with metrics.CHAT_STAGE_SECONDS.labels("analytics_rollups").time():
+            await analytics_rollups.record_interactions(documents, new_sessions)
+    except Exception as e:
+        print(f"⚠️ Failed to update analytics rollups: {e}")
+    await learn_from_interactions(documents)
+
+@metrics.CHAT_STAGE_SECONDS.labels("learning").time()
+async def learn_from_interactions(documents):
+    """Run preference learning for a freshly persisted batch, in insertion order"""
+    for document in documents:
+        print(f"💾 Stored interaction for session {document['session_id']} (Language: {utils.LANGUAGE_NAMES.get(document['language_code'], 'Unknown')})")
+        await learn_from_interaction(document)
 
-def learn_from_interaction(interaction_data):
-    """Learn patterns from successful interactions to improve future responses"""
+async def learn_from_interaction(interaction_data):
+    """Fold one interaction into the session's preference model with a single atomic update"""
     if not database.is_db_available():
         return
     try:
-        chat_collection = database.get_chat_collection()
-        # Analyze recent interactions for learning patterns
-        recent_interactions = list(chat_collection.find({
-            "session_id": interaction_data["session_id"]
-        }).sort("timestamp", -1).limit(5))
-        
-        # Learn user preferences for this session
-        user_preferences = analyze_user_preferences(recent_interactions)
-        
-        # Store learned patterns in a separate collection for future use
-        learning_collection = database.get_learning_collection()
-        if learning_collection is not None:
-            
-            learning_document = {
-                "session_id": interaction_data["session_id"],
-                "user_preferences": user_preferences,
-                "last_updated": datetime.utcnow(),
-                "interaction_count": len(recent_interactions)
-            }
-            
-            # Upsert (update or insert) learning data
-            learning_collection.replace_one(
-                {"session_id": interaction_data["session_id"]},
-                learning_document,
-                upsert=True
-            )
-            
-            print(f"🧠 Updated learning patterns for session {interaction_data['session_id']}")
-            
+        timestamp = interaction_data.get("timestamp") or datetime.utcnow()
+        unix_timestamp = (timestamp - datetime(1970, 1, 1)).total_seconds()
+        landmark = preference_model.decay_landmark(unix_timestamp)
+        increments = preference_model.build_interaction_increments(
+            interaction_data.get("input_patterns", {}),
+            timestamp=unix_timestamp,
+            landmark=landmark
+        )
+        
+        applied = await repositories.learned_patterns.learn(
+            interaction_data["session_id"], increments, landmark, datetime.utcnow()
+        )
+        if applied:
+            session_cache.record_increments(interaction_data["session_id"], *applied)
+        
+        print(f"🧠 Updated learning patterns for session {interaction_data['session_id']}")
+        
     except Exception as e:
         print(f"⚠️ Learning process failed: {e}")
 
-def analyze_user_preferences(interactions):
-    """Analyze user preferences from interaction history"""
-    if not interactions:
-        return {}
-    
-    preferences = {
-        "preferred_format": "neutral",
-        "preferred_length": "medium",
-        "formality_level": "neutral",
-        "topics_of_interest": [],
-        "successful_patterns": []
-    }
-    
-    # Analyze format preferences
-    format_requests = [i["input_patterns"]["request_type"] for i in interactions if "input_patterns" in i]
-    if format_requests:
-        most_common_format = max(set(format_requests), key=format_requests.count)
-        preferences["preferred_format"] = most_common_format
-    
-    # Analyze length preferences
-    length_prefs = [i["input_patterns"]["length_preference"] for i in interactions if "input_patterns" in i]
-    if length_prefs:
-        preferences["preferred_length"] = max(set(length_prefs), key=length_prefs.count)
-    
-    # Analyze formality preferences
-    formality_levels = [i["input_patterns"]["formality_level"] for i in interactions if "input_patterns" in i]
-    if formality_levels:
-        preferences["formality_level"] = max(set(formality_levels), key=formality_levels.count)
-    
-    # Extract topics of interest
-    all_keywords = []
-    for interaction in interactions:
-        if "input_patterns" in interaction and "keywords" in interaction["input_patterns"]:
-            all_keywords.extend(interaction["input_patterns"]["keywords"])
-    
-    if all_keywords:
-        from collections import Counter
-        keyword_counts = Counter(all_keywords)
-        preferences["topics_of_interest"] = [word for word, count in keyword_counts.most_common(10)]
-    
-    return preferences
-
-def get_learned_preferences(session_id):
-    """Retrieve learned preferences for a session"""
+async def get_learned_preferences(session_id):
+    """Retrieve learned preferences for a session, from the session cache when possible"""
+    cached_preferences = session_cache.get_preferences(session_id)
+    if cached_preferences is not None:
+        return cached_preferences
     if not database.is_db_available():
         return {}
     try:
-        learning_collection = database.get_learning_collection()
-        if learning_collection is None:
-            return {}
+        learned_data = await repositories.learned_patterns.find_model(session_id)
         
-        learned_data = learning_collection.find_one({"session_id": session_id})
-        
-        if learned_data and "user_preferences" in learned_data:
-            return learned_data["user_preferences"]
+        session_cache.set_model(session_id, learned_data)
+        if learned_data:
+            # Keep the keyword map bounded (best effort; a concurrent $inc simply re-adds a key)
+            await repositories.learned_patterns.prune_keywords(session_id, preference_model.keywords_to_prune(learned_data))
+            return preference_model.derive_preferences(learned_data)
         
     except Exception as e:
         print(f"⚠️ Failed to retrieve learned preferences: {e}")
     
     return {}
 
+async def get_recent_context(session_id):
+    """Build the recent conversation context (last 2 exchanges) for a session"""
+    if not session_id:
+        return ""
+    
+    exchanges = session_cache.get_exchanges(session_id)
+    if exchanges is None and database.is_db_available():
+        # Cache miss (new worker or evicted session): seed it from Mongo
+        try:
+            recent_messages = await repositories.chat_history.recent_exchanges(session_id, limit=3)  # Get last 3 messages
+            
+            exchanges = [(msg.get('user_input', ''), msg.get('bot_response', '')) for msg in reversed(recent_messages)]  # Chronological order
+            session_cache.set_exchanges(session_id, exchanges)
+        except Exception as e:
+            print(f"Error getting conversation context: {e}")
+    
+    if not exchanges:
+        return ""
+    
+    context_parts = []
+    for user_input, bot_response in exchanges:
+        context_parts.append(f"User: {user_input}")
+        context_parts.append(f"AI: {bot_response}")
+    return "\n".join(context_parts[-4:])  # Last 2 exchanges max
+
+def format_sse_event(event, data):
+    """Serialize one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+# Background write-behind queue for chat interactions
+interaction_writer = create_interaction_writer(
+    lambda: repositories.chat_history.collection,
+    enrich=enrich_interaction,
+    after_insert=after_interactions_stored
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.MONGO_ENSURE_INDEXES_ON_STARTUP:
+        # Runs on the connection monitor thread each time MongoDB becomes reachable
+        database.on_connect(database.ensure_indexes)
+    if int(os.getenv('WEB_CONCURRENCY', '1')) > 1:
+        print("⚠️ Several workers: the per-worker session cache may serve stale recent context (see services/session_cache.py)")
+    # Connect in the background so the server accepts traffic (and answers /healthz) right away
+    database.start_connection_monitor()
+    # The tokenizer may download its BPE file and the Gemini SDK takes about a second to import;
+    # load both off the event loop before the first chat
+    tokenizer_task = prompt_builder.start_loading()
+    genai_task = genai_backend.start_loading()
+    await interaction_writer.start()
+    yield
+    tokenizer_task.cancel()
+    genai_task.cancel()
+    # Flush queued interactions before the worker exits
+    await interaction_writer.stop()
+    await database.close_async_client()
+    database.stop_connection_monitor()
+
 app = FastAPI(
+    lifespan=lifespan,
     title="AI Guru Multibot API",
     description="Secure AI Chat API with MongoDB integration",
     version="2.0.0",
@@ -361,6 +266,16 @@ app = FastAPI(
     redoc_url=None  # Disable redoc
 )
 
+# Reject oversized uploads from Content-Length before the multipart body is parsed
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.method == "POST" and request.url.path == "/image-chat":
+        content_length = request.headers.get("content-length")
+        # Allow some room for the multipart framing and the text field
+        if content_length and content_length.isdigit() and int(content_length) > config.MAX_FILE_SIZE + 64 * 1024:
+            return JSONResponse(status_code=413, content={"detail": f"File too large. Max size: {config.MAX_FILE_SIZE // 1024 // 1024}MB"})
+    return await call_next(request)
+
 # Security Headers Middleware
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
@@ -392,33 +307,23 @@ app.add_middleware(
 async def chat_endpoint(request: ChatRequest, http_request: Request):
     try:
         # Security: Rate limiting
-        await rate_limiter.check_rate_limit(http_request.client.host)
+        with metrics.CHAT_STAGE_SECONDS.labels("rate_limit").time():
+            await rate_limiter.check_rate_limit(http_request.client.host)
         text = request.message
-        detected_lang, confidence, should_display = utils.detect_language(text)
+        with metrics.CHAT_STAGE_SECONDS.labels("language_detection").time():
+            detected_lang, confidence, should_display = utils.detect_language(text)
         language_name = utils.LANGUAGE_NAMES.get(detected_lang, 'Unknown')
         
         # Extract session_id from request
         session_id = request.session_id
         
         # Get learned user preferences for personalization
-        learned_prefs = get_learned_preferences(session_id) if session_id else {}
+        with metrics.CHAT_STAGE_SECONDS.labels("preference_lookup").time():
+            learned_prefs = await get_learned_preferences(session_id) if session_id else {}
         
         # Get recent conversation context to understand conversation flow
-        recent_context = ""
-        if session_id and database.is_db_available():
-            try:
-                recent_messages = list(database.get_chat_collection().find({
-                    "session_id": session_id
-                }).sort("timestamp", -1).limit(3))  # Get last 3 messages
-                
-                if recent_messages:
-                    context_parts = []
-                    for msg in reversed(recent_messages):  # Reverse to show chronological order
-                        context_parts.append(f"User: {msg.get('user_input', '')}")
-                        context_parts.append(f"AI: {msg.get('bot_response', '')}")
-                    recent_context = "\n".join(context_parts[-4:])  # Last 2 exchanges max
-            except Exception as e:
-                print(f"Error getting conversation context: {e}")
+        with metrics.CHAT_STAGE_SECONDS.labels("context_fetch").time():
+            recent_context = await get_recent_context(session_id)
         
         # Security: Don't log sensitive data in production
         if os.getenv('ENVIRONMENT') != 'production':
@@ -429,15 +334,29 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
                 print(f"🧠 Using learned preferences: {learned_prefs}")
             print(f"API Key loaded: {'Yes' if os.getenv('GEMINI_API_KEY') else 'No'}")
         
-        # Generate response using the Gemini service
-        print("Calling Gemini service...")
-        bot_response = gemini_service.generate_text_response(
-            text, recent_context, learned_prefs, detected_lang, language_name, should_display
-        )
-        print(f"Gemini response: {bot_response[:100]}...")
+        # Serve repeated questions from the response cache
+        with metrics.CHAT_STAGE_SECONDS.labels("cache_lookup").time():
+            use_cache = response_cache.should_use_cache(recent_context)
+            cache_key = response_cache.build_cache_key(text, detected_lang, learned_prefs, recent_context) if use_cache else None
+            bot_response = await response_cache.get_cached_response(cache_key) if use_cache else None
+        
+        if bot_response:
+            print("⚡ Serving response from cache")
+        else:
+            # Generate response using the Gemini service (non-blocking, cancelled if the client goes away)
+            print("Calling Gemini service...")
+            with metrics.CHAT_STAGE_SECONDS.labels("gemini_call").time():
+                bot_response = await gemini_service.generate_text_response_async(
+                    text, recent_context, learned_prefs, detected_lang, language_name, should_display,
+                    is_disconnected=http_request.is_disconnected
+                )
+            print(f"Gemini response: {bot_response[:100]}...")
+            if use_cache and bot_response != gemini_service.EMPTY_RESPONSE_FALLBACK:
+                await response_cache.cache_response(cache_key, bot_response)
         
         # Store interaction in database with language info
-        session_id, interaction_id = store_interaction('text', text, bot_response, session_id, detected_lang if should_display else None)
+        with metrics.CHAT_STAGE_SECONDS.labels("persistence").time():
+            session_id, interaction_id = await store_interaction('text', text, bot_response, session_id, detected_lang if should_display else None)
         
         # Only return language info if we're confident about it
         response_data = {
@@ -457,6 +376,12 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
     except HTTPException as http_exc:
         # Re-raise HTTPException directly
         raise http_exc
+    except gemini_service.LLMTimeoutError as e:
+        print(f"Gemini call timed out in chat endpoint: {e}")
+        raise HTTPException(status_code=504, detail="The AI took too long to respond. Please try again.")
+    except gemini_service.ClientDisconnectedError:
+        print("Client disconnected, Gemini call cancelled")
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         print(f"An unexpected error occurred in chat endpoint: {str(e)}")
         import traceback
@@ -479,6 +404,279 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
         
         raise HTTPException(status_code=status_code, detail=error_detail)
 
+# Streaming variant of /chat: forwards tokens as server-sent events as Gemini produces them
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    # Security: Rate limiting
+    await rate_limiter.check_rate_limit(http_request.client.host)
+    text = request.message
+    detected_lang, confidence, should_display = utils.detect_language(text)
+    language_name = utils.LANGUAGE_NAMES.get(detected_lang, 'Unknown')
+    
+    session_id = request.session_id
+    learned_prefs = await get_learned_preferences(session_id) if session_id else {}
+    recent_context = await get_recent_context(session_id)
+    
+    use_cache = response_cache.should_use_cache(recent_context)
+    cache_key = response_cache.build_cache_key(text, detected_lang, learned_prefs, recent_context) if use_cache else None
+    cached_response = await response_cache.get_cached_response(cache_key) if use_cache else None
+    
+    async def event_stream():
+        chunks = []
+        try:
+            if cached_response:
+                chunks.append(cached_response)
+                yield format_sse_event("delta", {"text": cached_response})
+            else:
+                async for delta in gemini_service.stream_text_response(
+                    text, recent_context, learned_prefs, detected_lang, language_name, should_display
+                ):
+                    chunks.append(delta)
+                    yield format_sse_event("delta", {"text": delta})
+        except gemini_service.LLMTimeoutError as e:
+            print(f"Gemini stream timed out: {e}")
+            yield format_sse_event("error", {"status_code": 504, "detail": "The AI took too long to respond. Please try again."})
+            return
+        except Exception as e:
+            print(f"An unexpected error occurred in chat stream: {str(e)}")
+            yield format_sse_event("error", {"status_code": 500, "detail": "An internal server error occurred while processing your request."})
+            return
+        
+        bot_response = "".join(chunks)
+        if not bot_response:
+            bot_response = gemini_service.EMPTY_RESPONSE_FALLBACK
+        elif use_cache and not cached_response:
+            await response_cache.cache_response(cache_key, bot_response)
+        
+        # Persist once, after the full response has been streamed
+        stored_session_id, interaction_id = await store_interaction('text', text, bot_response, session_id, detected_lang if should_display else None)
+        
+        done_data = {
+            "session_id": stored_session_id,
+            "interaction_id": interaction_id
+        }
+        if should_display:
+            done_data.update({
+                "detected_language": detected_lang,
+                "language_name": language_name,
+                "confidence": confidence
+            })
+        yield format_sse_event("done", done_data)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Batch persistence that must outlive a disconnected /chat/batch client
+_background_tasks = set()
+
+async def load_session_contexts(session_ids):
+    """Learned preferences and recent context for each distinct session, read once per batch (concurrently)"""
+    session_ids = list(session_ids)
+    contexts = await asyncio.gather(*(
+        asyncio.gather(get_learned_preferences(session_id), get_recent_context(session_id))
+        for session_id in session_ids
+    ))
+    return {session_id: tuple(context) for session_id, context in zip(session_ids, contexts)}
+
+async def answer_batch_item(index, text, language, session_context, slots):
+    """One /chat/batch answer; returns (index, bot_response, error) where error is (status_code, detail) or None"""
+    detected_lang, _, should_display = language
+    learned_prefs, recent_context = session_context
+    language_name = utils.LANGUAGE_NAMES.get(detected_lang, 'Unknown')
+    
+    use_cache = response_cache.should_use_cache(recent_context)
+    cache_key = response_cache.build_cache_key(text, detected_lang, learned_prefs, recent_context) if use_cache else None
+    bot_response = await response_cache.get_cached_response(cache_key) if use_cache else None
+    if bot_response:
+        return index, bot_response, None
+    
+    try:
+        async with slots:
+            bot_response = await gemini_service.generate_text_response_async(
+                text, recent_context, learned_prefs, detected_lang, language_name, should_display
+            )
+    except gemini_service.LLMTimeoutError as e:
+        print(f"Gemini call timed out in chat batch: {e}")
+        return index, None, (504, "The AI took too long to respond. Please try again.")
+    except Exception as e:
+        print(f"An unexpected error occurred in chat batch item {index}: {str(e)}")
+        return index, None, (500, "An internal server error occurred while processing your request.")
+    
+    if use_cache and bot_response != gemini_service.EMPTY_RESPONSE_FALLBACK:
+        await response_cache.cache_response(cache_key, bot_response)
+    return index, bot_response, None
+
+# Many questions in one call: one rate-limit check, bulk language detection, bounded
+# parallel Gemini calls and a single insert_many. Answers are streamed as NDJSON lines in
+# completion order; each line carries the item's `index` in the request.
+@app.post("/chat/batch")
+async def chat_batch_endpoint(request: BatchChatRequest, http_request: Request):
+    # Security: Rate limiting
+    await rate_limiter.check_rate_limit(http_request.client.host)
+    items = request.items
+    texts = [item.message for item in items]
+    languages = await asyncio.to_thread(utils.detect_language_many, texts)
+    
+    # Items of the same session are answered in parallel, so they all see the context from before the batch
+    session_ids = {item.session_id for item in items if item.session_id}
+    session_contexts = await load_session_contexts(session_ids)
+    no_session = ({}, "")
+    
+    async def result_stream():
+        slots = asyncio.Semaphore(config.CHAT_BATCH_CONCURRENCY)
+        tasks = [
+            asyncio.ensure_future(answer_batch_item(
+                index, texts[index], languages[index], session_contexts.get(item.session_id, no_session), slots
+            ))
+            for index, item in enumerate(items)
+        ]
+        documents = []
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, bot_response, error = await next_done
+                if error:
+                    failed += 1
+                    status_code, detail = error
+                    yield json.dumps({"index": index, "error": {"status_code": status_code, "detail": detail}}) + "\n"
+                    continue
+                
+                detected_lang, confidence, should_display = languages[index]
+                session_id = items[index].session_id
+                new_session = not session_id
+                if new_session:
+                    session_id = new_session_id()
+                session_cache.record_exchange(session_id, texts[index], bot_response, new_session=new_session)
+                
+                if database.is_db_available():
+                    document = build_interaction_document('text', texts[index], bot_response, session_id, detected_lang if should_display else None)
+                    documents.append(document)
+                    interaction_id = document["_id"]
+                else:
+                    interaction_id = f"{session_id}_{int(datetime.utcnow().timestamp())}"  # Fallback ID
+                
+                result = {"index": index, "response": bot_response, "session_id": session_id, "interaction_id": interaction_id}
+                if should_display:
+                    result.update({
+                        "detected_language": detected_lang,
+                        "language_name": utils.LANGUAGE_NAMES.get(detected_lang, 'Unknown'),
+                        "confidence": confidence
+                    })
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            
+            # All answers of the batch go to Mongo as one insert_many
+            stored, documents = documents, []
+            await interaction_writer.submit_many(stored)
+            yield json.dumps({"done": True, "answered": len(items) - failed, "failed": failed, "stored": len(stored)}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            if documents:
+                # Client went away mid-batch: keep the answers that were already produced
+                persist = asyncio.ensure_future(interaction_writer.submit_many(documents))
+                _background_tasks.add(persist)
+                persist.add_done_callback(_background_tasks.discard)
+    
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Chat response cache counters
+@app.get("/cache-stats")
+async def get_cache_stats():
+    return {
+        "chat_response_cache": response_cache.get_cache_stats(),
+        "vision_response_cache": vision_cache.get_cache_stats(),
+        "session_cache": session_cache.get_cache_stats(),
+        "career_gps_recommendation_cache": career_gps_service.get_recommendation_cache_stats(),
+        "career_content_store": career_content_store.get_store_stats()
+    }
+
+def collect_cache_metrics():
+    """Scrape-time cache and write-behind queue counters for /metrics"""
+    caches = {
+        "chat_response": response_cache.get_cache_stats(),
+        "vision_response": vision_cache.get_cache_stats(),
+        "session": session_cache.get_cache_stats(),
+        "career_gps_recommendation": career_gps_service.get_recommendation_cache_stats(),
+        "career_content": career_content_store.get_store_stats(),
+    }
+    writer_stats = interaction_writer.stats()
+    return [
+        ("aiguru_cache_hits_total", "counter", "In-process cache hits",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("aiguru_cache_misses_total", "counter", "In-process cache misses",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("aiguru_cache_hit_ratio", "gauge", "Hits / lookups since the worker started",
+         [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()]),
+        ("aiguru_cache_entries", "gauge", "Entries currently held in memory",
+         [({"cache": name}, stats["size"]) for name, stats in caches.items()]),
+        ("aiguru_write_behind_queued_batches", "gauge", "Interaction batches waiting to be written",
+         [({}, writer_stats["queued_batches"])]),
+        ("aiguru_write_behind_documents_total", "counter", "Interactions handled by the write-behind writer",
+         [({"result": result}, writer_stats[result]) for result in ("written", "failed", "inline_writes")]),
+    ]
+
+metrics.register_collector(collect_cache_metrics)
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def get_metrics():
+    if not config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Liveness probe: the process is serving requests; never touches MongoDB or Gemini
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+# Readiness probe: 503 until the dependencies this worker needs are usable
+@app.get("/readyz")
+async def readyz():
+    mongo = database.connection_status()
+    gemini_configured = bool(config.GEMINI_API_KEY) and config.GEMINI_API_KEY != "your_gemini_api_key_here"
+    checks = {
+        "mongodb": {
+            "connected": mongo["connected"],
+            "required": config.READINESS_REQUIRES_DB,
+            "last_error": mongo["last_error"],
+            "last_checked": mongo["last_checked"].isoformat() if mongo["last_checked"] else None,
+            "connected_since": mongo["connected_since"].isoformat() if mongo["connected_since"] else None
+        },
+        # Configuration only: probing the API itself would spend quota on every check
+        "gemini": {
+            "api_key_configured": gemini_configured,
+            "mock": config.MOCK_GEMINI,
+            "sdk_loaded": genai_backend.is_loaded()
+        }
+    }
+    ready = gemini_configured and (mongo["connected"] or not config.READINESS_REQUIRES_DB)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
+
+@app.get("/diagnostics/query-plans")
+async def get_query_plans():
+    """explain() every hot query; `ok` is false if any of them scans a whole collection or sorts in memory"""
+    if os.getenv('ENVIRONMENT') == 'production':
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not database.is_db_available():
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    try:
+        # explain() tooling is shared with the CLI job and stays on the sync client, in a worker thread
+        results = await asyncio.to_thread(query_diagnostics.explain_hot_queries, database.get_db())
+        return {"ok": all(result["ok"] for result in results), "queries": results}
+    except Exception as e:
+        print(f"An unexpected error occurred while explaining queries: {str(e)}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred while explaining queries.")
+
 # Test endpoint to verify Gemini API connection
 @app.get("/test-gemini")
 async def test_gemini():
@@ -488,8 +686,8 @@ async def test_gemini():
             return {"status": "error", "message": "Gemini API key not configured"}
         
         # Test simple request
-        response = text_model.generate_content("Say hello")
-        return {"status": "success", "message": "Gemini API working", "response": response.text}
+        response_text = await gemini_service.generate_connectivity_check()
+        return {"status": "success", "message": "Gemini API working", "response": response_text}
     except Exception as e:
         return {"status": "error", "message": f"Gemini API error: {str(e)}"}
 
@@ -504,7 +702,7 @@ async def image_chat(image: UploadFile = File(...), text: str = Body(..., embed=
             await rate_limiter.check_rate_limit(http_request.client.host)
         
         # Security: File validation
-        if image.size > config.MAX_FILE_SIZE:
+        if image.size is not None and image.size > config.MAX_FILE_SIZE:
             raise HTTPException(status_code=413, detail=f"File too large. Max size: {config.MAX_FILE_SIZE // 1024 // 1024}MB")
         
         if image.content_type not in allowed_types:
@@ -524,22 +722,31 @@ async def image_chat(image: UploadFile = File(...), text: str = Body(..., embed=
         if should_display:
             print(f"Image chat - Detected language: {language_name} ({detected_lang}) - Confidence: {confidence:.2f}")
         
-        # Read image data
-        image_bytes = await image.read()
-        
-        # Convert to PIL Image for Gemini
-        pil_image = Image.open(io.BytesIO(image_bytes))
+        # Read with a size cutoff, then downsample and strip metadata in the image thread pool
+        try:
+            image_part = await image_pipeline.prepare_upload(image)
+        except image_pipeline.ImageTooLargeError:
+            raise HTTPException(status_code=413, detail=f"File too large. Max size: {config.MAX_FILE_SIZE // 1024 // 1024}MB")
+        except image_pipeline.InvalidImageError as e:
+            print(f"Rejected image upload: {e}")
+            raise HTTPException(status_code=415, detail="Unsupported or corrupt image. Use JPEG, PNG, GIF, or WebP")
         
         # Detect if user is asking for translation
         is_translation_request = any(keyword in text.lower() for keyword in ['translate', 'translation', 'convert to', 'say in', 'how do you say', 'what is', 'meaning in'])
         
-        # Generate response using the Gemini service
-        bot_response = gemini_service.generate_image_response(
-            pil_image, text, detected_lang, language_name, should_display
-        )
+        # Same (downscaled) image with the same question: answer from the cache
+        cache_key = vision_cache.build_cache_key(image_part, text, detected_lang)
+        bot_response = await vision_cache.get_cached_response(cache_key)
+        if bot_response is None:
+            # Generate response using the Gemini service (non-blocking, cancelled if the client goes away)
+            bot_response = await gemini_service.generate_image_response_async(
+                image_part, text, detected_lang, language_name, should_display,
+                is_disconnected=http_request.is_disconnected if http_request else None
+            )
+            await vision_cache.cache_response(cache_key, bot_response)
         
         # Store interaction in database with language info
-        session_id, interaction_id = store_interaction('image', text, bot_response, session_id, detected_lang if should_display else None)
+        session_id, interaction_id = await store_interaction('image', text, bot_response, session_id, detected_lang if should_display else None)
         
         # Only return language info if we're confident about it
         response_data = {
@@ -559,86 +766,116 @@ async def image_chat(image: UploadFile = File(...), text: str = Body(..., embed=
     except HTTPException as http_exc:
         # Re-raise HTTPException directly
         raise http_exc
+    except gemini_service.LLMTimeoutError as e:
+        print(f"Gemini call timed out in image_chat endpoint: {e}")
+        raise HTTPException(status_code=504, detail="The AI took too long to analyze the image. Please try again.")
+    except gemini_service.ClientDisconnectedError:
+        print("Client disconnected, Gemini vision call cancelled")
+        raise HTTPException(status_code=499, detail="Client closed request")
     except Exception as e:
         print(f"An unexpected error occurred in image_chat endpoint: {str(e)}")
         # Optionally log traceback here
         raise HTTPException(status_code=500, detail="An internal server error occurred while processing the image.")
 
-# Endpoint to fetch all chat history grouped by sessions
+# Endpoint to list chat sessions, newest first, without their messages
 @app.get("/chat-history")
-def get_chat_history():
+async def get_chat_history(limit: int = Query(20, ge=1, le=100), before: Optional[str] = None):
     try:
         # Return empty sessions if MongoDB is not available
         if not database.is_db_available():
-            return {"sessions": [], "status": "MongoDB unavailable - using temporary session storage"}
-        
-        chat_collection = database.get_chat_collection()
-        # Get sessions with their latest message timestamp for ordering using MongoDB aggregation
-        pipeline = [
-            {"$match": {"session_id": {"$exists": True, "$ne": None}}},
-            {"$group": {
-                "_id": "$session_id",
-                "latest_timestamp": {"$max": "$timestamp"},
-                "message_count": {"$sum": 1},
-                "first_message": {"$first": "$user_input"}
-            }},
-            {"$sort": {"latest_timestamp": -1}},
-            {"$limit": 20}
-        ]
-        
-        sessions = list(chat_collection.aggregate(pipeline))
+            return {"sessions": [], "next_before": None, "status": "MongoDB unavailable - using temporary session storage"}
         
-        grouped_history = []
-        for session in sessions:
-            session_id = session['_id']
-            
-            # Get all messages for this session
-            messages = list(chat_collection.find(
-                {"session_id": session_id}
-            ).sort("timestamp", 1))
-            
-            # Convert ObjectId to string and format datetime
-            for msg in messages:
-                if '_id' in msg:
-                    del msg['_id']
-                if 'timestamp' in msg and msg['timestamp']:
-                    msg['timestamp'] = msg['timestamp'].isoformat()
-            
-            # Create session object with first message as title
-            first_message = session.get('first_message', '')
-            session_title = first_message[:50] + "..." if len(first_message) > 50 else first_message
-            
-            grouped_history.append({
-                'session_id': session_id,
-                'session_title': session_title,
-                'message_count': session['message_count'],
-                'latest_timestamp': session['latest_timestamp'].isoformat() if session['latest_timestamp'] else None,
-                'messages': messages
-            })
+        # Indexed range read over the incrementally maintained sessions collection
+        sessions, next_before = pagination.build_page(
+            await session_summaries.list_sessions(pagination.before_filter(before, timestamp_field="latest_timestamp"), limit + 1),
+            limit, timestamp_field="latest_timestamp"
+        )
         
-        return {"sessions": grouped_history}
+        summaries = [{
+            'session_id': session['_id'],
+            'session_title': session.get('session_title', ''),
+            'message_count': session.get('message_count', 0),
+            'archived_count': session.get('archived_count', 0),
+            'latest_timestamp': session['latest_timestamp'].isoformat() if session.get('latest_timestamp') else None
+        } for session in sessions]
+        
+        return {"sessions": summaries, "next_before": next_before}
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"An unexpected error occurred while fetching chat history: {str(e)}")
         # Optionally log traceback here
         raise HTTPException(status_code=500, detail="An internal server error occurred while fetching chat history.")
-    return {"sessions": grouped_history}
+
+# Endpoint to page through one session's messages, newest page first
+@app.get("/sessions/{session_id}/messages")
+async def get_session_messages(session_id: str, limit: int = Query(50, ge=1, le=200), before: Optional[str] = None):
+    try:
+        if not database.is_db_available():
+            return {"session_id": session_id, "messages": [], "next_before": None, "status": "MongoDB unavailable - using temporary session storage"}
+        
+        messages, next_before = pagination.build_page(
+            await repositories.chat_history.message_page(session_id, pagination.before_filter(before), limit + 1),
+            limit
+        )
+        
+        # Pages are fetched newest first but each page reads oldest to newest
+        messages.reverse()
+        for msg in messages:
+            if msg.get('timestamp'):
+                msg['timestamp'] = msg['timestamp'].isoformat()
+        
+        return {"session_id": session_id, "messages": messages, "next_before": next_before}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred while fetching session messages: {str(e)}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred while fetching session messages.")
+
+# Endpoint to bring a session's archived messages back from cold storage
+@app.post("/sessions/{session_id}/rehydrate")
+async def rehydrate_session(session_id: str, http_request: Request):
+    if not database.is_db_available():
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    try:
+        # Security: Rate limiting (each call decompresses archive files)
+        await rate_limiter.check_rate_limit(http_request.client.host)
+        
+        restored = await chat_archive.rehydrate(session_id)
+        if restored is None:
+            return {"success": False, "message": "Session has no archived messages"}
+        session_cache.invalidate(session_id)
+        return {"success": True, "session_id": session_id, "restored": restored}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"An unexpected error occurred while rehydrating session: {str(e)}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred while rehydrating session.")
 
 # Endpoint to delete a specific chat history entry
 @app.delete("/chat-history/{chat_id}")
-def delete_chat_history(chat_id: str):
+async def delete_chat_history(chat_id: str):
     if not database.is_db_available():
         raise HTTPException(status_code=503, detail="Database unavailable")
     try:
-        chat_collection = database.get_chat_collection()
         # Check if the record exists
-        existing_record = chat_collection.find_one({"_id": chat_id})
+        existing_record = await repositories.chat_history.find_by_id(chat_id)
         if not existing_record:
             return {"success": False, "message": "Chat history not found"}
         
         # Delete the record
-        result = chat_collection.delete_one({"_id": chat_id})
-        
-        if result.deleted_count > 0:
+        deleted_count = await repositories.chat_history.delete_by_id(chat_id)
+        session_cache.invalidate(existing_record.get("session_id"))
+        if "rehydrated_at" in existing_record:
+            # Otherwise the next rehydrate would bring it back from the archive
+            await chat_archive.forget_interaction(existing_record)
+        if deleted_count > 0:
+            session_removed = False
+            if existing_record.get("session_id"):
+                session_removed = not await session_summaries.refresh_session(existing_record["session_id"])
+            await analytics_rollups.record_interaction_deleted(existing_record, session_removed=session_removed)
+        
+        if deleted_count > 0:
             return {"success": True, "message": "Chat history deleted successfully"}
         else:
             return {"success": False, "message": "Failed to delete chat history"}
@@ -649,12 +886,15 @@ def delete_chat_history(chat_id: str):
 
 # Endpoint to delete all chat history
 @app.delete("/chat-history")
-def delete_all_chat_history():
+async def delete_all_chat_history():
     if not database.is_db_available():
         raise HTTPException(status_code=503, detail="Database unavailable")
     try:
-        result = database.get_chat_collection().delete_many({})
-        deleted_count = result.deleted_count
+        deleted_count = await repositories.chat_history.delete_all()
+        session_cache.invalidate()
+        await session_summaries.delete_session()
+        await chat_archive.forget()
+        await analytics_rollups.record_history_cleared()
         
         return {"success": True, "message": f"Deleted {deleted_count} chat history entries"}
     except Exception as e:
@@ -664,25 +904,29 @@ def delete_all_chat_history():
 
 # Endpoint to delete an entire session
 @app.delete("/session/{session_id}")
-def delete_session(session_id: str):
+async def delete_session(session_id: str):
     if not database.is_db_available():
         raise HTTPException(status_code=503, detail="Database unavailable")
     try:
-        chat_collection = database.get_chat_collection()
         # Check if the session exists
-        count = chat_collection.count_documents({"session_id": session_id})
+        count = await repositories.chat_history.count_for_session(session_id)
         
-        if count == 0:
+        if count == 0 and not await chat_archive.is_archived(session_id):
             return {"success": False, "message": "Session not found"}
         
+        # Erase archived messages from the archive files; the rollups still count them
+        archived = await chat_archive.forget(session_id)
+        
+        # Take the session out of the analytics rollups while its messages still exist
+        await analytics_rollups.record_session_deleted(session_id, archived)
+        
         # Delete all messages in the session
-        result = chat_collection.delete_many({"session_id": session_id})
-        deleted_count = result.deleted_count
+        deleted_count = await repositories.chat_history.delete_session(session_id)
+        session_cache.invalidate(session_id)
+        await session_summaries.delete_session(session_id)
         
         # Also delete learned patterns for this session
-        learning_collection = database.get_learning_collection()
-        if learning_collection:
-            learning_collection.delete_one({"session_id": session_id})
+        await repositories.learned_patterns.delete_session(session_id)
         
         return {"success": True, "message": f"Session deleted successfully. {deleted_count} messages removed."}
     except Exception as e:
@@ -700,9 +944,12 @@ async def submit_feedback(feedback: FeedbackRequest, http_request: Request):
         # Security: Rate limiting for feedback
         await rate_limiter.check_rate_limit(http_request.client.host)
         
-        chat_collection = database.get_chat_collection()
         # Find the interaction to update
-        interaction = chat_collection.find_one({"_id": feedback.interaction_id})
+        interaction = await repositories.chat_history.find_by_id(feedback.interaction_id)
+        if not interaction and interaction_writer.is_pending(feedback.interaction_id):
+            # Feedback raced the write-behind queue; wait for the interaction to land
+            await interaction_writer.drain()
+            interaction = await repositories.chat_history.find_by_id(feedback.interaction_id)
         if not interaction:
             raise HTTPException(status_code=404, detail="Interaction not found")
         
@@ -713,13 +960,12 @@ async def submit_feedback(feedback: FeedbackRequest, http_request: Request):
             "feedback_timestamp": datetime.utcnow()
         }
         
-        chat_collection.update_one(
-            {"_id": feedback.interaction_id},
-            {"$set": {"user_feedback": feedback_data}}
+        await repositories.chat_history.set_feedback(
+            feedback.interaction_id, feedback_data, rehydrated="rehydrated_at" in interaction
         )
         
         # Learn from this feedback to improve future responses
-        learn_from_feedback(interaction, feedback_data)
+        await learn_from_feedback(interaction, feedback_data)
         
         return {
             "success": True, 
@@ -735,16 +981,15 @@ async def submit_feedback(feedback: FeedbackRequest, http_request: Request):
         raise HTTPException(status_code=500, detail="An internal server error occurred while processing feedback.")
 
 @app.get("/feedback-test")
-def test_feedback_endpoint():
+async def test_feedback_endpoint():
     """Test endpoint to verify feedback system is working"""
     return {"status": "Feedback endpoint is working!", "timestamp": datetime.utcnow().isoformat()}
 
-def learn_from_feedback(interaction, feedback_data):
+async def learn_from_feedback(interaction, feedback_data):
     """Learn from user feedback to improve future responses"""
     if not database.is_db_available():
         return
     try:
-        feedback_collection = database.get_feedback_collection()
         session_id = interaction.get("session_id")
         
         # Store detailed feedback analysis
@@ -760,11 +1005,12 @@ def learn_from_feedback(interaction, feedback_data):
             "improvement_suggestions": generate_improvement_suggestions(interaction, feedback_data)
         }
         
-        feedback_collection.insert_one(feedback_analysis)
+        await repositories.user_feedback.insert(feedback_analysis)
+        await analytics_rollups.record_feedback(feedback_data["feedback_type"], feedback_data["feedback_timestamp"])
         
         # Update learned patterns based on feedback
         if session_id:
-            update_learned_patterns_from_feedback(session_id, interaction, feedback_data)
+            await update_learned_patterns_from_feedback(session_id, interaction, feedback_data)
         
         print(f"🧠 Learned from {feedback_data['feedback_type']} feedback for session {session_id}")
         
@@ -806,48 +1052,14 @@ def generate_improvement_suggestions(interaction, feedback_data):
     
     return suggestions
 
-def update_learned_patterns_from_feedback(session_id, interaction, feedback_data):
+async def update_learned_patterns_from_feedback(session_id, interaction, feedback_data):
     """Update learned patterns based on user feedback"""
     if not database.is_db_available():
         return
     try:
-        learning_collection = database.get_learning_collection()
         feedback_type = feedback_data["feedback_type"]
         
-        # Get current learned patterns
-        current_patterns = learning_collection.find_one({"session_id": session_id})
-        if not current_patterns:
-            current_patterns = {
-                "session_id": session_id,
-                "user_preferences": {},
-                "feedback_history": [],
-                "last_updated": datetime.utcnow()
-            }
-        
-        # Update patterns based on feedback
-        user_prefs = current_patterns.get("user_preferences", {})
-        
-        if feedback_type == "format_mismatch":
-            # User didn't like the format - adjust preference
-            input_patterns = interaction.get("input_patterns", {})
-            requested_format = input_patterns.get("request_type", "unknown")
-            user_prefs["preferred_format"] = requested_format
-        
-        elif feedback_type == "too_long":
-            user_prefs["preferred_length"] = "short"
-        
-        elif feedback_type == "too_short":
-            user_prefs["preferred_length"] = "detailed"
-        
-        elif feedback_type == "thumbs_up":
-            # Reinforce current patterns
-            response_format = interaction.get("response_format", {})
-            if "format_type" in response_format:
-                user_prefs["preferred_format"] = response_format["format_type"]
-        
-        # Add feedback to history
-        feedback_history = current_patterns.get("feedback_history", [])
-        feedback_history.append({
+        feedback_entry = {
             "feedback_type": feedback_type,
             "timestamp": feedback_data["feedback_timestamp"],
             "interaction_context": {
@@ -855,26 +1067,21 @@ def update_learned_patterns_from_feedback(session_id, interaction, feedback_data
                 "response_format": interaction.get("response_format", {}).get("format_type"),
                 "response_length": len(interaction.get("bot_response", ""))
             }
-        })
-        
-        # Keep only recent feedback (last 20 items)
-        feedback_history = feedback_history[-20:]
-        
-        # Update the document
-        updated_patterns = {
-            "session_id": session_id,
-            "user_preferences": user_prefs,
-            "feedback_history": feedback_history,
-            "last_updated": datetime.utcnow(),
-            "total_feedback_count": len(feedback_history)
         }
         
-        learning_collection.replace_one(
-            {"session_id": session_id},
-            updated_patterns,
-            upsert=True
+        # Nudge the counters and append to the (last 20) feedback history atomically
+        increments = preference_model.build_feedback_increments(feedback_type, interaction)
+        await repositories.learned_patterns.apply(
+            session_id,
+            {
+                "$inc": increments,
+                "$push": {"feedback_history": {"$each": [feedback_entry], "$slice": -20}},
+                "$set": {"last_updated": datetime.utcnow()}
+            }
         )
         
+        session_cache.record_increments(session_id, increments)
+        
         print(f"🎯 Updated learning patterns for session {session_id} based on {feedback_type} feedback")
         
     except Exception as e:
@@ -882,69 +1089,45 @@ def update_learned_patterns_from_feedback(session_id, interaction, feedback_data
 
 # Analytics endpoint to see learning progress
 @app.get("/learning-analytics")
-def get_learning_analytics():
+async def get_learning_analytics():
     """Get analytics about the AI's learning progress"""
     if not database.is_db_available():
         return {"status": "Database unavailable"}
     try:
-        learning_collection = database.get_learning_collection()
-        feedback_collection = database.get_feedback_collection()
-        
-        # Get learning statistics
-        total_sessions_with_learning = learning_collection.count_documents({})
-        
-        # Get feedback statistics
-        feedback_stats = {}
-        if feedback_collection:
-            pipeline = [
-                {"$group": {
-                    "_id": "$feedback_type",
-                    "count": {"$sum": 1}
-                }}
-            ]
-            feedback_results = list(feedback_collection.aggregate(pipeline))
-            feedback_stats = {item["_id"]: item["count"] for item in feedback_results}
-        
-        # Get common user preferences
-        user_preferences = list(learning_collection.find({}, {"user_preferences": 1, "session_id": 1}))
-        
-        format_preferences = {}
-        formality_preferences = {}
-        
-        for pref_doc in user_preferences:
-            prefs = pref_doc.get("user_preferences", {})
-            
-            fmt_pref = prefs.get("preferred_format", "unknown")
-            format_preferences[fmt_pref] = format_preferences.get(fmt_pref, 0) + 1
-            
-            form_pref = prefs.get("formality_level", "unknown")
-            formality_preferences[form_pref] = formality_preferences.get(form_pref, 0) + 1
-        
-        return {
-            "learning_stats": {
-                "sessions_with_learning_data": total_sessions_with_learning,
-                "total_feedback_received": sum(feedback_stats.values()) if feedback_stats else 0
-            },
-            "feedback_breakdown": feedback_stats,
-            "user_preference_trends": {
-                "format_preferences": format_preferences,
-                "formality_preferences": formality_preferences
-            },
-            "learning_effectiveness": calculate_learning_effectiveness()
-        }
-        
+        return await analytics_rollups.cached("learning-analytics", compute_learning_analytics)
     except Exception as e:
         return {"error": f"Failed to get learning analytics: {str(e)}"}
 
-def calculate_learning_effectiveness():
+async def compute_learning_analytics():
+    # Get learning statistics
+    total_sessions_with_learning = await repositories.learned_patterns.count()
+    
+    # Get feedback statistics from the rollup counters
+    feedback_stats = (await analytics_rollups.get_totals()).get("feedback_by_type", {})
+    
+    # Get common user preferences, tallied server-side
+    format_preferences, formality_preferences = await analytics_rollups.preference_breakdown()
+    
+    return {
+        "learning_stats": {
+            "sessions_with_learning_data": total_sessions_with_learning,
+            "total_feedback_received": sum(feedback_stats.values()) if feedback_stats else 0
+        },
+        "feedback_breakdown": feedback_stats,
+        "user_preference_trends": {
+            "format_preferences": format_preferences,
+            "formality_preferences": formality_preferences
+        },
+        "learning_effectiveness": await calculate_learning_effectiveness()
+    }
+
+async def calculate_learning_effectiveness():
     """Calculate how well the AI is learning from feedback"""
     if not database.is_db_available():
         return "Database unavailable"
     try:
-        feedback_collection = database.get_feedback_collection()
-        
         # Get recent feedback (last 50 interactions)
-        recent_feedback = list(feedback_collection.find({}).sort("feedback_timestamp", -1).limit(50))
+        recent_feedback = await repositories.user_feedback.recent(50)
         
         if len(recent_feedback) < 10:
             return "Insufficient data for effectiveness calculation"
@@ -970,61 +1153,85 @@ def calculate_learning_effectiveness():
 
 # Analytics endpoint for aggregated data
 @app.get("/analytics")
-def get_analytics():
+async def get_analytics():
     """Get aggregated analytics data for chat interactions"""
     if not database.is_db_available():
         return {"error": "Database unavailable"}
     try:
-        chat_collection = database.get_chat_collection()
-        
-        # Total interactions
-        total_interactions = chat_collection.count_documents({})
-        
-        # Unique sessions
-        unique_sessions = len(chat_collection.distinct("session_id"))
-        
-        # Total feedback
-        feedback_collection = database.get_feedback_collection()
-        total_feedback = feedback_collection.count_documents({}) if feedback_collection else 0
-        
-        # Interactions over time (last 30 days)
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_interactions = chat_collection.count_documents({"timestamp": {"$gte": thirty_days_ago}})
-        
-        # Average response length
-        avg_response_length = 0
-        if total_interactions > 0:
-            pipeline = [
-                {"$group": {"_id": None, "avg_length": {"$avg": {"$strLenCP": "$bot_response"}}}}
-            ]
-            result = list(chat_collection.aggregate(pipeline))
-            if result:
-                avg_response_length = round(result[0].get("avg_length", 0), 2)
-        
-        # Feedback breakdown
-        feedback_breakdown = {}
-        if feedback_collection:
-            pipeline = [
-                {"$group": {"_id": "$feedback_type", "count": {"$sum": 1}}}
-            ]
-            feedback_results = list(feedback_collection.aggregate(pipeline))
-            feedback_breakdown = {item["_id"]: item["count"] for item in feedback_results}
-        
-        return {
-            "total_interactions": total_interactions,
-            "unique_sessions": unique_sessions,
-            "total_feedback": total_feedback,
-            "recent_interactions": recent_interactions,
-            "avg_response_length": avg_response_length,
-            "feedback_breakdown": feedback_breakdown
-        }
-        
+        return await analytics_rollups.cached("analytics", compute_analytics)
     except Exception as e:
         return {"error": str(e)}
 
-# Import the Career GPS service
-import services.career_gps_service as career_gps_service
+async def compute_analytics():
+    """Read the precomputed rollups; cost does not grow with stored history"""
+    totals = await analytics_rollups.get_totals()
+    total_interactions = totals.get("interactions", 0)
+    
+    # Average response length
+    avg_response_length = 0
+    if total_interactions > 0:
+        avg_response_length = round(totals.get("response_chars", 0) / total_interactions, 2)
+    
+    return {
+        "total_interactions": total_interactions,
+        "unique_sessions": totals.get("sessions", 0),
+        "total_feedback": totals.get("feedback", 0),
+        # Interactions over time (last 30 days, from daily buckets)
+        "recent_interactions": await analytics_rollups.count_recent("interactions"),
+        "avg_response_length": avg_response_length,
+        "feedback_breakdown": totals.get("feedback_by_type", {})
+    }
+
+# Streaming NDJSON exports for offline analysis
+def check_export_access(http_request):
+    """Exports dump every user's chats: off by default, hidden in production and behind an admin token"""
+    if os.getenv('ENVIRONMENT') == 'production' or not config.EXPORT_ENABLED or not config.EXPORT_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = http_request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), config.EXPORT_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid export token", headers={"WWW-Authenticate": "Bearer"})
+
+async def stream_export(repository, timestamp_field, name, http_request, session_id, start, end, gzip):
+    check_export_access(http_request)
+    if not database.is_db_available():
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    await rate_limiter.check_rate_limit(http_request.client.host)
+    
+    query = data_export.build_filter(timestamp_field, session_id, start, end)
+    cursor = repository.stream(query, [(timestamp_field, 1), ("_id", 1)], config.EXPORT_BATCH_SIZE)
+    if cursor is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    body = data_export.ndjson_lines(cursor)
+    if gzip:
+        body = data_export.gzip_chunks(body)
+    filename = f"{name}.ndjson.gz" if gzip else f"{name}.ndjson"
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/export/chat-history")
+async def export_chat_history(
+    http_request: Request,
+    session_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False
+):
+    """Every stored interaction matching the filters, oldest first, one JSON document per line"""
+    return await stream_export(repositories.chat_history, "timestamp", "chat-history", http_request, session_id, start, end, gzip)
+
+@app.get("/export/feedback")
+async def export_feedback(
+    http_request: Request,
+    session_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False
+):
+    """Every feedback record matching the filters, oldest first, one JSON document per line"""
+    return await stream_export(repositories.user_feedback, "feedback_timestamp", "feedback", http_request, session_id, start, end, gzip)
 
 # Career GPS API Endpoints
 @app.post("/career-gps/recommendations")
@@ -1040,22 +1247,25 @@ async def get_career_recommendations(
     Generate career recommendations based on user preferences and comprehensive profile data
     """
     try:
-        recommendations = career_gps_service.analyze_career_preferences(
+        # Repeat submissions of an equivalent profile are answered from the fingerprint cache;
+        # generation runs in a worker thread so the event loop is never blocked on Gemini
+        recommendations, cache_status = await asyncio.to_thread(
+            career_gps_service.get_career_recommendations,
             interests, skills, goal, motivation, learning_style, user_profile
         )
-        return {"recommendations": recommendations}
+        return {"recommendations": recommendations, "cache_status": cache_status}
     except Exception as e:
         print(f"Career GPS error: {e}")
         # Return fallback recommendations
         fallback = career_gps_service.generate_relevant_defaults(interests, skills, goal)
-        return {"recommendations": fallback[:3]}
+        return {"recommendations": fallback[:3], "cache_status": "fallback"}
 
 @app.get("/career-gps/roadmap/{career_name}")
 async def get_career_roadmap(career_name: str, progress: int = 0):
     """
     Get a personalized roadmap for a selected career path
     """
-    roadmap = career_gps_service.get_career_roadmap(career_name, progress)
+    roadmap = await asyncio.to_thread(career_gps_service.get_career_roadmap, career_name, progress)
     return roadmap
 
 @app.post("/career-gps/learning-path")
@@ -1071,7 +1281,8 @@ async def generate_learning_path(
     """
     try:
         print(f"🎓 Generating learning path for: {career_name}")
-        learning_path = career_gps_service.generate_personalized_learning_path(
+        learning_path = await asyncio.to_thread(
+            career_gps_service.generate_personalized_learning_path,
             career_name=career_name,
             career_summary=career_summary,
             user_profile=user_profile,
@@ -0,0 +1,242 @@
+"""
+Local stand-in for the parts of `google.generativeai` this backend uses, for load tests
+and offline development without API quota. Enabled with MOCK_GEMINI=True (see genai_backend.py).
+
+Each call waits a time-to-first-token drawn from a lognormal distribution
+(MOCK_GEMINI_LATENCY_MS median, MOCK_GEMINI_LATENCY_SIGMA spread), then generates output
+at MOCK_GEMINI_TOKENS_PER_SECOND; MOCK_GEMINI_ERROR_RATE of the calls fail like a quota error.
+Career GPS prompts get canned JSON in the shape their parsers expect, everything else a
+plain-text answer of about MOCK_GEMINI_RESPONSE_TOKENS tokens.
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from types import SimpleNamespace
+import config
+
+_rng = random.Random(config.MOCK_GEMINI_SEED)
+
+class MockGeminiError(Exception):
+    """Raised for injected failures; the message mimics the SDK's quota error so callers map it to 429"""
+
+def configure(api_key=None, **kwargs):
+    pass
+
+def list_models():
+    return [
+        SimpleNamespace(name=f"models/{name}", description="Local mock model for load testing",
+                        supported_generation_methods=["generateContent"])
+        for name in ("gemini-pro", "gemini-pro-vision", "gemini-2.5-flash")
+    ]
+
+class GenerationConfig:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+types = SimpleNamespace(GenerationConfig=GenerationConfig)
+
+# --- Responses shaped like the SDK's GenerateContentResponse ---
+
+class MockResponse:
+    def __init__(self, text):
+        self.candidates = [SimpleNamespace(
+            content=SimpleNamespace(parts=[SimpleNamespace(text=text)], role="model"),
+            finish_reason=1,  # STOP
+            safety_ratings=[]
+        )]
+        self.prompt_feedback = None
+        self.text = text
+
+class _SyncStream:
+    def __init__(self, chunks, delay):
+        self._chunks = chunks
+        self._delay = delay
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            time.sleep(self._delay)
+            yield MockResponse(chunk)
+
+class _AsyncStream:
+    def __init__(self, chunks, delay):
+        self._chunks = chunks
+        self._delay = delay
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(self._delay)
+            yield MockResponse(chunk)
+
+class GenerativeModel:
+    def __init__(self, model_name="gemini-pro", **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, stream=False, **kwargs):
+        first_token, text = _plan_call(contents)
+        time.sleep(first_token)
+        if text is None:
+            raise _injected_error()
+        if stream:
+            chunks, delay = _stream_chunks(text)
+            return _SyncStream(chunks, delay)
+        time.sleep(_generation_seconds(text))
+        return MockResponse(text)
+
+    async def generate_content_async(self, contents, generation_config=None, stream=False, **kwargs):
+        first_token, text = _plan_call(contents)
+        await asyncio.sleep(first_token)
+        if text is None:
+            raise _injected_error()
+        if stream:
+            chunks, delay = _stream_chunks(text)
+            return _AsyncStream(chunks, delay)
+        await asyncio.sleep(_generation_seconds(text))
+        return MockResponse(text)
+
+# --- Latency and error model ---
+
+def _plan_call(contents):
+    """Time to first token and the full response text, or None for an injected error"""
+    first_token = _rng.lognormvariate(0, config.MOCK_GEMINI_LATENCY_SIGMA) * config.MOCK_GEMINI_LATENCY_MS / 1000
+    if _rng.random() < config.MOCK_GEMINI_ERROR_RATE:
+        return first_token, None
+    return first_token, canned_response(_prompt_text(contents))
+
+def _injected_error():
+    return MockGeminiError("429 Resource has been exhausted (e.g. check quota). [mock]")
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+def _generation_seconds(text):
+    return _estimate_tokens(text) / config.MOCK_GEMINI_TOKENS_PER_SECOND
+
+def _stream_chunks(text, tokens_per_chunk=8):
+    """Split into ~8-token chunks delivered at the configured token rate"""
+    size = tokens_per_chunk * 4
+    chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+    return chunks, tokens_per_chunk / config.MOCK_GEMINI_TOKENS_PER_SECOND
+
+def _prompt_text(contents):
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(part for part in contents if isinstance(part, str))
+    return str(contents)
+
+# --- Canned content ---
+
+_CAREERS = [
+    ("Data Scientist", "Technology", ["Python", "Statistics", "Machine Learning"]),
+    ("Healthcare Data Analyst", "Healthcare", ["SQL", "Excel", "Clinical Data"]),
+    ("Product Manager", "Business", ["Roadmapping", "User Research", "Communication"]),
+    ("UX Designer", "Creative Arts", ["Figma", "Prototyping", "User Research"]),
+    ("Instructional Designer", "Education", ["Curriculum Design", "Storytelling", "LMS Tools"]),
+    ("Environmental Scientist", "Science", ["Field Research", "GIS", "Data Analysis"]),
+    ("Robotics Engineer", "Engineering", ["C++", "Control Systems", "CAD"]),
+]
+
+_CAREER_NAME_RES = [
+    re.compile(r'pursue a career as an? ([^.\n]+)\.'),
+    re.compile(r'roadmap for the career: ([^\n]+)'),
+]
+
+def canned_response(prompt):
+    """Response text for a prompt, recognizing the Career GPS prompts by their wording"""
+    if "career recommendations" in prompt and "JSON" in prompt:
+        return json.dumps(_recommendations(), indent=2)
+    if "roadmap for the career" in prompt:
+        return json.dumps(_roadmap(_career_name(prompt)), indent=2)
+    if "LEARNING PATH" in prompt:
+        return json.dumps(_learning_path(_career_name(prompt)), indent=2)
+    return _chat_answer(prompt)
+
+def _career_name(prompt):
+    for pattern in _CAREER_NAME_RES:
+        match = pattern.search(prompt)
+        if match:
+            return match.group(1).strip()
+    return "Software Engineer"
+
+def _recommendations():
+    picks = _rng.sample(_CAREERS, 5)
+    return [
+        {
+            "name": name,
+            "match": 92 - rank * 6,
+            "summary": f"Your interests and skills line up well with {industry.lower()} work as a {name}.",
+            "skills": skills,
+            "mentors": [f"Senior {name}", f"{industry} Team Lead"],
+            "learning_path": name.lower().replace(" ", "-") + "-path"
+        }
+        for rank, (name, industry, skills) in enumerate(picks)
+    ]
+
+def _roadmap(career_name):
+    stages = ["Foundations", "Core Skills", "Projects", "Professional Experience", "Specialization"]
+    return {
+        "career": career_name,
+        "milestones": [
+            {"title": stage, "description": f"{stage} for becoming a {career_name}.", "timeframe": f"{2 + i} months"}
+            for i, stage in enumerate(stages)
+        ],
+        "mentors": [f"Senior {career_name}", "Industry Mentor"],
+        "resources": ["Online courses", "Open-source projects", "Professional communities"]
+    }
+
+def _learning_path(career_name):
+    phases = []
+    for number, (title, skills) in enumerate([
+        ("Foundation & Fundamentals", ["Python", "SQL", "Problem Solving"]),
+        ("Core Skills", ["Statistics", "Data Visualization", "Git"]),
+        ("Job-Ready Projects", ["Portfolio Building", "Communication", "Interviewing"]),
+    ], start=1):
+        phases.append({
+            "phase_number": number,
+            "title": title,
+            "duration": "2-3 months",
+            "description": f"{title} for an aspiring {career_name}.",
+            "skills_to_learn": skills,
+            "courses": [
+                {"name": f"{skill} for {career_name}s", "provider": provider, "duration": "4 weeks",
+                 "difficulty": "Beginner" if number == 1 else "Intermediate",
+                 "why_relevant": f"{skill} is used daily as a {career_name}."}
+                for skill, provider in zip(skills, ("Coursera", "Udemy", "YouTube"))
+            ],
+            "projects": [
+                {"title": f"{title} capstone", "description": f"Apply {', '.join(skills)} to a realistic problem.",
+                 "skills_practiced": skills[:2], "estimated_time": "2 weeks"}
+            ],
+            "milestones": [f"Complete the {title.lower()} courses", f"Publish the {title.lower()} capstone"]
+        })
+    return {
+        "career_name": career_name,
+        "overview": f"A three-phase path from fundamentals to a job-ready {career_name}.",
+        "total_duration": "6-9 months",
+        "phases": phases,
+        "certifications": [
+            {"name": f"Professional {career_name} Certificate", "provider": "Coursera",
+             "importance": f"Shows employers core {career_name} competence", "estimated_cost": "$49/month",
+             "preparation_time": "3 months"}
+        ],
+        "key_resources": [
+            {"type": "Community", "name": f"{career_name} Forum", "description": "Peer help and job leads", "url": "Search online"}
+        ],
+        "networking_tips": ["Join local meetups", "Share projects publicly", "Ask for informational interviews"],
+        "success_metrics": ["Courses completed", "Projects published", "Interviews landed"],
+        "next_steps": "Apply for junior roles and keep building projects."
+    }
+
+def _chat_answer(prompt):
+    question = prompt.rsplit("User: ", 1)[-1].strip()[:200] or "your question"
+    lines = [f"Here is a clear explanation of **{question}**:", ""]
+    target_chars = config.MOCK_GEMINI_RESPONSE_TOKENS * 4
+    point = 1
+    while sum(len(line) + 1 for line in lines) < target_chars:
+        lines.append(f"- Point {point}: a key idea, an example that makes it concrete, and how to practice it.")
+        point += 1
+    lines.append("")
+    lines.append("Let me know if you would like a deeper dive into any of these points.")
+    return "\n".join(lines)
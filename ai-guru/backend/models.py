@@ -1,6 +1,7 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import Optional, List
 import re
+import config
 
 class ChatRequest(BaseModel):
     message: str
@@ -24,6 +25,18 @@ class ChatRequest(BaseModel):
             raise ValueError('Invalid session ID format')
         return v
 
+class BatchChatRequest(BaseModel):
+    items: List[ChatRequest]
+    
+    @field_validator('items')
+    @classmethod
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError('Batch cannot be empty')
+        if len(v) > config.CHAT_BATCH_MAX_ITEMS:
+            raise ValueError(f'Batch too large (max {config.CHAT_BATCH_MAX_ITEMS} items)')
+        return v
+
 class ImageRequest(BaseModel):
     description: str
     session_id: Optional[str] = None
@@ -0,0 +1,37 @@
+from datetime import datetime
+from fastapi import HTTPException
+
+# Keyset pagination: a cursor is "<ISO timestamp>|<id>" of the last item of the previous page,
+# so every page is an index seek instead of a skip over everything already returned.
+
+def encode_cursor(timestamp, item_id):
+    if timestamp is None:
+        return None
+    return f"{timestamp.isoformat()}|{item_id}"
+
+def decode_cursor(cursor):
+    """Parse a cursor into (timestamp, id); malformed cursors are a client error"""
+    try:
+        timestamp, item_id = cursor.split("|", 1)
+        return datetime.fromisoformat(timestamp), item_id
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def before_filter(cursor, timestamp_field="timestamp", id_field="_id"):
+    """Match items strictly before the cursor in (timestamp, id) descending order"""
+    if not cursor:
+        return {}
+    timestamp, item_id = decode_cursor(cursor)
+    return {"$or": [
+        {timestamp_field: {"$lt": timestamp}},
+        {timestamp_field: timestamp, id_field: {"$lt": item_id}}
+    ]}
+
+def build_page(items, limit, timestamp_field="timestamp", id_field="_id"):
+    """Trim a limit+1 query result to one page and the cursor for the next one"""
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_cursor(items[-1].get(timestamp_field), items[-1][id_field])
+    return items, next_cursor
@@ -0,0 +1,115 @@
+"""
+explain() checks for the hot queries in main.py. Each entry rebuilds the query shape
+the app actually sends (filter, projection, sort, limit) against a given database, so
+the plans can be checked after index changes without touching real traffic.
+"""
+from datetime import datetime, timedelta
+import services.data_export as data_export
+
+SAMPLE_SESSION_ID = "diagnostics"
+
+def _recent_context(db):
+    return db.chat_history.find(
+        {"session_id": SAMPLE_SESSION_ID}, {"user_input": 1, "bot_response": 1}
+    ).sort("timestamp", -1).limit(3)
+
+def _session_messages_page(db):
+    cursor_time = datetime.utcnow()
+    return db.chat_history.find({
+        "session_id": SAMPLE_SESSION_ID,
+        "$or": [{"timestamp": {"$lt": cursor_time}}, {"timestamp": cursor_time, "_id": {"$lt": "~"}}]
+    }).sort([("timestamp", -1), ("_id", -1)]).limit(51)
+
+def _session_message_count(db):
+    return db.chat_history.find({"session_id": SAMPLE_SESSION_ID})
+
+def _learned_preferences(db):
+    return db.learned_patterns.find({"session_id": SAMPLE_SESSION_ID}).limit(1)
+
+def _recent_feedback(db):
+    return db.user_feedback.find({}).sort("feedback_timestamp", -1).limit(50)
+
+def _recent_interactions(db):
+    return db.chat_history.find({"timestamp": {"$gte": datetime.utcnow() - timedelta(days=30)}})
+
+def _session_listing(db):
+    return db.sessions.find({}).sort([("latest_timestamp", -1), ("_id", -1)]).limit(21)
+
+def _analytics_recent_days(db):
+    return db.analytics_rollups.find({"_id": {"$gte": "day:2025-01-01", "$lt": "day;"}}, {"interactions": 1})
+
+def _archive_candidates(db):
+    cutoff = datetime.utcnow() - timedelta(days=180)
+    return db.chat_history.find({"$or": [
+        {"rehydrated_at": {"$lt": cutoff}},
+        {"rehydrated_at": {"$exists": False}, "timestamp": {"$lt": cutoff}}
+    ]}).limit(5000)
+
+def _export(collection, timestamp_field, **filters):
+    # Same filter and order as main.stream_export
+    return collection.find(data_export.build_filter(timestamp_field, **filters)).sort([(timestamp_field, 1), ("_id", 1)])
+
+def _chat_history_export(db):
+    return _export(db.chat_history, "timestamp")
+
+def _chat_history_export_range(db):
+    return _export(db.chat_history, "timestamp", start=datetime.utcnow() - timedelta(days=30))
+
+def _chat_history_export_session(db):
+    return _export(db.chat_history, "timestamp", session_id=SAMPLE_SESSION_ID)
+
+def _feedback_export(db):
+    return _export(db.user_feedback, "feedback_timestamp")
+
+def _feedback_export_session(db):
+    return _export(db.user_feedback, "feedback_timestamp", session_id=SAMPLE_SESSION_ID)
+
+# name -> (collection, cursor factory)
+HOT_QUERIES = {
+    "recent_context": ("chat_history", _recent_context),
+    "session_messages_page": ("chat_history", _session_messages_page),
+    "session_message_count": ("chat_history", _session_message_count),
+    "learned_preferences": ("learned_patterns", _learned_preferences),
+    "recent_feedback": ("user_feedback", _recent_feedback),
+    "recent_interactions": ("chat_history", _recent_interactions),
+    "session_listing": ("sessions", _session_listing),
+    "analytics_recent_days": ("analytics_rollups", _analytics_recent_days),
+    "archive_candidates": ("chat_history", _archive_candidates),
+    "chat_history_export": ("chat_history", _chat_history_export),
+    "chat_history_export_range": ("chat_history", _chat_history_export_range),
+    "chat_history_export_session": ("chat_history", _chat_history_export_session),
+    "feedback_export": ("user_feedback", _feedback_export),
+    "feedback_export_session": ("user_feedback", _feedback_export_session),
+}
+
+def plan_stages(plan):
+    """Every `stage` in an explain() plan tree (classic and slot-based engine layouts)"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+def explain_hot_queries(db):
+    """
+    Winning plan stages of each hot query, whether it scans a whole collection and whether it
+    sorts in memory (a blocking SORT stage, which fails past MongoDB's 100MB sort limit)
+    """
+    results = []
+    for name, (collection_name, build_cursor) in HOT_QUERIES.items():
+        explanation = build_cursor(db).explain()
+        stages = plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({
+            "name": name,
+            "collection": collection_name,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "in_memory_sort": "SORT" in stages,
+            "ok": "COLLSCAN" not in stages and "SORT" not in stages
+        })
+    return results
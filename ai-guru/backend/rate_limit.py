@@ -0,0 +1,120 @@
+import time
+from collections import OrderedDict
+from fastapi import HTTPException
+import config
+
+class InMemoryRateLimitBackend:
+    """
+    Sliding-window-counter state per key, kept in LRU order so idle keys can be
+    evicted from the front in amortized O(1). Used as the single-worker backend
+    and as the local stand-in for the shared (Redis) backend.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._windows = OrderedDict()  # key -> [window_index, current_count, previous_count]
+
+    async def acquire(self, key, limit, window, now=None):
+        if now is None:
+            now = time.time()
+        window_index = int(now // window)
+        self._evict_idle(window_index)
+
+        state = self._windows.get(key)
+        if state is None:
+            state = [window_index, 0, 0]
+            self._windows[key] = state
+        else:
+            self._windows.move_to_end(key)
+            if state[0] != window_index:
+                # Roll forward; anything older than the previous window no longer counts
+                state[2] = state[1] if state[0] == window_index - 1 else 0
+                state[1] = 0
+                state[0] = window_index
+
+        if _estimate(state[1], state[2], now, window) >= limit:
+            return False
+        state[1] += 1
+
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+        return True
+
+    def _evict_idle(self, window_index):
+        # Keys untouched for two full windows carry no weight any more
+        while self._windows:
+            key, state = next(iter(self._windows.items()))
+            if state[0] >= window_index - 1:
+                break
+            del self._windows[key]
+
+    def __len__(self):
+        return len(self._windows)
+
+# Atomically roll the window and count the hit; returns 1 if allowed, 0 if limited
+_REDIS_SLIDING_WINDOW_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local weight = tonumber(ARGV[3])
+if previous * weight + current >= limit then
+    return 0
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], window * 2)
+return 1
+"""
+
+class RedisRateLimitBackend:
+    """Sliding-window counter shared by every worker through a Redis-compatible store"""
+
+    def __init__(self, redis_url, prefix="ratelimit"):
+        import redis.asyncio as redis_asyncio  # Optional dependency, only needed for this backend
+        self._redis = redis_asyncio.from_url(redis_url)
+        self._script = self._redis.register_script(_REDIS_SLIDING_WINDOW_SCRIPT)
+        self.prefix = prefix
+
+    async def acquire(self, key, limit, window, now=None):
+        if now is None:
+            now = time.time()
+        window_index = int(now // window)
+        previous_weight = 1 - (now % window) / window
+        keys = [f"{self.prefix}:{key}:{window_index}", f"{self.prefix}:{key}:{window_index - 1}"]
+        allowed = await self._script(keys=keys, args=[limit, window, previous_weight])
+        return bool(allowed)
+
+def _estimate(current_count, previous_count, now, window):
+    """Requests in the trailing window, assuming the previous window's hits were evenly spread"""
+    previous_weight = 1 - (now % window) / window
+    return previous_count * previous_weight + current_count
+
+def create_backend(backend_name=None):
+    backend_name = (backend_name or config.RATE_LIMIT_BACKEND).lower()
+    if backend_name == "redis":
+        try:
+            return RedisRateLimitBackend(config.REDIS_URL)
+        except ImportError:
+            print("⚠️ RATE_LIMIT_BACKEND=redis but the 'redis' package is not installed; using in-memory rate limiting")
+    return InMemoryRateLimitBackend(max_keys=config.RATE_LIMIT_MAX_TRACKED_KEYS)
+
+# Security: Rate limiting
+class RateLimiter:
+    def __init__(self, max_requests: int = 30, time_window: int = 60, backend=None):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.backend = backend or InMemoryRateLimitBackend()
+
+    async def check_rate_limit(self, client_ip: str):
+        try:
+            allowed = await self.backend.acquire(client_ip, self.max_requests, self.time_window)
+        except Exception as e:
+            # Fail open: an unreachable shared store must not take the API down
+            print(f"⚠️ Rate limit backend error: {e}")
+            return
+
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded. Please try again later."
+            )
@@ -0,0 +1,207 @@
+"""
+Async data access for the request path, on PyMongo's asyncio client (database.get_async_db()).
+Endpoints and services await these repositories instead of using pymongo collections, so no
+request blocks the event loop or waits for a threadpool worker. While MongoDB is unavailable
+`collection` is None, reads return empty results and writes are skipped.
+"""
+from pymongo.errors import DuplicateKeyError
+import database
+import services.preference_model as preference_model
+
+class Repository:
+    """Handle on one collection; services with their own query logic use `collection` directly"""
+
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        db = database.get_async_db()
+        return db[self.collection_name] if db is not None else None
+
+    def stream(self, query, sort, batch_size):
+        """Cursor over every match in `sort` order, fetched `batch_size` documents per round trip"""
+        collection = self.collection
+        if collection is None:
+            return None
+        return collection.find(query).sort(sort).batch_size(batch_size)
+
+class ChatHistoryRepository(Repository):
+    # Fields the chat UI needs; learning features stay out of the payload
+    MESSAGE_PROJECTION = {
+        "session_id": 1, "input_type": 1, "user_input": 1, "bot_response": 1,
+        "language_code": 1, "language_name": 1, "timestamp": 1, "user_feedback": 1
+    }
+    # Set when a rehydrated interaction is edited, so the next eviction re-archives it (see chat_archive)
+    ARCHIVE_DIRTY_FIELD = "archive_dirty"
+
+    async def find_by_id(self, interaction_id):
+        collection = self.collection
+        if collection is None:
+            return None
+        return await collection.find_one({"_id": interaction_id})
+
+    async def recent_exchanges(self, session_id, limit=3):
+        """The session's last `limit` interactions, newest first"""
+        collection = self.collection
+        if collection is None:
+            return []
+        cursor = collection.find(
+            {"session_id": session_id},
+            {"user_input": 1, "bot_response": 1}
+        ).sort("timestamp", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def message_page(self, session_id, before_filter, limit):
+        """Up to `limit` messages of a session older than the keyset cursor, newest first"""
+        collection = self.collection
+        if collection is None:
+            return []
+        cursor = collection.find({"session_id": session_id, **before_filter}, self.MESSAGE_PROJECTION).sort(
+            [("timestamp", -1), ("_id", -1)]
+        ).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def set_feedback(self, interaction_id, feedback_data, rehydrated=False):
+        collection = self.collection
+        if collection is not None:
+            update = {"user_feedback": feedback_data}
+            if rehydrated:
+                # The archived copy predates the feedback
+                update[self.ARCHIVE_DIRTY_FIELD] = True
+            await collection.update_one({"_id": interaction_id}, {"$set": update})
+
+    async def delete_by_id(self, interaction_id):
+        collection = self.collection
+        if collection is None:
+            return 0
+        return (await collection.delete_one({"_id": interaction_id})).deleted_count
+
+    async def delete_all(self):
+        collection = self.collection
+        if collection is None:
+            return 0
+        return (await collection.delete_many({})).deleted_count
+
+    async def count_for_session(self, session_id):
+        collection = self.collection
+        if collection is None:
+            return 0
+        return await collection.count_documents({"session_id": session_id})
+
+    async def delete_session(self, session_id):
+        collection = self.collection
+        if collection is None:
+            return 0
+        return (await collection.delete_many({"session_id": session_id})).deleted_count
+
+    async def aggregate(self, pipeline, **kwargs):
+        collection = self.collection
+        if collection is None:
+            return []
+        return await (await collection.aggregate(pipeline, **kwargs)).to_list(length=None)
+
+class LearnedPatternsRepository(Repository):
+    async def find_model(self, session_id):
+        """A session's preference counters (see preference_model)"""
+        collection = self.collection
+        if collection is None:
+            return None
+        return await collection.find_one(
+            {"session_id": session_id},
+            {"counters": 1, "keyword_scores": 1, "user_preferences": 1, "decay_landmark": 1}
+        )
+
+    async def apply(self, session_id, update):
+        """One atomic upsert of $inc/$set/$push operators into the session's document"""
+        collection = self.collection
+        if collection is None:
+            return
+        try:
+            await collection.update_one({"session_id": session_id}, update, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent upsert inserted the document first; this time the update matches it
+            await collection.update_one({"session_id": session_id}, update, upsert=True)
+
+    async def learn(self, session_id, increments, landmark, now):
+        """
+        $inc an interaction's counters and keyword scores (weighted against `landmark`) into the
+        session's document, first rebasing the stored scores when the document is on an older
+        landmark. Returns the (increments, landmark) actually applied.
+        """
+        collection = self.collection
+        if collection is None:
+            return None
+        for _ in range(3):
+            result = await collection.update_one(
+                {"session_id": session_id, "decay_landmark": landmark},
+                {"$inc": increments, "$set": {"last_updated": now}}
+            )
+            if result.matched_count:
+                return increments, landmark
+
+            model = await collection.find_one({"session_id": session_id}, {"keyword_scores": 1, "decay_landmark": 1})
+            if model is None:
+                try:
+                    await collection.update_one(
+                        {"session_id": session_id},
+                        {"$inc": increments, "$set": {"last_updated": now}, "$setOnInsert": {"decay_landmark": landmark}},
+                        upsert=True
+                    )
+                except DuplicateKeyError:
+                    # Lost the race to create the document; apply against the one that won
+                    continue
+                return increments, landmark
+
+            stored = preference_model.stored_landmark(model)
+            if stored > landmark:
+                # An older interaction landing late: weigh it against the document's landmark instead
+                increments = preference_model.rescale_increments(increments, preference_model.rescale_factor(landmark, stored))
+                landmark = stored
+                continue
+            # Guarded on the landmark that was read, so concurrent rebases apply only once
+            await collection.update_one(
+                {"session_id": session_id, "decay_landmark": model.get("decay_landmark")},
+                preference_model.build_rebase_update(model, landmark)
+            )
+        raise RuntimeError(f"Could not apply learning update for session {session_id}")
+
+    async def prune_keywords(self, session_id, keywords):
+        collection = self.collection
+        if collection is not None and keywords:
+            await collection.update_one(
+                {"session_id": session_id},
+                {"$unset": {f"keyword_scores.{keyword}": "" for keyword in keywords}}
+            )
+
+    async def delete_session(self, session_id):
+        collection = self.collection
+        if collection is not None:
+            await collection.delete_one({"session_id": session_id})
+
+    async def count(self):
+        collection = self.collection
+        if collection is None:
+            return 0
+        return await collection.estimated_document_count()
+
+class FeedbackRepository(Repository):
+    async def insert(self, document):
+        collection = self.collection
+        if collection is not None:
+            await collection.insert_one(document)
+
+    async def recent(self, limit):
+        collection = self.collection
+        if collection is None:
+            return []
+        return await collection.find({}).sort("feedback_timestamp", -1).limit(limit).to_list(length=limit)
+
+chat_history = ChatHistoryRepository("chat_history")
+learned_patterns = LearnedPatternsRepository("learned_patterns")
+user_feedback = FeedbackRepository("user_feedback")
+sessions = Repository("sessions")
+analytics_rollups = Repository("analytics_rollups")
+response_cache = Repository("response_cache")
+vision_cache = Repository("vision_cache")
+chat_archive = Repository("chat_archive")
@@ -0,0 +1,265 @@
+"""
+Precomputed analytics. The `analytics_rollups` collection holds one `totals` document and
+one document per UTC day ("day:YYYY-MM-DD"); both are $inc-ed as interactions and feedback
+are written, so /analytics reads a handful of small documents however large history grows.
+Endpoint responses are additionally served from a short-TTL in-process cache.
+Request-path functions are coroutines on the asyncio client; rebuild() is a sync job.
+"""
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import database
+import repositories
+from cache import TTLCache
+import services.preference_model as preference_model
+
+TOTALS_ID = "totals"
+RECENT_DAYS = 30
+
+_responses = TTLCache(max_size=8, ttl=config.ANALYTICS_CACHE_TTL_SECONDS)
+
+def day_id(timestamp):
+    return "day:" + timestamp.strftime("%Y-%m-%d")
+
+def _response_chars(document):
+    return len(document.get("bot_response") or "")
+
+def build_interaction_updates(documents, new_sessions=0):
+    """$inc operations for a batch of stored interactions: the totals plus one per touched day"""
+    days = {}
+    for document in documents:
+        day = days.setdefault(day_id(document["timestamp"]), {"interactions": 0, "response_chars": 0})
+        day["interactions"] += 1
+        day["response_chars"] += _response_chars(document)
+
+    totals = {
+        "interactions": sum(day["interactions"] for day in days.values()),
+        "response_chars": sum(day["response_chars"] for day in days.values()),
+    }
+    if new_sessions:
+        totals["sessions"] = new_sessions
+
+    updates = [UpdateOne({"_id": TOTALS_ID}, {"$inc": totals}, upsert=True)]
+    updates.extend(
+        UpdateOne({"_id": day}, {"$inc": counts}, upsert=True)
+        for day, counts in days.items()
+    )
+    return updates
+
+def build_feedback_updates(feedback_type, timestamp):
+    return [
+        UpdateOne({"_id": TOTALS_ID}, {"$inc": {"feedback": 1, f"feedback_by_type.{feedback_type}": 1}}, upsert=True),
+        UpdateOne({"_id": day_id(timestamp)}, {"$inc": {"feedback": 1}}, upsert=True),
+    ]
+
+async def _write(updates):
+    collection = repositories.analytics_rollups.collection
+    if collection is not None and updates:
+        await collection.bulk_write(updates, ordered=False)
+
+async def record_interactions(documents, new_sessions=0):
+    """Count a persisted batch of interactions (runs in the write-behind worker)"""
+    if documents:
+        await _write(build_interaction_updates(documents, new_sessions))
+
+async def record_feedback(feedback_type, timestamp):
+    await _write(build_feedback_updates(feedback_type, timestamp))
+
+def build_session_deleted_updates(live_days, archived_documents=()):
+    """
+    $inc operations removing a deleted session: `live_days` are per-day aggregation results
+    over its chat_history documents, `archived_documents` the ones erased from the archive
+    """
+    days = {}
+    for day in live_days:
+        counts = days.setdefault("day:" + day["_id"], {"interactions": 0, "response_chars": 0})
+        counts["interactions"] -= day["interactions"]
+        counts["response_chars"] -= day["response_chars"]
+    for document in archived_documents:
+        counts = days.setdefault(day_id(document["timestamp"]), {"interactions": 0, "response_chars": 0})
+        counts["interactions"] -= 1
+        counts["response_chars"] -= _response_chars(document)
+    if not days:
+        return []
+    updates = [UpdateOne({"_id": TOTALS_ID}, {"$inc": {
+        "interactions": sum(counts["interactions"] for counts in days.values()),
+        "response_chars": sum(counts["response_chars"] for counts in days.values()),
+        "sessions": -1
+    }})]
+    updates.extend(UpdateOne({"_id": day}, {"$inc": counts}) for day, counts in days.items())
+    return updates
+
+async def record_session_deleted(session_id, archived_documents=()):
+    """
+    Subtract a session's interactions before its messages are deleted (one indexed aggregation),
+    including those erased from the cold archive, which the rollups still count. A rehydrated
+    interaction is both in chat_history and archived; it is subtracted once, as archived.
+    """
+    match = {"session_id": session_id}
+    if archived_documents:
+        match["_id"] = {"$nin": [document["_id"] for document in archived_documents]}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+            "interactions": {"$sum": 1},
+            "response_chars": {"$sum": {"$strLenCP": {"$ifNull": ["$bot_response", ""]}}}
+        }}
+    ]
+    updates = build_session_deleted_updates(await repositories.chat_history.aggregate(pipeline), archived_documents)
+    if not updates:
+        return
+    await _write(updates)
+    invalidate()
+
+async def record_interaction_deleted(document, session_removed=False):
+    """Subtract one deleted interaction"""
+    totals = {"interactions": -1, "response_chars": -_response_chars(document)}
+    if session_removed:
+        totals["sessions"] = -1
+    await _write([
+        UpdateOne({"_id": TOTALS_ID}, {"$inc": totals}),
+        UpdateOne({"_id": day_id(document["timestamp"])}, {"$inc": {"interactions": -1, "response_chars": totals["response_chars"]}}),
+    ])
+    invalidate()
+
+async def record_history_cleared():
+    """All interactions were deleted; feedback counters are kept"""
+    collection = repositories.analytics_rollups.collection
+    if collection is not None:
+        await collection.update_many({}, {"$set": {"interactions": 0, "response_chars": 0, "sessions": 0}})
+    invalidate()
+
+def rebuild():
+    """
+    Recompute every rollup from the source collections (backfill or repair). Interactions already
+    moved to the cold archive are not in chat_history, so they drop out of the rebuilt counts.
+    """
+    chat_collection = database.get_chat_collection()
+    feedback_collection = database.get_feedback_collection()
+    collection = database.get_rollups_collection()
+    if chat_collection is None or collection is None:
+        raise RuntimeError("MongoDB unavailable")
+
+    documents = {TOTALS_ID: {"interactions": 0, "response_chars": 0, "sessions": 0, "feedback": 0, "feedback_by_type": {}}}
+
+    def day(day_key):
+        return documents.setdefault("day:" + day_key, {"interactions": 0, "response_chars": 0, "feedback": 0})
+
+    interaction_pipeline = [
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+            "interactions": {"$sum": 1},
+            "response_chars": {"$sum": {"$strLenCP": {"$ifNull": ["$bot_response", ""]}}}
+        }}
+    ]
+    for result in chat_collection.aggregate(interaction_pipeline, allowDiskUse=True):
+        if result["_id"] is None:
+            continue
+        day(result["_id"]).update(interactions=result["interactions"], response_chars=result["response_chars"])
+        documents[TOTALS_ID]["interactions"] += result["interactions"]
+        documents[TOTALS_ID]["response_chars"] += result["response_chars"]
+
+    session_pipeline = [
+        {"$match": {"session_id": {"$exists": True, "$ne": None}}},
+        {"$group": {"_id": "$session_id"}},
+        {"$count": "sessions"}
+    ]
+    session_count = list(chat_collection.aggregate(session_pipeline, allowDiskUse=True))
+    documents[TOTALS_ID]["sessions"] = session_count[0]["sessions"] if session_count else 0
+
+    if feedback_collection is not None:
+        feedback_pipeline = [
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$feedback_timestamp"}},
+                    "type": "$feedback_type"
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+        for result in feedback_collection.aggregate(feedback_pipeline, allowDiskUse=True):
+            totals = documents[TOTALS_ID]
+            totals["feedback"] += result["count"]
+            feedback_type = result["_id"].get("type")
+            totals["feedback_by_type"][feedback_type] = totals["feedback_by_type"].get(feedback_type, 0) + result["count"]
+            if result["_id"].get("day"):
+                day(result["_id"]["day"])["feedback"] += result["count"]
+
+    collection.delete_many({})
+    collection.insert_many([{"_id": key, **values} for key, values in documents.items()])
+    invalidate()
+    return len(documents)
+
+def _argmax(counters_path, default):
+    """Aggregation expression: key with the highest count (first wins ties), like max(values, key=values.get)"""
+    return {"$let": {
+        "vars": {"best": {"$reduce": {
+            "input": {"$objectToArray": {"$ifNull": [counters_path, {}]}},
+            "initialValue": {"k": default, "v": None},
+            "in": {"$cond": [{"$gt": ["$$this.v", "$$value.v"]}, "$$this", "$$value"]}
+        }}},
+        "in": "$$best.k"
+    }}
+
+def _preference_expression(field, preference):
+    """A session's derived preference, computed server-side like preference_model.derive_preferences()"""
+    _, default = preference_model.COUNTER_PREFERENCES[field]
+    return {"$cond": [
+        {"$eq": [{"$type": "$counters"}, "object"]},
+        _argmax(f"$counters.{field}", default),
+        # Documents from before the incremental model only carry a snapshot
+        {"$ifNull": [f"$user_preferences.{preference}", "unknown"]}
+    ]}
+
+async def preference_breakdown():
+    """Sessions per preferred format and formality level, tallied by the server"""
+    learning_collection = repositories.learned_patterns.collection
+    if learning_collection is None:
+        return {}, {}
+    pipeline = [
+        {"$project": {
+            "format": _preference_expression("request_type", "preferred_format"),
+            "formality": _preference_expression("formality_level", "formality_level")
+        }},
+        {"$facet": {
+            "format": [{"$group": {"_id": "$format", "count": {"$sum": 1}}}],
+            "formality": [{"$group": {"_id": "$formality", "count": {"$sum": 1}}}]
+        }}
+    ]
+    results = await (await learning_collection.aggregate(pipeline, allowDiskUse=True)).to_list(length=1)
+    result = results[0] if results else {}
+    format_preferences = {item["_id"]: item["count"] for item in result.get("format", [])}
+    formality_preferences = {item["_id"]: item["count"] for item in result.get("formality", [])}
+    return format_preferences, formality_preferences
+
+async def get_totals():
+    collection = repositories.analytics_rollups.collection
+    if collection is None:
+        return {}
+    return await collection.find_one({"_id": TOTALS_ID}) or {}
+
+async def count_recent(field, days=RECENT_DAYS, now=None):
+    """Sum a daily counter over the last `days` days (a range read on _id)"""
+    collection = repositories.analytics_rollups.collection
+    if collection is None:
+        return 0
+    now = now or datetime.utcnow()
+    start = day_id(now - timedelta(days=days))
+    # ";" sorts right after ":", so this bounds the scan to the "day:" documents
+    buckets = collection.find({"_id": {"$gte": start, "$lt": "day;"}}, {field: 1})
+    return sum([bucket.get(field, 0) async for bucket in buckets])
+
+async def cached(name, compute):
+    """Serve an analytics response from the short-TTL cache, awaiting `compute()` on a miss"""
+    response = _responses.get(name)
+    if response is None:
+        response = await compute()
+        _responses.set(name, response)
+    return response
+
+def invalidate():
+    _responses.clear()
@@ -0,0 +1,89 @@
+"""
+Shared store for career content that does not depend on the user: the base roadmap
+and base learning path of each career, keyed by normalized career name. Content is
+generated once (concurrent identical requests share a single in-flight generation),
+kept in memory and in Mongo with a TTL, and personalized per request afterwards.
+"""
+import copy
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import database
+from cache import TTLCache, PersistentCache, SingleFlight
+
+ROADMAP = "roadmap"
+LEARNING_PATH = "learning_path"
+
+# Warmed by jobs.warm_career_content when no careers are given explicitly
+POPULAR_CAREERS = [
+    "Data Scientist",
+    "Software Engineer",
+    "Data Analyst",
+    "Product Manager",
+    "UX Designer",
+    "Machine Learning Engineer",
+    "Cybersecurity Analyst",
+    "Cloud Engineer",
+    "Digital Marketing Specialist",
+    "Full Stack Developer",
+    "Business Analyst",
+    "DevOps Engineer",
+    "Graphic Designer",
+    "Content Writer",
+    "Financial Analyst",
+    "Registered Nurse",
+    "Teacher",
+    "Mechanical Engineer",
+    "Project Manager",
+    "Research Scientist",
+]
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9+#]+')
+
+_store = PersistentCache(
+    TTLCache(max_size=config.CAREER_CONTENT_MAX_ENTRIES, ttl=config.CAREER_CONTENT_TTL_SECONDS),
+    collection_getter=database.get_career_content_collection
+)
+_generations = SingleFlight()
+
+def normalize_career_name(career_name):
+    """"Data  Scientist", "data scientist " and "Data-Scientist" share one entry"""
+    return _NON_WORD_RE.sub(' ', (career_name or '').lower()).strip()
+
+def content_key(kind, career_name):
+    return f"{kind}:{normalize_career_name(career_name)}"
+
+def get_or_generate(kind, career_name, generate):
+    """
+    Stored content for (kind, career), generating it on a miss.
+    `generate()` returns (content, is_fallback); fallbacks are returned but never stored.
+    Returns (a private copy of the content, "hit" | "miss" | "fallback").
+    """
+    key = content_key(kind, career_name)
+    content = _store.get(key)
+    if content is not None:
+        return copy.deepcopy(content), "hit"
+
+    def generate_and_store():
+        # Another flight may have finished between our miss and acquiring this one
+        stored = _store.get(key)
+        if stored is not None:
+            return stored, "hit"
+        content, is_fallback = generate()
+        if is_fallback:
+            return content, "fallback"
+        _store.set(key, content)
+        return content, "miss"
+
+    content, status = _generations.do(key, generate_and_store)
+    return copy.deepcopy(content), status
+
+def is_stored(kind, career_name):
+    return _store.get(content_key(kind, career_name)) is not None
+
+def get_store_stats():
+    stats = _store.stats()
+    stats["generations"] = _generations.stats()
+    return stats
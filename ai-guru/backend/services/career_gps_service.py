@@ -1,13 +1,38 @@
-import google.generativeai as genai
+import genai_backend
 import config
 import json
 import re
+import copy
+import hashlib
+import time
+from cache import TTLCache
+import metrics
+import services.career_content_store as career_content_store
+import services.prompt_builder as prompt_builder
+
+# Gemini 2.5 Flash model, created (and the SDK configured) on the first Career GPS call
+model = None
+
+def get_model():
+    global model
+    if model is None:
+        model = genai_backend.get_model('gemini-2.5-flash')  # Using stable Gemini 2.5 Flash
+    return model
+
+def _call_model(prompt, **kwargs):
+    """model.generate_content, counted in the LLM in-flight gauge and latency histogram"""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        with metrics.LLM_IN_FLIGHT.labels("career_gps").track_inprogress():
+            response = get_model().generate_content(prompt, **kwargs)
+        outcome = "ok"
+        return response
+    finally:
+        metrics.LLM_CALL_SECONDS.labels("career_gps", outcome).observe(time.perf_counter() - started)
 
-# Configure Gemini API
-genai.configure(api_key=config.GEMINI_API_KEY)
-
-# Initialize the generative model (using the stable Gemini 2.5 Flash model)
-model = genai.GenerativeModel('gemini-2.5-flash')  # Using stable Gemini 2.5 Flash
+# Validated recommendations per canonical profile fingerprint
+_recommendation_cache = TTLCache(max_size=config.CAREER_GPS_CACHE_MAX_ENTRIES, ttl=config.CAREER_GPS_CACHE_TTL_SECONDS)
 
 def validate_and_preprocess_list(input_list, field_name):
     """Validate and preprocess list inputs"""
@@ -77,12 +102,17 @@ def categorize_industry(career_name, summary):
 
     return 'general'
 
+PROFILE_CONTEXT_HEADER = "\nCOMPREHENSIVE USER PROFILE DATA:"
+
 def build_profile_context(user_profile):
     """Build comprehensive profile context for AI analysis"""
     if not user_profile:
         return ""
+    return '\n'.join([PROFILE_CONTEXT_HEADER] + build_profile_sections(user_profile))
 
-    context_parts = ["\nCOMPREHENSIVE USER PROFILE DATA:"]
+def build_profile_sections(user_profile):
+    """Profile blocks in the order they are kept when the prompt must be trimmed"""
+    context_parts = []
 
     # Basic info
     basic = user_profile.get('basic_info', {})
@@ -133,7 +163,7 @@ Career History:
 - Current progress: {career_history.get('progress', 0)}%
 - Career GPS started: {career_history.get('created_at', 'Unknown')}""")
 
-    return '\n'.join(context_parts)
+    return context_parts
 
 def analyze_career_preferences(interests, skills, goal, motivation, learning_style, user_profile=None):
     """
@@ -150,7 +180,14 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
     Returns:
         list: Top 3 career recommendations with details
     """
+    recommendations, _ = get_career_recommendations(interests, skills, goal, motivation, learning_style, user_profile)
+    return recommendations
 
+def get_career_recommendations(interests, skills, goal, motivation, learning_style, user_profile=None):
+    """
+    Recommendations plus how they were produced: "hit" (served from the fingerprint cache),
+    "miss" (generated and cached) or "fallback" (defaults after a failed generation; not cached).
+    """
     # Input validation and preprocessing
     interests = validate_and_preprocess_list(interests, "interests")
     skills = validate_and_preprocess_list(skills, "skills")
@@ -159,21 +196,49 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
     learning_style = validate_and_preprocess_text(learning_style, "learning_style")
 
     # Process comprehensive user profile data
-    profile_context = ""
-    if user_profile:
-        profile_context = build_profile_context(user_profile)
-    
-    # Create a comprehensive prompt for personalized career recommendations
-    prompt = f"""
+    profile_sections = build_profile_sections(user_profile) if user_profile else []
+    profile_context = '\n'.join([PROFILE_CONTEXT_HEADER] + profile_sections) if user_profile else ""
+
+    fingerprint = profile_fingerprint(interests, skills, goal, motivation, learning_style, profile_context)
+    cached = _recommendation_cache.get(fingerprint)
+    if cached is not None:
+        print(f"⚡ Career recommendations served from cache ({fingerprint[:12]})")
+        return copy.deepcopy(cached), "hit"
+
+    recommendations, is_fallback = _generate_career_recommendations(
+        interests, skills, goal, motivation, learning_style, profile_sections
+    )
+    if is_fallback:
+        return recommendations, "fallback"
+    _recommendation_cache.set(fingerprint, copy.deepcopy(recommendations))
+    return recommendations, "miss"
+
+def _canonical_text(text):
+    return ' '.join(text.lower().split())
+
+def profile_fingerprint(interests, skills, goal, motivation, learning_style, profile_context):
+    """
+    Canonical identity of a quiz submission: near-identical answers (case, order, duplicates,
+    whitespace) share a fingerprint. The profile enters as a digest of the prompt context built from it.
+    """
+    canonical = {
+        "interests": sorted({_canonical_text(item) for item in interests}),
+        "skills": sorted({_canonical_text(item) for item in skills}),
+        "goal": _canonical_text(goal),
+        "motivation": _canonical_text(motivation),
+        "learning_style": _canonical_text(learning_style),
+        "profile": hashlib.sha256(profile_context.encode('utf-8')).hexdigest() if profile_context else ""
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True).encode('utf-8')).hexdigest()
+
+def get_recommendation_cache_stats():
+    return _recommendation_cache.stats()
+
+RECOMMENDATION_PROMPT = prompt_builder.PromptTemplate("""
     You are an expert career counselor with extensive knowledge of diverse career fields. Analyze this user's comprehensive profile and provide 5 highly personalized career recommendations from different industries.
 
     USER PROFILE:
-    Interests: {', '.join(interests) if interests else 'Not specified'}
-    Skills: {', '.join(skills) if skills else 'Not specified'}
-    Goal: {goal if goal else 'Not specified'}
-    Motivation: {motivation if motivation else 'Not specified'}
-    Learning Style: {learning_style if learning_style else 'Not specified'}
-
+{interests}{skills}{answers}
     {profile_context}
 
     REQUIREMENTS:
@@ -198,7 +263,33 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
     ]
 
     IMPORTANT: Make each recommendation from a different industry sector and highly personalized to their profile.
-    """
+    """)
+
+def build_recommendation_prompt(interests, skills, goal, motivation, learning_style, profile_sections):
+    """Recommendation prompt fitted to CAREER_GPS_PROMPT_TOKEN_BUDGET; profile blocks go first, then skills, then interests"""
+    answers = [
+        f"Goal: {goal if goal else 'Not specified'}",
+        f"Motivation: {motivation if motivation else 'Not specified'}",
+        f"Learning Style: {learning_style if learning_style else 'Not specified'}",
+    ]
+    sections = [
+        prompt_builder.Section("interests", interests or ['Not specified'], priority=3,
+                               header="    Interests: ", separator=", "),
+        prompt_builder.Section("skills", skills or ['Not specified'], priority=2,
+                               header="    Skills: ", separator=", "),
+        prompt_builder.Section("answers", answers, header="    ", separator="\n    "),
+        prompt_builder.Section("profile_context", profile_sections, priority=1,
+                               header=PROFILE_CONTEXT_HEADER + "\n", footer=""),
+    ]
+    prompt, _ = prompt_builder.assemble(
+        RECOMMENDATION_PROMPT, sections, config.CAREER_GPS_PROMPT_TOKEN_BUDGET, "career_recommendations"
+    )
+    return prompt
+
+def _generate_career_recommendations(interests, skills, goal, motivation, learning_style, profile_sections):
+    """Call Gemini for validated inputs; returns (recommendations, is_fallback)"""
+    # Create a comprehensive prompt for personalized career recommendations
+    prompt = build_recommendation_prompt(interests, skills, goal, motivation, learning_style, profile_sections)
     
     try:
         # Generate response from AI with enhanced parameters
@@ -206,9 +297,9 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
         print(f"📝 User interests: {interests}")
         print(f"📝 User skills: {skills}")
 
-        response = model.generate_content(
+        response = _call_model(
             prompt,
-            generation_config=genai.types.GenerationConfig(
+            generation_config=genai_backend.get_genai().types.GenerationConfig(
                 temperature=0.4,  # lower for more consistent JSON
                 top_p=0.9,
                 max_output_tokens=2048,
@@ -219,7 +310,7 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
         # Handle blocked/empty responses
         if not getattr(response, 'candidates', None):
             print("⚠️ No candidates in response; likely blocked by safety filters.")
-            return generate_relevant_defaults(interests, skills, goal)
+            return generate_relevant_defaults(interests, skills, goal), True
 
         cand = response.candidates[0]
         parts = getattr(cand, 'content', None).parts if getattr(cand, 'content', None) else []
@@ -227,7 +318,7 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
             print("⚠️ Response had no content parts; safety or empty.")
             print(f"Safety ratings: {getattr(cand, 'safety_ratings', None)}")
             print(f"Finish reason: {getattr(cand, 'finish_reason', None)}")
-            return generate_relevant_defaults(interests, skills, goal)
+            return generate_relevant_defaults(interests, skills, goal), True
 
         # Extract text from parts safely
         text_chunks = []
@@ -252,12 +343,12 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
         except json.JSONDecodeError as json_error:
             print(f"❌ JSON parsing failed: {json_error}")
             print(f"Response text: {response_text}")
-            return generate_relevant_defaults(interests, skills, goal)
+            return generate_relevant_defaults(interests, skills, goal), True
 
         # Validate structure
         if not isinstance(career_recommendations, list):
             print("⚠️ Response is not a list; using defaults")
-            return generate_relevant_defaults(interests, skills, goal)
+            return generate_relevant_defaults(interests, skills, goal), True
 
         # Normalize and ensure fields
         validated = []
@@ -289,14 +380,14 @@ def analyze_career_preferences(interests, skills, goal, motivation, learning_sty
                     validated.append(d)
                     seen_names.add(d['name'].lower())
 
-        return validated
+        return validated, False
 
     except Exception as e:
         print(f"❌ ERROR generating career recommendations: {e}")
         print(f"❌ Error type: {type(e).__name__}")
         import traceback
         traceback.print_exc()
-        return generate_relevant_defaults(interests, skills, goal)
+        return generate_relevant_defaults(interests, skills, goal), True
 
 def generate_relevant_defaults(interests, skills, goal):
     """Generate relevant default recommendations based on user profile"""
@@ -424,6 +515,8 @@ def generate_relevant_defaults(interests, skills, goal):
 def get_career_roadmap(career_name, user_progress):
     """
     Generate a personalized roadmap for a selected career path.
+    The roadmap itself is shared per career (see career_content_store); the user's
+    progress is applied on top of it.
     
     Args:
         career_name (str): The selected career path
@@ -432,12 +525,17 @@ def get_career_roadmap(career_name, user_progress):
     Returns:
         dict: Career roadmap with milestones and resources
     """
-    
+    roadmap, _ = career_content_store.get_or_generate(
+        career_content_store.ROADMAP, career_name, lambda: _generate_base_roadmap(career_name)
+    )
+    roadmap["career"] = career_name
+    return apply_roadmap_progress(roadmap, user_progress)
+
+def _generate_base_roadmap(career_name):
+    """The user-independent roadmap for a career; returns (roadmap, is_fallback)"""
     prompt = f"""
     Create a detailed 5-stage roadmap for the career: {career_name}
     
-    Current user progress: {user_progress}%
-    
     Provide:
     1. 5 milestones with titles and descriptions
     2. Recommended mentors for each stage
@@ -460,49 +558,73 @@ def get_career_roadmap(career_name, user_progress):
     """
     
     try:
-        response = model.generate_content(prompt)
+        response = _call_model(prompt)
         roadmap = json.loads(response.text)
-        return roadmap
+        if not isinstance(roadmap, dict):
+            raise ValueError("Roadmap is not a JSON object")
+        return roadmap, False
     except Exception as e:
         print(f"Error generating career roadmap: {e}")
         # Return a default roadmap
-        return {
-            "career": career_name,
-            "milestones": [
-                {
-                    "title": "Foundation Building",
-                    "description": "Master the fundamental concepts and skills required for your chosen career path.",
-                    "timeframe": "3-6 months"
-                },
-                {
-                    "title": "Skill Application",
-                    "description": "Apply your knowledge through projects, internships, or volunteer work to gain practical experience.",
-                    "timeframe": "6-12 months"
-                },
-                {
-                    "title": "Networking & Mentorship",
-                    "description": "Connect with professionals in your field and find mentors to guide your career development.",
-                    "timeframe": "Ongoing"
-                },
-                {
-                    "title": "Specialization",
-                    "description": "Focus on specific areas within your career path to develop expertise and stand out.",
-                    "timeframe": "6-18 months"
-                },
-                {
-                    "title": "Career Launch",
-                    "description": "Secure your first position or major opportunity in your chosen career field.",
-                    "timeframe": "3-12 months"
-                }
-            ],
-            "mentors": ["Industry Professionals", "Career Coaches"],
-            "resources": ["Online Courses", "Professional Associations", "Industry Events"]
-        }
+        return generate_default_roadmap(career_name), True
+
+def generate_default_roadmap(career_name):
+    """Generic 5-stage roadmap used when generation fails"""
+    return {
+        "career": career_name,
+        "milestones": [
+            {
+                "title": "Foundation Building",
+                "description": "Master the fundamental concepts and skills required for your chosen career path.",
+                "timeframe": "3-6 months"
+            },
+            {
+                "title": "Skill Application",
+                "description": "Apply your knowledge through projects, internships, or volunteer work to gain practical experience.",
+                "timeframe": "6-12 months"
+            },
+            {
+                "title": "Networking & Mentorship",
+                "description": "Connect with professionals in your field and find mentors to guide your career development.",
+                "timeframe": "Ongoing"
+            },
+            {
+                "title": "Specialization",
+                "description": "Focus on specific areas within your career path to develop expertise and stand out.",
+                "timeframe": "6-18 months"
+            },
+            {
+                "title": "Career Launch",
+                "description": "Secure your first position or major opportunity in your chosen career field.",
+                "timeframe": "3-12 months"
+            }
+        ],
+        "mentors": ["Industry Professionals", "Career Coaches"],
+        "resources": ["Online Courses", "Professional Associations", "Industry Events"]
+    }
+
+def apply_roadmap_progress(roadmap, user_progress):
+    """Overlay the user's progress on a shared roadmap: each milestone is completed, current or upcoming"""
+    progress = max(0, min(100, int(user_progress or 0)))
+    milestones = [m for m in roadmap.get("milestones") or [] if isinstance(m, dict)]
+    if milestones:
+        share = 100 / len(milestones)
+        for index, milestone in enumerate(milestones):
+            if progress >= (index + 1) * share:
+                milestone["status"] = "completed"
+            elif progress >= index * share:
+                milestone["status"] = "current"
+            else:
+                milestone["status"] = "upcoming"
+    roadmap["progress"] = progress
+    return roadmap
 
 def generate_personalized_learning_path(career_name, career_summary, user_profile, match_percentage):
     """
     Generate a comprehensive, personalized learning path for a specific career choice.
     This function creates a detailed roadmap when a seeker clicks "View Details" on a career.
+    The phases, courses and certifications are shared per career (see career_content_store);
+    the user's skills, learning style and match are applied on top of them.
     
     Args:
         career_name (str): The selected career path name
@@ -513,43 +635,58 @@ def generate_personalized_learning_path(career_name, career_summary, user_profil
     Returns:
         dict: Comprehensive learning path with phases, courses, projects, certifications
     """
-    
-    # Build profile context for personalization
-    profile_context = build_profile_context(user_profile) if user_profile else ""
-    
-    # Extract key information for better personalization
-    user_skills = user_profile.get('skills', []) if user_profile else []
-    user_education = user_profile.get('education', []) if user_profile else []
-    user_experience = user_profile.get('experience', []) if user_profile else []
+    learning_path, _ = career_content_store.get_or_generate(
+        career_content_store.LEARNING_PATH, career_name,
+        lambda: _generate_base_learning_path(career_name, career_summary)
+    )
+    return personalize_learning_path(learning_path, career_name, user_profile, match_percentage)
+
+def personalize_learning_path(learning_path, career_name, user_profile, match_percentage):
+    """Cheap per-user overlay: skills the user already has are set aside and the starting phase is suggested"""
+    user_skills = {skill.lower() for skill in (user_profile or {}).get('skills', []) if isinstance(skill, str)}
     learning_style = user_profile.get('basic_info', {}).get('learning_style', 'mixed') if user_profile else 'mixed'
-    
-    prompt = f"""
-You are an expert career development advisor creating a PERSONALIZED LEARNING PATH for a student who has chosen to pursue a career as a {career_name}.
 
-CAREER DETAILS:
-- Career: {career_name}
-- Summary: {career_summary}
-- Match with User: {match_percentage}%
+    skills_matched = 0
+    start_phase = None
+    for phase in learning_path.get("phases") or []:
+        if not isinstance(phase, dict):
+            continue
+        skills = [skill for skill in phase.get("skills_to_learn") or [] if isinstance(skill, str)]
+        known = [skill for skill in skills if skill.lower() in user_skills]
+        if known:
+            phase["skills_already_have"] = known
+            phase["skills_to_learn"] = [skill for skill in skills if skill.lower() not in user_skills]
+            skills_matched += len(known)
+        if start_phase is None and phase.get("skills_to_learn"):
+            start_phase = phase.get("phase_number")
+
+    learning_path["career_name"] = career_name
+    learning_path["match_percentage"] = match_percentage
+    learning_path["personalization"] = {
+        "learning_style": learning_style,
+        "existing_skills_matched": skills_matched,
+        "recommended_start_phase": start_phase or 1
+    }
+    return learning_path
 
-USER PROFILE:
-{profile_context}
+LEARNING_PATH_PROMPT = prompt_builder.PromptTemplate("""
+You are an expert career development advisor creating a LEARNING PATH for students who have chosen to pursue a career as a {career_name}.
 
-Current Skills: {', '.join(user_skills[:10]) if user_skills else 'Beginner level'}
-Learning Style: {learning_style}
+CAREER DETAILS:
+- Career: {career_name}
 
-TASK: Create a comprehensive, step-by-step learning path that will help this specific user transition into the {career_name} role. 
+TASK: Create a comprehensive, step-by-step learning path that will help a learner transition into the {career_name} role, starting from the fundamentals.
 
 The learning path should be:
-1. PERSONALIZED to their current skill level and background
-2. STRUCTURED in clear phases from beginner to job-ready
-3. ACTIONABLE with specific courses, projects, and certifications
-4. REALISTIC with estimated timelines
+1. STRUCTURED in clear phases from beginner to job-ready
+2. ACTIONABLE with specific courses, projects, and certifications
+3. REALISTIC with estimated timelines
 
 Return ONLY a valid JSON object (no markdown, no extra text) with this EXACT structure:
 
 {{
   "career_name": "{career_name}",
-  "overview": "A 2-3 sentence personalized overview explaining why this path suits them",
+  "overview": "A 2-3 sentence overview of the path and what it leads to",
   "total_duration": "Estimated total time (e.g., '6-12 months')",
   "phases": [
     {{
@@ -613,18 +750,23 @@ IMPORTANT REQUIREMENTS:
 - Each phase should have 2-4 courses and 2-3 projects
 - Recommend 2-4 relevant certifications
 - All content must be realistic and available
-- Personalize based on their current level
+- List concrete, commonly named skills in skills_to_learn (e.g., "Python", "SQL")
 - Be specific with course names and providers
-"""
+""")
+
+def _generate_base_learning_path(career_name, career_summary=""):
+    """The user-independent learning path for a career; returns (learning_path, is_fallback)"""
+    prompt, _ = prompt_builder.assemble(
+        LEARNING_PATH_PROMPT, [prompt_builder.Section("career_name", [career_name], footer="")],
+        config.CAREER_GPS_PROMPT_TOKEN_BUDGET, "learning_path"
+    )
 
     try:
-        print(f"🎓 Generating personalized learning path for: {career_name}")
-        print(f"📊 Match percentage: {match_percentage}%")
-        print(f"👤 User has {len(user_skills)} skills in profile")
+        print(f"🎓 Generating base learning path for: {career_name}")
         
-        response = model.generate_content(
+        response = _call_model(
             prompt,
-            generation_config=genai.types.GenerationConfig(
+            generation_config=genai_backend.get_genai().types.GenerationConfig(
                 temperature=0.5,
                 top_p=0.9,
                 max_output_tokens=4096,  # Increased for comprehensive content
@@ -635,13 +777,13 @@ IMPORTANT REQUIREMENTS:
         # Handle blocked/empty responses
         if not getattr(response, 'candidates', None):
             print("⚠️ No candidates in response; using default learning path")
-            return generate_default_learning_path(career_name, career_summary)
+            return generate_default_learning_path(career_name, career_summary), True
         
         cand = response.candidates[0]
         parts = getattr(cand, 'content', None).parts if getattr(cand, 'content', None) else []
         if not parts:
             print("⚠️ Response had no content parts")
-            return generate_default_learning_path(career_name, career_summary)
+            return generate_default_learning_path(career_name, career_summary), True
         
         # Extract text
         text_chunks = []
@@ -665,18 +807,21 @@ IMPORTANT REQUIREMENTS:
         # Parse JSON
         try:
             learning_path = json.loads(response_text)
+            if not isinstance(learning_path, dict):
+                print("⚠️ Learning path is not a JSON object")
+                return generate_default_learning_path(career_name, career_summary), True
             print(f"✅ Learning path generated successfully with {len(learning_path.get('phases', []))} phases")
-            return learning_path
+            return learning_path, False
         except json.JSONDecodeError as json_error:
             print(f"❌ JSON parsing failed: {json_error}")
             print(f"Response preview: {response_text[:300]}...")
-            return generate_default_learning_path(career_name, career_summary)
+            return generate_default_learning_path(career_name, career_summary), True
             
     except Exception as e:
         print(f"❌ Error generating learning path: {e}")
         import traceback
         traceback.print_exc()
-        return generate_default_learning_path(career_name, career_summary)
+        return generate_default_learning_path(career_name, career_summary), True
 
 def generate_default_learning_path(career_name, career_summary):
     """Generate a default learning path structure when AI generation fails"""
@@ -0,0 +1,393 @@
+"""
+Cold archive for chat_history. Interactions older than CHAT_RETENTION_DAYS are written to
+compressed JSONL files under CHAT_ARCHIVE_DIR, one directory per month of the interaction
+timestamp (YYYY-MM/part-<run>-<batch>.jsonl.gz), and then deleted from chat_history.
+learned_patterns, analytics_rollups and the session summaries are left alone, so preference
+learning, analytics and the sidebar keep the aggregated signal.
+
+The `chat_archive` collection maps each session to the files holding its messages, so
+rehydrating a session reads only those files. Rehydrated interactions are marked with
+`rehydrated_at` and age out again CHAT_RETENTION_DAYS later without being re-written, unless
+they were edited after rehydration (ARCHIVE_DIRTY_FIELD), in which case the new version is
+appended and wins over the older copy on the next rehydrate.
+
+Deleting a session (or all history) erases its lines from the archive files, not just the
+index, and the analytics rollups subtract the erased interactions; jobs.purge_chat_archive removes any lines a failed or concurrent delete left behind.
+archive_expired() is a sync job (jobs.archive_chat_history); rehydrate() runs on the request path.
+"""
+import asyncio
+import gzip
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import database
+import repositories
+
+# Relaxed extended JSON keeps datetimes and ObjectIds round-trippable and stays readable by plain JSON tools
+JSON_OPTIONS = json_util.JSONOptions(json_mode=json_util.JSONMode.RELAXED, tz_aware=False)
+
+SUFFIXES = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+
+ARCHIVE_DIRTY_FIELD = repositories.ChatHistoryRepository.ARCHIVE_DIRTY_FIELD
+
+# Purges rewrite shared part files; one rewrite at a time per worker keeps two deletes from racing
+_rewrite_lock = threading.Lock()
+
+def _reader(path):
+    """Text-mode reader for an archive file; the codec follows the file suffix, not the current setting"""
+    if path.endswith(SUFFIXES["zstd"]):
+        import zstandard  # Optional dependency, only needed for CHAT_ARCHIVE_COMPRESSION=zstd
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+def _compressor(raw, compression):
+    """Compressing writer over an open binary file; closing it leaves `raw` open"""
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return gzip.GzipFile(fileobj=raw, mode="wb")
+
+def _compression_of(path):
+    return "zstd" if path.endswith(SUFFIXES["zstd"]) else "gzip"
+
+def _write_lines(path, lines, compression):
+    """Write encoded lines to `path` atomically (temp file, fsync, rename)"""
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(temp_path, "wb") as raw:
+            with _compressor(raw, compression) as writer:
+                for line in lines:
+                    writer.write(line.encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def serialize(document):
+    return json_util.dumps(document, json_options=JSON_OPTIONS)
+
+def deserialize(line):
+    return json_util.loads(line, json_options=JSON_OPTIONS)
+
+def month_partition(timestamp):
+    return timestamp.strftime("%Y-%m")
+
+def retention_cutoff(now=None, days=None):
+    days = config.CHAT_RETENTION_DAYS if days is None else days
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+def expired_filter(cutoff):
+    """Interactions past retention: by timestamp, or by rehydration time for rehydrated ones"""
+    return {"$or": [
+        {"rehydrated_at": {"$lt": cutoff}},
+        {"rehydrated_at": {"$exists": False}, "timestamp": {"$lt": cutoff}}
+    ]}
+
+def write_part(archive_dir, month, name, documents, compression=None):
+    """
+    Write one archive file atomically (temp file, fsync, rename) and return its path
+    relative to `archive_dir`, which is what the chat_archive index stores.
+    """
+    compression = compression or config.CHAT_ARCHIVE_COMPRESSION
+    if compression not in SUFFIXES:
+        raise ValueError(f"Unsupported CHAT_ARCHIVE_COMPRESSION '{compression}'; use one of {sorted(SUFFIXES)}")
+    relative_path = os.path.join(month, name + SUFFIXES[compression])
+    path = os.path.join(archive_dir, relative_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_lines(path, (serialize(document) + "\n" for document in documents), compression)
+    return relative_path
+
+def read_session(archive_dir, relative_paths, session_id):
+    """
+    Every archived interaction of one session found in the given files (streamed line by line).
+    An interaction re-archived after an edit appears in a later file; that copy is kept.
+    """
+    needle = json_util.dumps(session_id)
+    documents = {}
+    for relative_path in relative_paths:
+        path = os.path.join(archive_dir, relative_path)
+        if not os.path.exists(path):
+            print(f"⚠️ Archive file missing: {path}")
+            continue
+        with _reader(path) as handle:
+            for line in handle:
+                # Cheap substring test first; only candidate lines are parsed
+                if needle not in line:
+                    continue
+                document = deserialize(line)
+                if document.get("session_id") == session_id:
+                    documents[document["_id"]] = document
+    return sorted(documents.values(), key=lambda document: document["timestamp"])
+
+def rewrite_without(archive_dir, relative_path, drop, needle=None):
+    """
+    Rewrite one archive file without the interactions for which `drop(document)` is true; lines
+    not containing `needle` are kept without being parsed. A file left empty is deleted.
+    Returns (dropped documents, deleted).
+    """
+    path = os.path.join(archive_dir, relative_path)
+    with _rewrite_lock:
+        if not os.path.exists(path):
+            return [], False
+        kept = []
+        dropped = []
+        with _reader(path) as handle:
+            for line in handle:
+                document = deserialize(line) if needle is None or needle in line else None
+                if document is not None and drop(document):
+                    dropped.append(document)
+                else:
+                    kept.append(line)
+        if not dropped:
+            return [], False
+        if not kept:
+            os.remove(path)
+            return dropped, True
+        _write_lines(path, kept, _compression_of(path))
+        return dropped, False
+
+def purge_session(archive_dir, relative_paths, session_id, interaction_id=None):
+    """
+    Erase a session's interactions (or just `interaction_id`) from its archive files.
+    Returns (removed documents, emptied files); an interaction re-archived after an edit is
+    returned once, as its latest copy.
+    """
+    def drop(document):
+        return document.get("session_id") == session_id and (interaction_id is None or document["_id"] == interaction_id)
+
+    needle = json_util.dumps(session_id)
+    removed = {}
+    emptied = []
+    for relative_path in relative_paths:
+        dropped, deleted = rewrite_without(archive_dir, relative_path, drop, needle)
+        removed.update((document["_id"], document) for document in dropped)
+        if deleted:
+            emptied.append(relative_path)
+    return list(removed.values()), emptied
+
+def archive_files(archive_dir, older_than=None):
+    """Relative paths of every archive file, optionally only those last written before `older_than` (epoch seconds)"""
+    paths = []
+    for root, _, names in os.walk(archive_dir):
+        for name in names:
+            if not name.endswith(tuple(SUFFIXES.values())):
+                continue
+            path = os.path.join(root, name)
+            if older_than is None or os.path.getmtime(path) < older_than:
+                paths.append(os.path.relpath(path, archive_dir))
+    return sorted(paths)
+
+def purge_all(archive_dir):
+    """Delete every archive file (all chat history was cleared); returns how many"""
+    relative_paths = archive_files(archive_dir)
+    with _rewrite_lock:
+        for relative_path in relative_paths:
+            os.remove(os.path.join(archive_dir, relative_path))
+    return len(relative_paths)
+
+def purge_unindexed(archive_dir=None, grace_seconds=3600):
+    """
+    Erase archived interactions whose session has no chat_archive entry (deleted sessions whose
+    files could not be rewritten at the time). Files written in the last `grace_seconds` are
+    skipped, since archive_expired() indexes a batch just after writing it. Returns counts.
+    """
+    archive_dir = archive_dir or config.CHAT_ARCHIVE_DIR
+    archive_collection = database.get_chat_archive_collection()
+    if archive_collection is None:
+        raise RuntimeError("MongoDB unavailable")
+    indexed = {entry["_id"] for entry in archive_collection.find({}, {"_id": 1})}
+
+    def drop(document):
+        return bool(document.get("session_id")) and document["session_id"] not in indexed
+
+    stats = {"files": 0, "removed": 0, "deleted_files": 0}
+    for relative_path in archive_files(archive_dir, older_than=time.time() - grace_seconds):
+        dropped, deleted = rewrite_without(archive_dir, relative_path, drop)
+        stats["files"] += 1
+        stats["removed"] += len(dropped)
+        stats["deleted_files"] += int(deleted)
+    return stats
+
+def _archive_batch(documents, archive_dir, run_id, batch_number, now):
+    chat_collection = database.get_chat_collection()
+    archive_collection = database.get_chat_archive_collection()
+    sessions_collection = database.get_sessions_collection()
+
+    # Rehydrated interactions are already on disk and are only evicted again, unless edited since
+    to_write = [document for document in documents
+                if "rehydrated_at" not in document or document.get(ARCHIVE_DIRTY_FIELD)]
+    months = {}
+    for document in to_write:
+        stored = {key: value for key, value in document.items() if key not in ("rehydrated_at", ARCHIVE_DIRTY_FIELD)}
+        months.setdefault(month_partition(document["timestamp"]), []).append(stored)
+
+    session_files = {}
+    session_written = {}
+    for month, month_documents in months.items():
+        relative_path = write_part(archive_dir, month, f"part-{run_id}-{batch_number:05d}", month_documents)
+        for document in month_documents:
+            session_id = document.get("session_id")
+            if not session_id:
+                continue
+            session_files.setdefault(session_id, set()).add(relative_path)
+            session_written.setdefault(session_id, 0)
+    for document in to_write:
+        # A re-written edit replaces its older copy rather than adding a message
+        if document.get("session_id") and "rehydrated_at" not in document:
+            session_written[document["session_id"]] += 1
+
+    if session_files:
+        archive_collection.bulk_write([
+            UpdateOne(
+                {"_id": session_id},
+                {
+                    "$addToSet": {"files": {"$each": sorted(files)}},
+                    "$inc": {"message_count": session_written[session_id]},
+                    "$set": {"last_archived_at": now}
+                },
+                upsert=True
+            )
+            for session_id, files in session_files.items()
+        ], ordered=False)
+
+    # Only delete once the files and the index are durable; a crash before this line just re-archives
+    chat_collection.delete_many({"_id": {"$in": [document["_id"] for document in documents]}})
+
+    evicted = {}
+    for document in documents:
+        if document.get("session_id"):
+            evicted[document["session_id"]] = evicted.get(document["session_id"], 0) + 1
+    if sessions_collection is not None and evicted:
+        # Summaries keep the total message_count; archived_count tells the UI to rehydrate
+        sessions_collection.bulk_write([
+            UpdateOne({"_id": session_id}, {"$inc": {"archived_count": count}})
+            for session_id, count in evicted.items()
+        ], ordered=False)
+    return len(to_write), len(months)
+
+def archive_expired(now=None, days=None, batch_size=None, archive_dir=None):
+    """Move every interaction past retention to the archive, one batch at a time; returns counts"""
+    now = now or datetime.utcnow()
+    days = config.CHAT_RETENTION_DAYS if days is None else days
+    stats = {"evicted": 0, "written": 0, "files": 0}
+    if days <= 0:
+        return stats
+    batch_size = batch_size or config.CHAT_ARCHIVE_BATCH_SIZE
+    archive_dir = archive_dir or config.CHAT_ARCHIVE_DIR
+    chat_collection = database.get_chat_collection()
+    if chat_collection is None or database.get_chat_archive_collection() is None:
+        raise RuntimeError("MongoDB unavailable")
+
+    query = expired_filter(retention_cutoff(now, days))
+    run_id = now.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    batch_number = 0
+    while True:
+        # Each batch is deleted before the next read, so the same query walks the whole backlog
+        documents = list(chat_collection.find(query).limit(batch_size))
+        if not documents:
+            break
+        written, files = _archive_batch(documents, archive_dir, run_id, batch_number, now)
+        stats["evicted"] += len(documents)
+        stats["written"] += written
+        stats["files"] += files
+        batch_number += 1
+    return stats
+
+async def rehydrate(session_id, archive_dir=None):
+    """
+    Copy a session's archived interactions back into chat_history.
+    Returns how many were restored, or None if the session has nothing archived.
+    """
+    archive_collection = repositories.chat_archive.collection
+    chat_collection = repositories.chat_history.collection
+    if archive_collection is None or chat_collection is None:
+        return None
+    entry = await archive_collection.find_one({"_id": session_id})
+    if not entry:
+        return None
+
+    # Decompression and parsing are blocking file work
+    documents = await asyncio.to_thread(
+        read_session, archive_dir or config.CHAT_ARCHIVE_DIR, entry.get("files", []), session_id
+    )
+    now = datetime.utcnow()
+    restored = 0
+    if documents:
+        for document in documents:
+            document["rehydrated_at"] = now
+        try:
+            restored = len((await chat_collection.insert_many(documents, ordered=False)).inserted_ids)
+        except BulkWriteError as e:
+            # Interactions still hot from an earlier rehydrate are duplicates; anything else is a real failure
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+            restored = e.details.get("nInserted", 0)
+        # Restart the retention clock for those earlier copies too
+        await chat_collection.update_many(
+            {"session_id": session_id, "rehydrated_at": {"$lt": now}},
+            {"$set": {"rehydrated_at": now}}
+        )
+
+    sessions_collection = repositories.sessions.collection
+    if sessions_collection is not None:
+        await sessions_collection.update_one({"_id": session_id}, {"$unset": {"archived_count": ""}})
+    return restored
+
+async def is_archived(session_id):
+    archive_collection = repositories.chat_archive.collection
+    if archive_collection is None:
+        return False
+    return await archive_collection.find_one({"_id": session_id}, {"_id": 1}) is not None
+
+async def forget(session_id=None, archive_dir=None):
+    """
+    Erase one session's archived interactions from the archive files and drop its index entry,
+    or, without a session, delete every archive file and the whole index.
+    Returns the erased interactions of the session, so the analytics rollups can subtract them.
+    """
+    archive_collection = repositories.chat_archive.collection
+    if archive_collection is None:
+        return []
+    archive_dir = archive_dir or config.CHAT_ARCHIVE_DIR
+    if session_id is None:
+        # File work is blocking; the index goes last so a failed purge can be retried by the job
+        await asyncio.to_thread(purge_all, archive_dir)
+        await archive_collection.delete_many({})
+        return []
+    removed = []
+    entry = await archive_collection.find_one({"_id": session_id})
+    if entry:
+        removed, _ = await asyncio.to_thread(purge_session, archive_dir, entry.get("files", []), session_id)
+    await archive_collection.delete_one({"_id": session_id})
+    return removed
+
+async def forget_interaction(interaction, archive_dir=None):
+    """
+    Erase one deleted interaction from the archive so rehydrating its session does not restore it.
+    Only rehydrated interactions can be deleted one by one, and the rollups already subtracted those.
+    """
+    session_id = interaction.get("session_id")
+    archive_collection = repositories.chat_archive.collection
+    if archive_collection is None or not session_id:
+        return
+    entry = await archive_collection.find_one({"_id": session_id})
+    if not entry:
+        return
+    removed, emptied = await asyncio.to_thread(
+        purge_session, archive_dir or config.CHAT_ARCHIVE_DIR, entry.get("files", []), session_id, interaction["_id"]
+    )
+    if removed:
+        await archive_collection.update_one(
+            {"_id": session_id},
+            {"$inc": {"message_count": -len(removed)}, "$pull": {"files": {"$in": emptied}}}
+        )
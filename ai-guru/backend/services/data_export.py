@@ -0,0 +1,66 @@
+"""
+Streaming NDJSON exports of chat_history and user_feedback. Documents are read from an
+async Mongo cursor in batches of EXPORT_BATCH_SIZE, encoded one JSON line each and sent in
+~64 KB chunks, so memory stays flat however many documents match; with gzip the chunks are
+compressed on the fly into a single gzip stream. Archived interactions (see chat_archive) are not included.
+"""
+import json
+import zlib
+from datetime import datetime, timezone
+from fastapi import HTTPException
+
+# Lines are sent in chunks of about this size rather than one response message per document
+CHUNK_BYTES = 64 * 1024
+
+def _as_stored(timestamp):
+    """Timestamps are stored as naive UTC; "...Z" or "+05:30" query values are converted to match"""
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+def build_filter(timestamp_field, session_id=None, start=None, end=None):
+    """Match one session and/or the [start, end) time range"""
+    start, end = _as_stored(start), _as_stored(end)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="'start' must be before 'end'")
+    query = {}
+    if session_id:
+        query["session_id"] = session_id
+    if start or end:
+        query[timestamp_field] = {}
+        if start:
+            query[timestamp_field]["$gte"] = start
+        if end:
+            query[timestamp_field]["$lt"] = end
+    return query
+
+def _json_default(value):
+    # datetimes as ISO 8601 like the rest of the API; ObjectIds and other BSON types as strings
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def to_line(document):
+    return json.dumps(document, ensure_ascii=False, default=_json_default) + "\n"
+
+async def ndjson_lines(cursor, chunk_bytes=CHUNK_BYTES):
+    """Encoded NDJSON in ~chunk_bytes pieces; the cursor is closed even if the client disconnects"""
+    buffer = []
+    size = 0
+    try:
+        async for document in cursor:
+            line = to_line(document).encode("utf-8")
+            buffer.append(line)
+            size += len(line)
+            if size >= chunk_bytes:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+    finally:
+        await cursor.close()
+
+async def gzip_chunks(chunks):
+    """Compress a byte stream into one gzip member as it is produced; each chunk is flushed to the client"""
+    compressor = zlib.compressobj(wbits=31)  # 16 + MAX_WBITS: gzip header and trailer
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -1,37 +1,244 @@
-import google.generativeai as genai
+import asyncio
+import re
+import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import genai_backend
 import utils
+import config
+import metrics
+import services.prompt_builder as prompt_builder
 
-text_model = genai.GenerativeModel('gemini-pro')
-vision_model = genai.GenerativeModel('gemini-pro-vision')
+# Created on the first Gemini call; the SDK itself is imported off the event loop (genai_backend.load)
+text_model = None
+vision_model = None
+
+def get_text_model():
+    global text_model
+    if text_model is None:
+        text_model = genai_backend.get_model('gemini-pro')
+    return text_model
+
+def get_vision_model():
+    global vision_model
+    if vision_model is None:
+        vision_model = genai_backend.get_model('gemini-pro-vision')
+    return vision_model
+
+EMPTY_RESPONSE_FALLBACK = "Sorry, I couldn't generate a response."
+
+# Caps in-flight Gemini calls per worker; created lazily inside the running event loop
+_llm_semaphore = None
+
+class LLMTimeoutError(Exception):
+    """Raised when a Gemini call does not finish within LLM_TIMEOUT_SECONDS"""
+
+class ClientDisconnectedError(Exception):
+    """Raised when the HTTP client goes away while its Gemini call is in flight"""
+
+def _get_semaphore():
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(config.LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+async def _acquire_slot():
+    """Wait for a free Gemini slot, bounded by the call timeout"""
+    semaphore = _get_semaphore()
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=config.LLM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise LLMTimeoutError("Timed out waiting for a free Gemini slot")
+    return semaphore
+
+async def _run_llm_call(call_factory, is_disconnected=None, kind="text"):
+    """
+    Run an async Gemini call under the concurrency cap and timeout.
+    `call_factory` returns the coroutine to await; it is only invoked once a slot is free.
+    `is_disconnected` is an optional async callable (e.g. Request.is_disconnected) that cancels the call.
+    """
+    # Only waits if the startup import has not finished; the timeout covers the call, not the import
+    await genai_backend.load()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    deadline = loop.time() + config.LLM_TIMEOUT_SECONDS
+    outcome = "error"
+    try:
+        semaphore = await _acquire_slot()
+    except LLMTimeoutError:
+        metrics.LLM_CALL_SECONDS.labels(kind, "timeout").observe(time.perf_counter() - started)
+        raise
+
+    task = asyncio.ensure_future(call_factory())
+    try:
+        with metrics.LLM_IN_FLIGHT.labels(kind).track_inprogress():
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    outcome = "timeout"
+                    raise LLMTimeoutError(f"Gemini call exceeded {config.LLM_TIMEOUT_SECONDS}s")
+
+                done, _ = await asyncio.wait({task}, timeout=min(remaining, config.LLM_DISCONNECT_POLL_SECONDS))
+                if done:
+                    result = task.result()
+                    outcome = "ok"
+                    return result
+
+                if is_disconnected is not None and await is_disconnected():
+                    outcome = "disconnected"
+                    raise ClientDisconnectedError("Client disconnected before the response was ready")
+    finally:
+        if not task.done():
+            task.cancel()
+        semaphore.release()
+        metrics.LLM_CALL_SECONDS.labels(kind, outcome).observe(time.perf_counter() - started)
+
+async def generate_connectivity_check(prompt="Say hello"):
+    """Tiny prompt for /test-gemini, run like any other call (async, capped, with timeout)"""
+    response = await _run_llm_call(lambda: get_text_model().generate_content_async(prompt))
+    return response.text
 
 def generate_text_response(text, recent_context, learned_prefs, detected_lang, language_name, should_display):
     system_prompt = _build_system_prompt(text, recent_context, learned_prefs, detected_lang, language_name, should_display)
     full_prompt = system_prompt + text.strip()
-    response = text_model.generate_content(full_prompt)
-    return response.text if response.text else "Sorry, I couldn't generate a response."
+    response = get_text_model().generate_content(full_prompt)
+    return response.text if response.text else EMPTY_RESPONSE_FALLBACK
 
 def generate_image_response(pil_image, text, detected_lang, language_name, should_display):
     vision_system_prompt = _build_vision_system_prompt(text, detected_lang, language_name, should_display)
-    response = vision_model.generate_content([vision_system_prompt, pil_image])
+    response = get_vision_model().generate_content([vision_system_prompt, pil_image])
     return response.text
 
-def _build_system_prompt(text, recent_context, learned_prefs, detected_lang, language_name, should_display):
-    learned_format_pref = learned_prefs.get('preferred_format', 'neutral')
-    learned_formality = learned_prefs.get('formality_level', 'neutral')
-    learned_topics = learned_prefs.get('topics_of_interest', [])
-    
+async def generate_text_response_async(text, recent_context, learned_prefs, detected_lang, language_name, should_display, is_disconnected=None):
+    """Non-blocking variant of generate_text_response for use inside async endpoints"""
+    system_prompt = _build_system_prompt(text, recent_context, learned_prefs, detected_lang, language_name, should_display)
+    full_prompt = system_prompt + text.strip()
+    response = await _run_llm_call(lambda: get_text_model().generate_content_async(full_prompt), is_disconnected)
+    return response.text if response.text else EMPTY_RESPONSE_FALLBACK
+
+async def stream_text_response(text, recent_context, learned_prefs, detected_lang, language_name, should_display):
+    """
+    Yield text deltas as Gemini produces them.
+    Holds a concurrency slot for the whole stream; the deadline covers the full generation.
+    Cancellation (client disconnect) propagates from the consuming StreamingResponse.
+    """
+    system_prompt = _build_system_prompt(text, recent_context, learned_prefs, detected_lang, language_name, should_display)
+    full_prompt = system_prompt + text.strip()
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    deadline = loop.time() + config.LLM_TIMEOUT_SECONDS
+    outcome = "error"
+    try:
+        semaphore = await _acquire_slot()
+    except LLMTimeoutError:
+        metrics.LLM_CALL_SECONDS.labels("stream", "timeout").observe(time.perf_counter() - started)
+        raise
+
+    try:
+        with metrics.LLM_IN_FLIGHT.labels("stream").track_inprogress():
+            try:
+                response = await asyncio.wait_for(
+                    get_text_model().generate_content_async(full_prompt, stream=True),
+                    timeout=max(deadline - loop.time(), 0)
+                )
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(deadline - loop.time(), 0))
+                    except StopAsyncIteration:
+                        break
+                    try:
+                        delta = chunk.text
+                    except ValueError:
+                        # Chunk without text parts (e.g. safety-filtered); nothing to forward
+                        continue
+                    if delta:
+                        yield delta
+                outcome = "ok"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise LLMTimeoutError(f"Gemini stream exceeded {config.LLM_TIMEOUT_SECONDS}s")
+            except (asyncio.CancelledError, GeneratorExit):
+                # The consuming StreamingResponse went away
+                outcome = "disconnected"
+                raise
+    finally:
+        semaphore.release()
+        metrics.LLM_CALL_SECONDS.labels("stream", outcome).observe(time.perf_counter() - started)
+
+async def generate_image_response_async(image, text, detected_lang, language_name, should_display, is_disconnected=None):
+    """
+    Non-blocking variant of generate_image_response for use inside async endpoints.
+    `image` is a PIL image or an inline-data part ({"mime_type", "data"}) from image_pipeline.
+    """
+    vision_system_prompt = _build_vision_system_prompt(text, detected_lang, language_name, should_display)
+    response = await _run_llm_call(lambda: get_vision_model().generate_content_async([vision_system_prompt, image]), is_disconnected, kind="vision")
+    return response.text
+
+CHAT_PROMPT = prompt_builder.PromptTemplate(
+    "You are AI Guru, a friendly and knowledgeable learning assistant. Give accurate, well-structured "
+    "answers, explain concepts step by step when it helps, and keep a supportive tone.\n"
+    "{language}{preferences}{topics}{recent_context}\n"
+    "User: "
+)
+
+VISION_PROMPT = prompt_builder.PromptTemplate(
+    "You are AI Guru, a friendly and knowledgeable learning assistant. Look carefully at the image and "
+    "answer the user's question about it; if there is no question, describe what is relevant for learning.\n"
+    "{language}\n"
+    "User: {question}"
+)
+
+# A conversation exchange starts at each "User: " line produced by main.get_recent_context
+_EXCHANGE_RE = re.compile(r'^(?=User: )', re.MULTILINE)
+
+def _language_section(text, detected_lang, language_name, should_display):
     if should_display and detected_lang != 'en':
-        return f"""... (rest of the large prompt f-string) ..."""
+        instruction = f"Respond entirely in {language_name}, using its native script."
     else:
         mixed_lang = utils.detect_mixed_indian_language(text)
-        return f"""... (rest of the large prompt f-string) ..."""
+        if mixed_lang:
+            mixed_name = utils.LANGUAGE_NAMES.get(mixed_lang, mixed_lang)
+            instruction = f"The user mixes English with {mixed_name}; reply in the same mix of languages."
+        else:
+            instruction = "Respond in English."
+    return prompt_builder.Section("language", [instruction])
+
+def _build_system_prompt(text, recent_context, learned_prefs, detected_lang, language_name, should_display):
+    """Chat system prompt fitted to PROMPT_CHAT_TOKEN_BUDGET together with the user's message"""
+    preference_lines = []
+    learned_format_pref = learned_prefs.get('preferred_format', 'neutral')
+    learned_formality = learned_prefs.get('formality_level', 'neutral')
+    learned_length = learned_prefs.get('preferred_length', 'medium')
+    if learned_format_pref != 'neutral':
+        preference_lines.append(f"- Preferred format: {learned_format_pref}")
+    if learned_formality != 'neutral':
+        preference_lines.append(f"- Tone: {learned_formality}")
+    if learned_length != 'medium':
+        preference_lines.append(f"- Answer length: {learned_length}")
+
+    exchanges = [exchange.strip() for exchange in _EXCHANGE_RE.split(recent_context or "")]
+    sections = [
+        _language_section(text, detected_lang, language_name, should_display),
+        # Trimmed in this order when over budget: topics, then preferences, then oldest context
+        prompt_builder.Section("topics", learned_prefs.get('topics_of_interest', []), priority=1,
+                               header="Topics this user is interested in: ", separator=", "),
+        prompt_builder.Section("preferences", preference_lines, priority=2,
+                               header="What this user has preferred so far:\n"),
+        prompt_builder.Section("recent_context", exchanges, priority=3, trim=prompt_builder.TRIM_OLDEST,
+                               header="\nRecent conversation:\n"),
+    ]
+    prompt, _ = prompt_builder.assemble(
+        CHAT_PROMPT, sections, config.PROMPT_CHAT_TOKEN_BUDGET, "chat",
+        reserved_tokens=prompt_builder.count_tokens(text.strip())
+    )
+    return prompt
 
 def _build_vision_system_prompt(text, detected_lang, language_name, should_display):
-    if should_display and detected_lang != 'en':
-        return f"""... (rest of the large prompt f-string) ..."""
-    else:
-        mixed_lang = utils.detect_mixed_indian_language(text)
-        return f"""... (rest of the large prompt f-string) ...""" 
+    sections = [
+        _language_section(text, detected_lang, language_name, should_display),
+        prompt_builder.Section("question", [text.strip()], footer=""),
+    ]
+    prompt, _ = prompt_builder.assemble(VISION_PROMPT, sections, config.PROMPT_CHAT_TOKEN_BUDGET, "vision")
+    return prompt
@@ -0,0 +1,90 @@
+"""
+Bounded ingestion for uploaded images: the upload is read in chunks with an early
+size cutoff, then decoded, downsampled to IMAGE_MAX_EDGE and re-encoded without
+metadata on a small dedicated thread pool, so large phone photos never block the
+event loop and never reach the model at full resolution.
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+SUPPORTED_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+READ_CHUNK_SIZE = 64 * 1024
+
+class ImageTooLargeError(Exception):
+    """The upload exceeds MAX_FILE_SIZE"""
+
+class InvalidImageError(Exception):
+    """The upload is not a decodable image in a supported format"""
+
+# Decoding is CPU- and memory-heavy; a small pool bounds how many images are in flight
+_executor = ThreadPoolExecutor(max_workers=config.IMAGE_PROCESSING_WORKERS, thread_name_prefix="image")
+
+async def read_upload(upload, max_bytes):
+    """Read an UploadFile in chunks, giving up as soon as it grows past `max_bytes`"""
+    chunks = []
+    total = 0
+    while True:
+        chunk = await upload.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise ImageTooLargeError(f"Upload exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+def prepare_image(data, max_edge=None, jpeg_quality=None, max_pixels=None):
+    """
+    Decode, downsample and re-encode image bytes.
+    Returns a Gemini inline-data part: {"mime_type": ..., "data": ...}.
+    """
+    max_edge = max_edge or config.IMAGE_MAX_EDGE
+    jpeg_quality = jpeg_quality or config.IMAGE_JPEG_QUALITY
+    max_pixels = max_pixels or config.IMAGE_MAX_PIXELS
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise InvalidImageError(f"Could not decode image: {e}")
+
+    with image:
+        if image.format not in SUPPORTED_FORMATS:
+            raise InvalidImageError(f"Unsupported image format: {image.format}")
+        # Checked from the header alone, before any pixels are decoded
+        if image.width * image.height > max_pixels:
+            raise InvalidImageError(f"Image dimensions too large: {image.width}x{image.height}")
+
+        # JPEG only: let the decoder scale by 1/2, 1/4 or 1/8 instead of decoding every pixel
+        image.draft('RGB', (max_edge, max_edge))
+        try:
+            # Bake the EXIF orientation into the pixels, since the metadata is dropped below
+            processed = ImageOps.exif_transpose(image)
+            processed.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        except Exception as e:
+            raise InvalidImageError(f"Could not decode image: {e}")
+
+        # Re-encoding without passing exif/icc_profile strips all metadata
+        output = io.BytesIO()
+        if _has_alpha(processed):
+            processed.convert('RGBA').save(output, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        else:
+            processed.convert('RGB').save(output, format='JPEG', quality=jpeg_quality, optimize=True)
+            mime_type = 'image/jpeg'
+
+    return {"mime_type": mime_type, "data": output.getvalue()}
+
+async def prepare_upload(upload):
+    """Read an UploadFile with the size cutoff and prepare it off the event loop"""
+    data = await read_upload(upload, config.MAX_FILE_SIZE)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, prepare_image, data)
@@ -0,0 +1,189 @@
+import asyncio
+from pymongo.errors import BulkWriteError
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+class InteractionWriter:
+    """
+    Write-behind queue for chat interactions.
+    Requests enqueue a document and return immediately; a background task enriches
+    queued documents, persists them with insert_many and then runs learning on them.
+    `collection_getter` returns an asyncio collection; `after_insert` is a coroutine function.
+    """
+
+    def __init__(self, collection_getter, enrich=None, after_insert=None,
+                 max_queue_size=1000, batch_size=50, flush_interval=0.5, put_timeout=2.0):
+        self.collection_getter = collection_getter
+        self.enrich = enrich
+        self.after_insert = after_insert
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = None
+        self._task = None
+        self._pending_ids = set()
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.inline_writes = 0
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        print(f"✍️ Interaction writer started (queue={self.max_queue_size}, batch={self.batch_size})")
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task"""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print(f"✍️ Interaction writer stopped ({self.written} written, {self.failed} failed)")
+
+    async def submit(self, document):
+        """Queue one interaction document for persistence"""
+        await self.submit_many([document])
+
+    async def submit_many(self, documents):
+        """
+        Queue interaction documents as one unit so they land in the same insert_many.
+        Applies backpressure when the queue is full; if it stays full for `put_timeout`
+        (or the writer is not running) the documents are written inline instead of dropped.
+        """
+        if not documents:
+            return
+        if not self.running:
+            self.inline_writes += len(documents)
+            await self._flush(list(documents))
+            return
+
+        for document in documents:
+            self._pending_ids.add(document["_id"])
+        queued = False
+        try:
+            await asyncio.wait_for(self._queue.put(list(documents)), timeout=self.put_timeout)
+            queued = True
+            self.enqueued += len(documents)
+        except asyncio.TimeoutError:
+            print("⚠️ Interaction queue full, writing inline")
+            self.inline_writes += len(documents)
+            await self._flush(list(documents))
+        finally:
+            # Queued documents are released by the consumer once flushed; everything else is settled here
+            if not queued:
+                for document in documents:
+                    self._pending_ids.discard(document["_id"])
+
+    def is_pending(self, interaction_id):
+        return interaction_id in self._pending_ids
+
+    async def drain(self):
+        """Wait until everything queued so far has been persisted"""
+        if self.running:
+            await self._queue.join()
+
+    async def _run(self):
+        while True:
+            batches = [await self._queue.get()]
+            documents = list(batches[0])
+
+            # Collect more work until the batch is full or the flush interval elapses
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.flush_interval
+            while len(documents) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                batches.append(batch)
+                documents.extend(batch)
+
+            try:
+                await self._flush(documents)
+            except Exception as e:
+                print(f"⚠️ Interaction writer flush failed: {e}")
+            finally:
+                for document in documents:
+                    self._pending_ids.discard(document["_id"])
+                for _ in batches:
+                    self._queue.task_done()
+
+    def _enrich_all(self, documents):
+        for document in documents:
+            try:
+                self.enrich(document)
+            except Exception as e:
+                print(f"⚠️ Failed to enrich interaction {document.get('_id')}: {e}")
+
+    async def _flush(self, documents):
+        """Enrich, insert and learn from a batch"""
+        collection = self.collection_getter()
+        if collection is None:
+            self.failed += len(documents)
+            return
+
+        if self.enrich:
+            # Feature extraction is CPU work; keep it off the event loop
+            await asyncio.to_thread(self._enrich_all, documents)
+
+        try:
+            await collection.insert_many(documents, ordered=False)
+            self.written += len(documents)
+            print(f"💾 Stored {len(documents)} interaction(s)")
+        except BulkWriteError as e:
+            # With ordered=False the rest of the batch is still inserted; keep learning from those
+            failed_indexes = {error["index"] for error in e.details.get("writeErrors", [])}
+            documents = [d for i, d in enumerate(documents) if i not in failed_indexes]
+            self.written += len(documents)
+            self.failed += len(failed_indexes)
+            print(f"⚠️ Failed to store {len(failed_indexes)} interaction(s): {e}")
+        except Exception as e:
+            self.failed += len(documents)
+            print(f"⚠️ Failed to store interactions: {e}")
+            return
+
+        if self.after_insert:
+            try:
+                await self.after_insert(documents)
+            except Exception as e:
+                print(f"⚠️ Post-insert learning failed: {e}")
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued_batches": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "inline_writes": self.inline_writes
+        }
+
+def create_interaction_writer(collection_getter, enrich=None, after_insert=None):
+    """Build a writer configured from config.py"""
+    return InteractionWriter(
+        collection_getter,
+        enrich=enrich,
+        after_insert=after_insert,
+        max_queue_size=config.WRITE_BEHIND_QUEUE_SIZE,
+        batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+        flush_interval=config.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS,
+        put_timeout=config.WRITE_BEHIND_PUT_TIMEOUT_SECONDS
+    )
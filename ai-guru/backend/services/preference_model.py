@@ -0,0 +1,139 @@
+"""
+Incrementally maintained per-session preference model.
+Counters in `learned_patterns` are only ever $inc-ed, so learning is one atomic
+update_one and reading preferences needs no history scan. Keyword scores use
+forward decay (weight 2 ** ((t - landmark) / half_life)) so recent topics dominate.
+Each document stores the `decay_landmark` its scores are relative to; the landmark moves
+forward every REBASE_HALF_LIVES half-lives and the stored scores are rescaled with one
+$mul, so weights stay bounded instead of growing without limit from a fixed epoch.
+"""
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Counter family -> (preference name, default when nothing has been learned yet)
+COUNTER_PREFERENCES = {
+    'request_type': ('preferred_format', 'neutral'),
+    'formality_level': ('formality_level', 'neutral'),
+    'length_preference': ('preferred_length', 'medium'),
+}
+
+DECAY_EPOCH = 1704067200  # 2024-01-01 UTC; also the landmark of documents written before rebasing
+KEYWORD_HALF_LIFE_SECONDS = config.PREFERENCE_KEYWORD_HALF_LIFE_DAYS * 86400
+REBASE_HALF_LIVES = 32  # Weights stay below 2 ** 32 within one landmark period
+MAX_WEIGHT_EXPONENT = 2 * REBASE_HALF_LIVES  # Clamp for timestamps far ahead of their landmark
+MAX_TRACKED_KEYWORDS = config.PREFERENCE_MAX_TRACKED_KEYWORDS
+TOP_KEYWORDS = 10
+
+def decay_landmark(timestamp=None):
+    """Landmark in effect at `timestamp`: DECAY_EPOCH advanced by whole rebase periods"""
+    if timestamp is None:
+        timestamp = time.time()
+    period = REBASE_HALF_LIVES * KEYWORD_HALF_LIFE_SECONDS
+    return int(DECAY_EPOCH + max(0, (timestamp - DECAY_EPOCH) // period) * period)
+
+def keyword_weight(timestamp=None, landmark=None):
+    """Forward-decay weight of a keyword seen at `timestamp` (unix seconds), relative to `landmark`"""
+    if timestamp is None:
+        timestamp = time.time()
+    if landmark is None:
+        landmark = decay_landmark(timestamp)
+    return 2 ** min((timestamp - landmark) / KEYWORD_HALF_LIFE_SECONDS, MAX_WEIGHT_EXPONENT)
+
+def rescale_factor(from_landmark, to_landmark):
+    """Multiplier that re-expresses scores relative to `from_landmark` against `to_landmark`"""
+    return 2 ** min((from_landmark - to_landmark) / KEYWORD_HALF_LIFE_SECONDS, MAX_WEIGHT_EXPONENT)
+
+def stored_landmark(model):
+    return (model or {}).get("decay_landmark") or DECAY_EPOCH
+
+def build_rebase_update(model, landmark):
+    """$mul every stored keyword score onto `landmark` and record it"""
+    factor = rescale_factor(stored_landmark(model), landmark)
+    update = {"$set": {"decay_landmark": landmark}}
+    keyword_scores = (model or {}).get("keyword_scores") or {}
+    if keyword_scores:
+        update["$mul"] = {f"keyword_scores.{keyword}": factor for keyword in keyword_scores}
+    return update
+
+def rescale_increments(increments, factor):
+    """Keyword-score increments of an $inc document scaled by `factor`; counters are left alone"""
+    return {
+        path: amount * factor if path.startswith("keyword_scores.") else amount
+        for path, amount in increments.items()
+    }
+
+def build_interaction_increments(input_patterns, timestamp=None, landmark=None):
+    """$inc document for one analyzed interaction, keyword weights relative to `landmark`"""
+    increments = {"interaction_count": 1}
+    for field in COUNTER_PREFERENCES:
+        value = input_patterns.get(field)
+        if value:
+            increments[f"counters.{field}.{value}"] = 1
+
+    weight = keyword_weight(timestamp, landmark)
+    for keyword in input_patterns.get("keywords", []):
+        path = f"keyword_scores.{keyword}"
+        increments[path] = increments.get(path, 0) + weight
+    return increments
+
+def build_feedback_increments(feedback_type, interaction):
+    """$inc document that nudges the counters towards what the feedback asked for"""
+    weight = config.PREFERENCE_FEEDBACK_WEIGHT
+    increments = {"total_feedback_count": 1}
+
+    if feedback_type == "format_mismatch":
+        requested_format = interaction.get("input_patterns", {}).get("request_type")
+        if requested_format:
+            increments[f"counters.request_type.{requested_format}"] = weight
+    elif feedback_type == "too_long":
+        increments["counters.length_preference.short"] = weight
+    elif feedback_type == "too_short":
+        increments["counters.length_preference.detailed"] = weight
+    elif feedback_type == "thumbs_up":
+        # Reinforce the format that worked
+        format_type = interaction.get("response_format", {}).get("format_type")
+        if format_type:
+            increments[f"counters.request_type.{format_type}"] = weight
+
+    return increments
+
+def apply_increments(model, increments):
+    """Apply a $inc document to an in-memory model dict, mirroring what Mongo does"""
+    for path, amount in increments.items():
+        target = model
+        *parents, leaf = path.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = target.get(leaf, 0) + amount
+    return model
+
+def derive_preferences(model):
+    """O(1)-ish read: turn the stored counters into the user_preferences shape used by prompts"""
+    if not model:
+        return {}
+
+    counters = model.get("counters")
+    if counters is None:
+        # Documents written before the incremental model only have a snapshot
+        return model.get("user_preferences", {})
+
+    preferences = {}
+    for field, (preference, default) in COUNTER_PREFERENCES.items():
+        values = counters.get(field) or {}
+        preferences[preference] = max(values, key=values.get) if values else default
+
+    keyword_scores = model.get("keyword_scores") or {}
+    preferences["topics_of_interest"] = sorted(keyword_scores, key=keyword_scores.get, reverse=True)[:TOP_KEYWORDS]
+    preferences["successful_patterns"] = []
+    return preferences
+
+def keywords_to_prune(model):
+    """Lowest-scoring keywords beyond MAX_TRACKED_KEYWORDS, to keep the document bounded"""
+    keyword_scores = (model or {}).get("keyword_scores") or {}
+    if len(keyword_scores) <= MAX_TRACKED_KEYWORDS:
+        return []
+    ranked = sorted(keyword_scores, key=keyword_scores.get, reverse=True)
+    return ranked[MAX_TRACKED_KEYWORDS:]
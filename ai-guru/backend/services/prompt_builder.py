@@ -0,0 +1,174 @@
+"""
+Token-budgeted prompt assembly.
+Templates are compiled once into literal chunks and named slots. Each slot is filled by a
+Section; when the rendered prompt would exceed its budget, sections are trimmed from the
+lowest priority up (whole units first, then the last remaining unit by tokens) and the
+per-section token usage is logged so prompt bloat is visible.
+Token counts use tiktoken, which approximates Gemini's tokenizer closely enough for budgeting.
+"""
+import asyncio
+import string
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# Trim directions
+TRIM_OLDEST = "oldest"  # Drop leading units first (conversation history)
+TRIM_LAST = "last"  # Drop trailing units first (keyword lists, profile blocks in priority order)
+
+_encoding = None  # tiktoken encoding once loaded, False if it could not be
+_loading = False  # Set while the server loads the encoding at startup; prompts are estimated meanwhile
+
+def load_encoding():
+    """
+    Load the tiktoken encoding. The first load may download its BPE file (or read it from
+    TIKTOKEN_CACHE_DIR), so the server runs this in a thread at startup, never on a request.
+    """
+    global _encoding, _loading
+    try:
+        import tiktoken
+        _encoding = tiktoken.get_encoding(config.PROMPT_TOKENIZER_ENCODING)
+    except Exception as e:
+        # Offline workers without a cached BPE file fall back to an estimate
+        print(f"⚠️ tiktoken encoding unavailable, estimating prompt tokens from length: {e}")
+        _encoding = False
+    finally:
+        _loading = False
+    return _encoding
+
+def start_loading():
+    """Begin loading the encoding in a worker thread; returns the task"""
+    global _loading
+    _loading = True
+    return asyncio.create_task(asyncio.to_thread(load_encoding))
+
+def _get_encoding():
+    if _encoding is None and not _loading:
+        # Scripts and tests that never start the server load lazily
+        load_encoding()
+    return _encoding or False
+
+def count_tokens(text):
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text, max_tokens, keep_end=False):
+    """Cut `text` to at most `max_tokens`, keeping its start (or its end)"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        kept = tokens[-max_tokens:] if keep_end else tokens[:max_tokens]
+        return encoding.decode(kept)
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[-max_chars:] if keep_end else text[:max_chars]
+
+class PromptTemplate:
+    """str.format-style template split once into (literal, slot) pairs; literal tokens are counted once"""
+
+    def __init__(self, template):
+        self.parts = [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+        self.slots = [field for _, field in self.parts if field]
+        self._literal_tokens = None
+
+    @property
+    def literal_tokens(self):
+        if self._literal_tokens is not None:
+            return self._literal_tokens
+        tokens = count_tokens("".join(literal for literal, _ in self.parts))
+        if _encoding is not None:
+            # Not cached while the encoding is still loading, so the estimate is not kept
+            self._literal_tokens = tokens
+        return tokens
+
+    def render(self, values):
+        return "".join(literal + (values.get(field, "") if field else "") for literal, field in self.parts)
+
+class Section:
+    """
+    Content for one template slot, made of units joined by `separator` after an optional header.
+    `priority` None means the section is never trimmed; otherwise lower priorities are trimmed first.
+    A section whose units are all trimmed renders as an empty string, header included.
+    """
+
+    def __init__(self, name, units, priority=None, header="", separator="\n", footer="\n", trim=TRIM_LAST):
+        self.name = name
+        self.units = [unit for unit in units if unit]
+        self.priority = priority
+        self.header = header
+        self.separator = separator
+        self.footer = footer
+        self.trim = trim
+
+    def render(self):
+        if not self.units:
+            return ""
+        return self.header + self.separator.join(self.units) + self.footer
+
+    def shrink(self, excess):
+        """Drop or cut units until roughly `excess` tokens are freed"""
+        while excess > 0 and self.units:
+            index = 0 if self.trim == TRIM_OLDEST else -1
+            unit_tokens = count_tokens(self.units[index])
+            if unit_tokens > excess and len(self.units) == 1:
+                # Last unit standing: keep what fits rather than losing it entirely
+                self.units[index] = truncate_tokens(self.units[index], unit_tokens - excess, keep_end=self.trim == TRIM_OLDEST)
+                if not self.units[index]:
+                    self.units.pop(index)
+                return
+            self.units.pop(index)
+            excess -= unit_tokens
+
+def assemble(template, sections, budget, label, reserved_tokens=0):
+    """
+    Render `template` with `sections`, trimming them to fit `budget` tokens.
+    `reserved_tokens` accounts for text appended outside the template (e.g. the user's message).
+    Returns (prompt, usage) where usage has the total, the budget, tokens per section and what was trimmed.
+    """
+    # A slot may appear more than once in a template (e.g. the career name)
+    occurrences = {section.name: max(template.slots.count(section.name), 1) for section in sections}
+    tokens = {section.name: count_tokens(section.render()) * occurrences[section.name] for section in sections}
+    total = template.literal_tokens + reserved_tokens + sum(tokens.values())
+    trimmed = []
+
+    for section in sorted((s for s in sections if s.priority is not None), key=lambda s: s.priority):
+        if total <= budget:
+            break
+        section.shrink(-(-(total - budget) // occurrences[section.name]))
+        new_tokens = count_tokens(section.render()) * occurrences[section.name]
+        total -= tokens[section.name] - new_tokens
+        tokens[section.name] = new_tokens
+        trimmed.append(section.name)
+
+    prompt = template.render({section.name: section.render() for section in sections})
+    usage = {
+        "total": total,
+        "budget": budget,
+        "template": template.literal_tokens,
+        "reserved": reserved_tokens,
+        "sections": tokens,
+        "trimmed": trimmed
+    }
+    if config.PROMPT_LOG_TOKEN_USAGE or total > budget:
+        _log_usage(label, usage)
+    return prompt, usage
+
+def _log_usage(label, usage):
+    breakdown = ", ".join(f"{name}={count}" for name, count in usage["sections"].items())
+    line = (f"🧮 Prompt '{label}': {usage['total']}/{usage['budget']} tokens "
+            f"(template={usage['template']}, reserved={usage['reserved']}, {breakdown})")
+    if usage["trimmed"]:
+        line += f" trimmed: {', '.join(usage['trimmed'])}"
+    if usage["total"] > usage["budget"]:
+        line = "⚠️ " + line + " - over budget after trimming"
+    print(line)
@@ -0,0 +1,48 @@
+import hashlib
+import json
+import re
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import repositories
+from cache import TTLCache, AsyncPersistentCache
+
+# Learned preferences that change how an answer is formatted, and therefore belong in the key
+FORMATTING_PREFERENCE_KEYS = ('preferred_format', 'preferred_length', 'formality_level')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION_RE = re.compile(r'[\s?!.,;:]+$')
+
+_chat_cache = AsyncPersistentCache(
+    TTLCache(max_size=config.CHAT_CACHE_MAX_ENTRIES, ttl=config.CHAT_CACHE_TTL_SECONDS),
+    collection_getter=(lambda: repositories.response_cache.collection) if config.CHAT_CACHE_USE_MONGO else None
+)
+
+def normalize_message(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation so trivial variants share a key"""
+    text = _WHITESPACE_RE.sub(' ', text.strip().lower())
+    return _TRAILING_PUNCTUATION_RE.sub('', text)
+
+def should_use_cache(recent_context):
+    """Sessions with live conversation context get fresh answers unless configured otherwise"""
+    if not config.CHAT_CACHE_ENABLED:
+        return False
+    return not (recent_context and config.CHAT_CACHE_SKIP_WITH_CONTEXT)
+
+def build_cache_key(text, detected_lang, learned_prefs, recent_context):
+    """Key on normalized prompt, language, formatting preferences and a digest of the context"""
+    formatting_prefs = {k: learned_prefs.get(k) for k in FORMATTING_PREFERENCE_KEYS if learned_prefs and k in learned_prefs}
+    context_digest = hashlib.sha256(recent_context.encode('utf-8')).hexdigest() if recent_context else ''
+    key_material = json.dumps([normalize_message(text), detected_lang, formatting_prefs, context_digest], sort_keys=True)
+    return "chat:" + hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+async def get_cached_response(key):
+    return await _chat_cache.get(key)
+
+async def cache_response(key, bot_response):
+    if bot_response:
+        await _chat_cache.set(key, bot_response)
+
+def get_cache_stats():
+    return _chat_cache.stats()
@@ -0,0 +1,105 @@
+"""
+Per-worker cache of each session's recent exchanges and preference model, so a continuing
+session needs no Mongo reads. Entries expire after SESSION_CACHE_TTL_SECONDS without use.
+
+Assumes one worker serves a session: turns handled by another uvicorn worker are not seen
+here, so with several workers each one can build context from its own stale exchanges until
+the entry goes idle. Run a single worker per instance (scale out with sticky sessions), or
+lower SESSION_CACHE_TTL_SECONDS.
+"""
+import threading
+from collections import deque
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from cache import TTLCache
+import services.preference_model as preference_model
+
+class SessionState:
+    """Recent exchanges and the preference model of one session; None means "not loaded yet" """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.exchanges = None  # deque of (user_input, bot_response), oldest first
+        self.model = None  # learned_patterns counters, see preference_model
+
+# State is mutated in place and never re-set, so the TTL must slide on access to mean "idle for"
+_sessions = TTLCache(max_size=config.SESSION_CACHE_MAX_SESSIONS, ttl=config.SESSION_CACHE_TTL_SECONDS, sliding=True)
+
+def _get_or_create(session_id):
+    state = _sessions.get(session_id)
+    if state is None:
+        state = SessionState()
+        _sessions.set(session_id, state)
+    return state
+
+def get_exchanges(session_id):
+    """Cached recent exchanges (oldest first), or None on a miss"""
+    state = _sessions.get(session_id)
+    if state is None:
+        return None
+    with state.lock:
+        return list(state.exchanges) if state.exchanges is not None else None
+
+def set_exchanges(session_id, exchanges):
+    """Seed the cache from Mongo after a miss"""
+    state = _get_or_create(session_id)
+    with state.lock:
+        state.exchanges = deque(exchanges, maxlen=config.SESSION_CACHE_MAX_EXCHANGES)
+
+def get_preferences(session_id):
+    """Derived preferences from the cached model, or None on a miss"""
+    state = _sessions.get(session_id)
+    if state is None:
+        return None
+    with state.lock:
+        return preference_model.derive_preferences(state.model) if state.model is not None else None
+
+def set_model(session_id, model):
+    state = _get_or_create(session_id)
+    with state.lock:
+        state.model = model or {}
+
+def record_exchange(session_id, user_input, bot_response, new_session=False):
+    """
+    Write-through on store_interaction. Brand-new sessions are created here; existing
+    sessions are only updated if already cached, since a partial history would be wrong.
+    """
+    state = _get_or_create(session_id) if new_session else _sessions.get(session_id)
+    if state is None:
+        return
+    with state.lock:
+        if state.exchanges is None:
+            if not new_session:
+                return
+            state.exchanges = deque(maxlen=config.SESSION_CACHE_MAX_EXCHANGES)
+        state.exchanges.append((user_input, bot_response))
+        if new_session and state.model is None:
+            state.model = {}
+
+def record_increments(session_id, increments, landmark=None):
+    """Mirror a learned_patterns $inc (keyword weights relative to `landmark`) into the cached model"""
+    state = _sessions.get(session_id)
+    if state is None:
+        return
+    with state.lock:
+        if state.model is None:
+            return
+        if landmark is not None:
+            if state.model.get("keyword_scores") and preference_model.stored_landmark(state.model) != landmark:
+                # The stored scores were rebased since this copy was loaded; reload it on next use
+                state.model = None
+                return
+            state.model["decay_landmark"] = landmark
+        preference_model.apply_increments(state.model, increments)
+
+def invalidate(session_id=None):
+    """Drop one session, or every session when no id is given"""
+    if session_id is None:
+        _sessions.clear()
+    else:
+        _sessions.delete(session_id)
+
+def get_cache_stats():
+    return _sessions.stats()
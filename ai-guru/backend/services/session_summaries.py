@@ -0,0 +1,131 @@
+"""
+Incrementally maintained `sessions` collection: one small document per chat session
+(_id = session_id) with latest_timestamp, message_count and session_title, so the
+sidebar listing is an indexed range read instead of a $group over all of chat_history.
+"""
+from pymongo import UpdateOne, ReplaceOne
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import repositories
+
+TITLE_LENGTH = 50
+
+def session_title(first_message):
+    """Sidebar title: the first message, truncated"""
+    first_message = first_message or ''
+    return first_message[:TITLE_LENGTH] + "..." if len(first_message) > TITLE_LENGTH else first_message
+
+def _collection():
+    # The latest_timestamp index is created by database.ensure_indexes()
+    return repositories.sessions.collection
+
+def build_session_updates(documents):
+    """One upsert per session for a batch of freshly stored interactions"""
+    sessions = {}
+    for document in documents:
+        session_id = document.get("session_id")
+        if not session_id:
+            continue
+        summary = sessions.get(session_id)
+        if summary is None:
+            sessions[session_id] = summary = {"count": 0, "first": document, "latest": document["timestamp"]}
+        summary["count"] += 1
+        if document["timestamp"] < summary["first"]["timestamp"]:
+            summary["first"] = document
+        summary["latest"] = max(summary["latest"], document["timestamp"])
+
+    return [
+        UpdateOne(
+            {"_id": session_id},
+            {
+                "$inc": {"message_count": summary["count"]},
+                "$max": {"latest_timestamp": summary["latest"]},
+                "$min": {"first_timestamp": summary["first"]["timestamp"]},
+                # The session's first batch names it; later batches leave the title alone
+                "$setOnInsert": {"session_title": session_title(summary["first"].get("user_input"))}
+            },
+            upsert=True
+        )
+        for session_id, summary in sessions.items()
+    ]
+
+async def record_interactions(documents):
+    """
+    Fold a persisted batch of interactions into the sessions collection with one bulk_write.
+    Returns how many sessions were new.
+    """
+    collection = _collection()
+    if collection is None:
+        return 0
+    updates = build_session_updates(documents)
+    if not updates:
+        return 0
+    return (await collection.bulk_write(updates, ordered=False)).upserted_count
+
+def summary_pipeline(session_ids=None):
+    """Aggregation over chat_history producing one summary per session"""
+    match = {"session_id": {"$exists": True, "$ne": None}}
+    if session_ids is not None:
+        match["session_id"] = {"$in": list(session_ids)}
+    return [
+        {"$match": match},
+        {"$project": {"session_id": 1, "timestamp": 1, "user_input": 1}},
+        {"$sort": {"session_id": 1, "timestamp": 1}},
+        {"$group": {
+            "_id": "$session_id",
+            "first_timestamp": {"$first": "$timestamp"},
+            "latest_timestamp": {"$max": "$timestamp"},
+            "message_count": {"$sum": 1},
+            "first_message": {"$first": "$user_input"}
+        }}
+    ]
+
+def summary_replacement(summary):
+    return ReplaceOne(
+        {"_id": summary["_id"]},
+        {
+            "first_timestamp": summary["first_timestamp"],
+            "latest_timestamp": summary["latest_timestamp"],
+            "message_count": summary["message_count"],
+            "session_title": session_title(summary["first_message"])
+        },
+        upsert=True
+    )
+
+def summarize_history(chat_collection, session_ids=None):
+    """Rebuild summaries from a (sync) chat_history collection with one aggregation; yields ReplaceOne operations"""
+    for summary in chat_collection.aggregate(summary_pipeline(session_ids), allowDiskUse=True):
+        yield summary_replacement(summary)
+
+async def refresh_session(session_id):
+    """
+    Recompute one session after some of its messages were deleted.
+    Returns False if the session has no messages left (its summary is removed).
+    """
+    collection = _collection()
+    if collection is None:
+        return True
+    summaries = await repositories.chat_history.aggregate(summary_pipeline([session_id]))
+    if summaries:
+        await collection.bulk_write([summary_replacement(summary) for summary in summaries])
+        return True
+    await collection.delete_one({"_id": session_id})
+    return False
+
+async def delete_session(session_id=None):
+    """Drop one summary, or all of them when no id is given"""
+    collection = _collection()
+    if collection is None:
+        return
+    if session_id is None:
+        await collection.delete_many({})
+    else:
+        await collection.delete_one({"_id": session_id})
+
+async def list_sessions(filter_query, limit):
+    """Most recent sessions first, read straight off the latest_timestamp index"""
+    collection = _collection()
+    if collection is None:
+        return []
+    return await collection.find(filter_query).sort([("latest_timestamp", -1), ("_id", -1)]).limit(limit).to_list(length=limit)
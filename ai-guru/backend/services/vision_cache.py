@@ -0,0 +1,35 @@
+import hashlib
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import repositories
+from cache import TTLCache, AsyncPersistentCache
+from services.response_cache import normalize_message
+
+_vision_cache = AsyncPersistentCache(
+    TTLCache(max_size=config.VISION_CACHE_MAX_ENTRIES, ttl=config.VISION_CACHE_TTL_SECONDS),
+    collection_getter=(lambda: repositories.vision_cache.collection) if config.VISION_CACHE_USE_MONGO else None
+)
+
+def build_cache_key(image_part, text, detected_lang):
+    """
+    Content address of a vision request. Hashes the image after image_pipeline has
+    downscaled and re-encoded it, so re-uploads of the same file (with any metadata) share a key.
+    """
+    image_digest = hashlib.sha256(image_part["data"]).hexdigest()
+    key_material = json.dumps([image_digest, normalize_message(text), detected_lang])
+    return "vision:" + hashlib.sha256(key_material.encode('utf-8')).hexdigest()
+
+async def get_cached_response(key):
+    if not config.VISION_CACHE_ENABLED:
+        return None
+    return await _vision_cache.get(key)
+
+async def cache_response(key, bot_response):
+    if config.VISION_CACHE_ENABLED and bot_response:
+        await _vision_cache.set(key, bot_response)
+
+def get_cache_stats():
+    return _vision_cache.stats()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Backend modules import each other as top-level modules (e.g. `import config`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py refuses to load without an API key; tests never call Gemini
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime
+from pymongo import UpdateOne
+import services.analytics_rollups as analytics_rollups
+
+def test_interaction_batch_becomes_totals_plus_daily_buckets():
+    documents = [
+        {"bot_response": "abc", "timestamp": datetime(2025, 1, 1, 23, 59)},
+        {"bot_response": "de", "timestamp": datetime(2025, 1, 2, 0, 1)},
+        {"bot_response": None, "timestamp": datetime(2025, 1, 2, 8, 0)},
+    ]
+    assert analytics_rollups.build_interaction_updates(documents, new_sessions=2) == [
+        UpdateOne({"_id": "totals"}, {"$inc": {"interactions": 3, "response_chars": 5, "sessions": 2}}, upsert=True),
+        UpdateOne({"_id": "day:2025-01-01"}, {"$inc": {"interactions": 1, "response_chars": 3}}, upsert=True),
+        UpdateOne({"_id": "day:2025-01-02"}, {"$inc": {"interactions": 2, "response_chars": 2}}, upsert=True),
+    ]
+
+def test_sessions_counter_only_moves_for_new_sessions():
+    updates = analytics_rollups.build_interaction_updates([{"bot_response": "x", "timestamp": datetime(2025, 1, 1)}])
+    assert "sessions" not in updates[0]._doc["$inc"]
+
+def test_feedback_counts_per_type_and_day():
+    assert analytics_rollups.build_feedback_updates("thumbs_up", datetime(2025, 3, 4, 12)) == [
+        UpdateOne({"_id": "totals"}, {"$inc": {"feedback": 1, "feedback_by_type.thumbs_up": 1}}, upsert=True),
+        UpdateOne({"_id": "day:2025-03-04"}, {"$inc": {"feedback": 1}}, upsert=True),
+    ]
+
+def test_deleted_session_subtracts_live_and_archived_interactions():
+    live_days = [{"_id": "2025-03-04", "interactions": 2, "response_chars": 10}]
+    archived = [{"_id": "a", "bot_response": "abcd", "timestamp": datetime(2025, 1, 2, 9)},
+                {"_id": "b", "bot_response": "xy", "timestamp": datetime(2025, 3, 4, 10)}]
+    assert analytics_rollups.build_session_deleted_updates(live_days, archived) == [
+        UpdateOne({"_id": "totals"}, {"$inc": {"interactions": -4, "response_chars": -16, "sessions": -1}}),
+        UpdateOne({"_id": "day:2025-03-04"}, {"$inc": {"interactions": -3, "response_chars": -12}}),
+        UpdateOne({"_id": "day:2025-01-02"}, {"$inc": {"interactions": -1, "response_chars": -4}}),
+    ]
+    assert analytics_rollups.build_session_deleted_updates([], []) == []
+
+def test_cached_responses_are_reused_until_invalidated():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    cached = lambda: asyncio.run(analytics_rollups.cached("test", compute))
+    analytics_rollups.invalidate()
+    assert cached() == {"value": 1}
+    assert cached() == {"value": 1}
+    analytics_rollups.invalidate()
+    assert cached() == {"value": 2}
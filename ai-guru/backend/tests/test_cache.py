@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+from cache import TTLCache, AsyncPersistentCache
+
+def test_lru_eviction_keeps_most_recently_used():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+def test_sliding_ttl_restarts_on_access():
+    cache = TTLCache(max_size=10, ttl=0.05, sliding=True)
+    cache.set("a", 1)
+    for _ in range(4):
+        time.sleep(0.02)
+        assert cache.get("a") == 1  # Used within the TTL each time; 0.08s after set in total
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+def test_stats_track_hits_and_misses():
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+class AsyncCollection:
+    """Just enough of an asyncio collection for AsyncPersistentCache"""
+    def __init__(self):
+        self.documents = {}
+        self.indexes = []
+
+    async def create_index(self, key, **options):
+        self.indexes.append(key)
+
+    async def find_one(self, query):
+        return self.documents.get(query["_id"])
+
+    async def replace_one(self, query, document, upsert=False):
+        self.documents[query["_id"]] = document
+
+def test_async_persistent_cache_falls_back_to_collection():
+    collection = AsyncCollection()
+    shared = AsyncPersistentCache(TTLCache(max_size=10, ttl=60), collection_getter=lambda: collection)
+    other_worker = AsyncPersistentCache(TTLCache(max_size=10, ttl=60), collection_getter=lambda: collection)
+
+    async def run():
+        await shared.set("q", "answer")
+        return await other_worker.get("q"), await other_worker.get("missing")
+
+    assert asyncio.run(run()) == ("answer", None)
+    assert other_worker.persistent_hits == 1
+    assert other_worker.persistent_misses == 1
+    assert other_worker.memory.get("q") == "answer"
+    assert collection.indexes == ["expires_at", "expires_at"]  # once per cache instance
+
+def test_chat_cache_key_ignores_trivial_variants():
+    import services.response_cache as response_cache
+
+    prefs = {"preferred_format": "paragraph", "topics_of_interest": ["python"]}
+    key = response_cache.build_cache_key("What is machine learning?", "en", prefs, "")
+
+    assert key == response_cache.build_cache_key("  what is   MACHINE learning ", "en", prefs, "")
+    assert key != response_cache.build_cache_key("What is machine learning?", "hi", prefs, "")
+    assert key != response_cache.build_cache_key("What is machine learning?", "en", {"preferred_format": "structured"}, "")
+    assert key != response_cache.build_cache_key("What is machine learning?", "en", prefs, "User: hi\nAI: hello")
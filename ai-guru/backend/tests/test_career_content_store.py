@@ -0,0 +1,76 @@
+import threading
+import time
+import pytest
+from cache import PersistentCache, SingleFlight, TTLCache
+import services.career_content_store as career_content_store
+import services.career_gps_service as career_gps_service
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+
+    assert results == ["value"] * 6
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "executions": 1, "coalesced": 5}
+
+@pytest.fixture
+def memory_only_store(monkeypatch):
+    """A fresh in-process store so tests neither wait for nor write to MongoDB"""
+    monkeypatch.setattr(career_content_store, "_store", PersistentCache(TTLCache(max_size=16, ttl=60), collection_getter=None))
+    monkeypatch.setattr(career_content_store, "_generations", SingleFlight())
+
+def test_career_names_are_normalized():
+    assert career_content_store.normalize_career_name(" Data-Scientist ") == "data scientist"
+    assert career_content_store.content_key("roadmap", "C++  Developer") == "roadmap:c++ developer"
+
+def test_roadmap_is_generated_once_and_progress_is_per_user(monkeypatch, memory_only_store):
+    calls = []
+
+    def fake_generate(career_name):
+        calls.append(career_name)
+        return {"career": career_name, "milestones": [{"title": str(i)} for i in range(5)]}, False
+
+    monkeypatch.setattr(career_gps_service, "_generate_base_roadmap", fake_generate)
+    first = career_gps_service.get_career_roadmap("Store Test Career", 50)
+    second = career_gps_service.get_career_roadmap("store test  career", 0)
+
+    assert len(calls) == 1
+    assert [m["status"] for m in first["milestones"]] == ["completed", "completed", "current", "upcoming", "upcoming"]
+    assert [m["status"] for m in second["milestones"]][0] == "current"
+    assert second["career"] == "store test  career"
+
+def test_fallback_content_is_not_stored(monkeypatch, memory_only_store):
+    monkeypatch.setattr(career_gps_service, "_generate_base_roadmap",
+                        lambda name: (career_gps_service.generate_default_roadmap(name), True))
+    career_gps_service.get_career_roadmap("Fallback Store Career", 0)
+    assert not career_content_store.is_stored(career_content_store.ROADMAP, "Fallback Store Career")
+
+def test_learning_path_overlay_sets_aside_known_skills():
+    base = {"phases": [
+        {"phase_number": 1, "skills_to_learn": ["Python", "SQL"]},
+        {"phase_number": 2, "skills_to_learn": ["Statistics"]},
+    ]}
+    profile = {"skills": ["python", "sql"], "basic_info": {"learning_style": "visual"}}
+    path = career_gps_service.personalize_learning_path(base, "Data Analyst", profile, 82)
+
+    assert path["phases"][0]["skills_already_have"] == ["Python", "SQL"]
+    assert path["phases"][0]["skills_to_learn"] == []
+    assert path["match_percentage"] == 82
+    assert path["personalization"] == {"learning_style": "visual", "existing_skills_matched": 2, "recommended_start_phase": 2}
@@ -0,0 +1,35 @@
+import services.career_gps_service as career_gps_service
+
+def fingerprint(interests, skills, goal="", motivation="", learning_style="", profile_context=""):
+    return career_gps_service.profile_fingerprint(interests, skills, goal, motivation, learning_style, profile_context)
+
+def test_equivalent_submissions_share_a_fingerprint():
+    assert fingerprint(["Coding", "Art"], ["Python"], "Build  apps") == fingerprint(["art", "coding", "CODING"], ["python"], "build apps")
+
+def test_fingerprint_changes_with_answers_and_profile():
+    base = fingerprint(["coding"], ["python"], "build apps")
+    assert base != fingerprint(["coding"], ["python"], "teach")
+    assert base != fingerprint(["coding"], ["python", "sql"], "build apps")
+    assert base != fingerprint(["coding"], ["python"], "build apps", profile_context="Education History (1 entries)")
+
+def test_repeat_submissions_are_served_from_cache(monkeypatch):
+    calls = []
+
+    def fake_generate(*args):
+        calls.append(args)
+        return [{"name": "Data Analyst", "match": 80}], False
+
+    monkeypatch.setattr(career_gps_service, "_generate_career_recommendations", fake_generate)
+    first, status = career_gps_service.get_career_recommendations(["Cache Test"], ["sql"], "analyze", "", "")
+    assert status == "miss"
+    first[0]["name"] = "mutated by caller"
+
+    second, status = career_gps_service.get_career_recommendations(["cache test"], ["SQL"], "analyze", "", "")
+    assert status == "hit"
+    assert second == [{"name": "Data Analyst", "match": 80}]
+    assert len(calls) == 1
+
+def test_fallback_results_are_not_cached(monkeypatch):
+    monkeypatch.setattr(career_gps_service, "_generate_career_recommendations", lambda *args: ([{"name": "Default"}], True))
+    assert career_gps_service.get_career_recommendations(["fallback test"], [], "", "", "")[1] == "fallback"
+    assert career_gps_service.get_career_recommendations(["fallback test"], [], "", "", "")[1] == "fallback"
@@ -0,0 +1,88 @@
+import gzip
+import os
+from datetime import datetime
+from bson import ObjectId
+import pytest
+import services.chat_archive as chat_archive
+
+def interaction(session_id, timestamp, **fields):
+    return {"_id": str(ObjectId()), "session_id": session_id, "user_input": "hi", "bot_response": "hello",
+            "timestamp": timestamp, **fields}
+
+def test_archive_files_round_trip_one_session(tmp_path):
+    documents = [
+        interaction("a", datetime(2025, 1, 2, 9, 30), input_patterns={"topic": "python"}),
+        interaction("b", datetime(2025, 1, 3, 12, 0)),
+        interaction("a", datetime(2025, 1, 1, 8, 15, 0, 123000), user_feedback={"feedback_type": "thumbs_up"}),
+    ]
+    relative_path = chat_archive.write_part(str(tmp_path), "2025-01", "part-test-00000", documents, compression="gzip")
+
+    assert relative_path == os.path.join("2025-01", "part-test-00000.jsonl.gz")
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path / "2025-01"))
+    with gzip.open(tmp_path / relative_path, "rt", encoding="utf-8") as handle:
+        assert len(handle.readlines()) == 3
+
+    restored = chat_archive.read_session(str(tmp_path), [relative_path, "2024-12/missing.jsonl.gz"], "a")
+    assert restored == [documents[2], documents[0]]  # oldest first, datetimes intact
+    assert isinstance(restored[0]["timestamp"], datetime)
+
+def test_unknown_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        chat_archive.write_part(str(tmp_path), "2025-01", "part", [], compression="lz4")
+
+def test_rehydrated_interactions_expire_by_rehydration_time():
+    cutoff = datetime(2025, 6, 1)
+    query = chat_archive.expired_filter(cutoff)
+
+    def expired(document):
+        return any(all(_matches(document, field, condition) for field, condition in branch.items())
+                   for branch in query["$or"])
+
+    assert expired(interaction("a", datetime(2025, 1, 1)))
+    assert not expired(interaction("a", datetime(2025, 7, 1)))
+    assert not expired(interaction("a", datetime(2025, 1, 1), rehydrated_at=datetime(2025, 6, 15)))
+    assert expired(interaction("a", datetime(2025, 1, 1), rehydrated_at=datetime(2025, 5, 1)))
+    assert chat_archive.month_partition(datetime(2025, 1, 31, 23, 59)) == "2025-01"
+
+def test_zero_day_retention_archives_nothing():
+    assert chat_archive.archive_expired(days=0) == {"evicted": 0, "written": 0, "files": 0}
+
+def _matches(document, field, condition):
+    if "$exists" in condition:
+        return (field in document) == condition["$exists"]
+    return field in document and document[field] < condition["$lt"]
+
+def test_purge_rewrites_shared_files_and_deletes_emptied_ones(tmp_path):
+    shared = [interaction("a", datetime(2025, 1, 2)), interaction("b", datetime(2025, 1, 3))]
+    only_a = [interaction("a", datetime(2025, 2, 1))]
+    paths = [chat_archive.write_part(str(tmp_path), "2025-01", "part-1", shared, compression="gzip"),
+             chat_archive.write_part(str(tmp_path), "2025-02", "part-2", only_a, compression="gzip")]
+
+    removed, emptied = chat_archive.purge_session(str(tmp_path), paths, "a")
+
+    assert (removed, emptied) == ([shared[0], only_a[0]], [paths[1]])
+    assert not (tmp_path / paths[1]).exists()
+    assert chat_archive.read_session(str(tmp_path), paths, "a") == []
+    assert chat_archive.read_session(str(tmp_path), paths, "b") == [shared[1]]
+    assert chat_archive.archive_files(str(tmp_path)) == [paths[0]]
+
+def test_purge_of_one_interaction_keeps_the_rest_of_the_session(tmp_path):
+    documents = [interaction("a", datetime(2025, 1, 2)), interaction("a", datetime(2025, 1, 3))]
+    path = chat_archive.write_part(str(tmp_path), "2025-01", "part-1", documents, compression="gzip")
+    assert chat_archive.purge_session(str(tmp_path), [path], "a", documents[0]["_id"]) == ([documents[0]], [])
+    assert chat_archive.read_session(str(tmp_path), [path], "a") == [documents[1]]
+
+def test_purge_all_removes_every_archive_file(tmp_path):
+    chat_archive.write_part(str(tmp_path), "2025-01", "part-1", [interaction("a", datetime(2025, 1, 2))], compression="gzip")
+    (tmp_path / "notes.txt").write_text("kept")
+    assert chat_archive.purge_all(str(tmp_path)) == 1
+    assert chat_archive.archive_files(str(tmp_path)) == []
+    assert (tmp_path / "notes.txt").exists()
+
+def test_re_archived_edit_wins_over_the_older_copy(tmp_path):
+    original = interaction("a", datetime(2025, 1, 2))
+    edited = {**original, "user_feedback": {"feedback_type": "thumbs_up"}}
+    paths = [chat_archive.write_part(str(tmp_path), "2025-01", "part-1", [original], compression="gzip"),
+             chat_archive.write_part(str(tmp_path), "2025-01", "part-2", [edited], compression="gzip")]
+    assert chat_archive.read_session(str(tmp_path), paths, "a") == [edited]
+    assert chat_archive.purge_session(str(tmp_path), paths, "a") == ([edited], paths)
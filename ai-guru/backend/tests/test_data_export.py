@@ -0,0 +1,61 @@
+import asyncio
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+import pytest
+from fastapi import HTTPException
+import services.data_export as data_export
+
+class FakeCursor:
+    """Async-iterable stand-in for a Mongo cursor"""
+    def __init__(self, documents):
+        self.documents = documents
+        self.closed = False
+
+    async def __aiter__(self):
+        for document in self.documents:
+            yield document
+
+    async def close(self):
+        self.closed = True
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+def test_filter_combines_session_and_half_open_range():
+    start = datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+    assert data_export.build_filter("timestamp", "s1", start, datetime(2025, 2, 1)) == {
+        "session_id": "s1",
+        "timestamp": {"$gte": datetime(2024, 12, 31, 18, 30), "$lt": datetime(2025, 2, 1)}
+    }
+    assert data_export.build_filter("feedback_timestamp") == {}
+    with pytest.raises(HTTPException) as error:
+        data_export.build_filter("timestamp", start=datetime(2025, 2, 1), end=datetime(2025, 1, 1))
+    assert error.value.status_code == 400
+
+def test_lines_are_chunked_and_cursor_closed():
+    documents = [{"_id": ObjectId(), "session_id": "s1", "user_input": "नमस्ते " * 10, "timestamp": datetime(2025, 1, 1, 12, i)}
+                 for i in range(50)]
+    cursor = FakeCursor(documents)
+    chunks = asyncio.run(collect(data_export.ndjson_lines(cursor, chunk_bytes=1024)))
+
+    assert len(chunks) > 1 and all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert len(lines) == 50
+    first = json.loads(lines[0])
+    assert first["_id"] == str(documents[0]["_id"])
+    assert first["timestamp"] == "2025-01-01T12:00:00"
+    assert cursor.closed
+
+def test_gzip_stream_decompresses_to_the_same_ndjson():
+    documents = [{"_id": str(i), "bot_response": "answer " * 200} for i in range(100)]
+
+    async def run():
+        plain = b"".join(await collect(data_export.ndjson_lines(FakeCursor(documents))))
+        compressed = b"".join(await collect(data_export.gzip_chunks(data_export.ndjson_lines(FakeCursor(documents)))))
+        return plain, compressed
+
+    plain, compressed = asyncio.run(run())
+    assert gzip.decompress(compressed) == plain
+    assert len(compressed) < len(plain) / 10
@@ -0,0 +1,84 @@
+import time
+from types import SimpleNamespace
+import pytest
+from pymongo.errors import ServerSelectionTimeoutError
+import database
+
+class FlakyClient:
+    """Stands in for MongoClient; `up` decides whether ping succeeds"""
+    def __init__(self):
+        self.up = False
+        self.pings = 0
+        self.admin = SimpleNamespace(command=self._command)
+
+    def __getitem__(self, database_name):
+        # Databases and collections are looked up by name; collections are stood in for by their names
+        return {name: name for name in (
+            "chat_history", "learned_patterns", "user_feedback", "sessions", "analytics_rollups", "career_content"
+        )}
+
+    def _command(self, name):
+        self.pings += 1
+        if not self.up:
+            raise ServerSelectionTimeoutError("localhost:27017: connection refused")
+        return {"ok": 1}
+
+@pytest.fixture
+def flaky_client(monkeypatch):
+    fake = FlakyClient()
+    monkeypatch.setattr(database, "_create_client", lambda: fake)
+    for name in ("client", "db", "async_client"):
+        monkeypatch.setattr(database, name, None)
+    monkeypatch.setattr(database, "_status", dict(connected=False, attempts=0, last_error=None,
+                                                  last_checked=None, connected_since=None))
+    monkeypatch.setattr(database, "_connect_callbacks", [])
+    yield fake
+    database.stop_connection_monitor()
+
+def test_connect_records_failure_then_binds_on_recovery(flaky_client):
+    connected = []
+    database.on_connect(lambda: connected.append(True))
+
+    assert database.connect() is False
+    status = database.connection_status()
+    assert status["connected"] is False
+    assert "connection refused" in status["last_error"]
+    assert database.is_db_available() is False
+
+    flaky_client.up = True
+    assert database.connect() is True
+    assert database.is_db_available() is True
+    assert database.get_chat_collection() == "chat_history"
+    assert database.connection_status()["last_error"] is None
+    # Healthy pings do not re-run the on-connect callbacks; a reconnect after an outage does
+    database.connect()
+    assert connected == [True]
+    flaky_client.up = False
+    database.connect()
+    assert database.is_db_available() is False
+    flaky_client.up = True
+    database.connect()
+    assert connected == [True, True]
+
+def test_first_access_without_monitor_connects_once(flaky_client):
+    assert database.get_db() is None
+    database.get_chat_collection()
+    assert flaky_client.pings == 1
+
+def test_monitor_reconnects_with_backoff(flaky_client, monkeypatch):
+    monkeypatch.setattr(database.config, "MONGO_RECONNECT_INITIAL_SECONDS", 0.01)
+    monkeypatch.setattr(database.config, "MONGO_RECONNECT_MAX_SECONDS", 0.04)
+    monkeypatch.setattr(database.config, "MONGO_HEALTHCHECK_INTERVAL_SECONDS", 60)
+    database.start_connection_monitor()
+    assert database.connection_status()["monitor_running"] is True
+
+    time.sleep(0.2)
+    assert database.connection_status()["connected"] is False
+    failed_attempts = flaky_client.pings
+    assert 2 <= failed_attempts < 20  # backoff, not a busy loop
+
+    flaky_client.up = True
+    deadline = time.time() + 2
+    while not database.connection_status()["connected"] and time.time() < deadline:
+        time.sleep(0.01)
+    assert database.connection_status()["connected"] is True
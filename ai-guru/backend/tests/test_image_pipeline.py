@@ -0,0 +1,52 @@
+import asyncio
+import io
+import pytest
+from PIL import Image
+from services import image_pipeline
+
+def encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+class FakeUpload:
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._buffer.read(size)
+
+def test_large_photo_is_downsampled_and_metadata_stripped():
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"  # Make
+    data = encode(Image.new('RGB', (4000, 3000), (10, 120, 200)), 'JPEG', exif=exif)
+
+    part = image_pipeline.prepare_image(data, max_edge=1024)
+
+    assert part["mime_type"] == "image/jpeg"
+    result = Image.open(io.BytesIO(part["data"]))
+    assert result.size == (1024, 768)
+    assert not result.getexif()
+
+def test_exif_orientation_is_applied_before_stripping():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotated 90° clockwise
+    data = encode(Image.new('RGB', (400, 200)), 'JPEG', exif=exif)
+    result = Image.open(io.BytesIO(image_pipeline.prepare_image(data, max_edge=1024)["data"]))
+    assert result.size == (200, 400)
+
+def test_transparency_is_kept_as_png():
+    data = encode(Image.new('RGBA', (300, 300), (0, 0, 0, 0)), 'PNG')
+    assert image_pipeline.prepare_image(data)["mime_type"] == "image/png"
+
+def test_rejects_undecodable_and_oversized_images():
+    with pytest.raises(image_pipeline.InvalidImageError):
+        image_pipeline.prepare_image(b"not an image")
+    with pytest.raises(image_pipeline.InvalidImageError):
+        image_pipeline.prepare_image(encode(Image.new('RGB', (200, 200)), 'PNG'), max_pixels=100 * 100)
+
+def test_read_upload_stops_at_the_size_limit():
+    data = b"x" * (image_pipeline.READ_CHUNK_SIZE * 3)
+    assert asyncio.run(image_pipeline.read_upload(FakeUpload(data), len(data))) == data
+    with pytest.raises(image_pipeline.ImageTooLargeError):
+        asyncio.run(image_pipeline.read_upload(FakeUpload(data), len(data) - 1))
@@ -0,0 +1,54 @@
+import interaction_features
+from interaction_features import KeywordMatcher
+
+def test_input_patterns_shape_and_precedence():
+    patterns = interaction_features.analyze_input_patterns("Could you please explain and describe the steps to learn Python?")
+    assert patterns["request_type"] == "paragraph"  # 'describe' outranks 'explain'
+    assert patterns["formality_level"] == "formal"
+    assert patterns["length_preference"] == "medium"
+    assert patterns["keywords"] == ["could", "please", "explain", "describe", "steps", "learn", "python"]
+
+def test_substring_semantics_match_the_old_checks():
+    # "this" contains "hi" and "you" contains "yo", exactly as the `in` checks behaved
+    patterns = interaction_features.analyze_input_patterns("how are you doing this")
+    assert patterns["request_type"] == "casual"
+    assert patterns["formality_level"] == "casual"
+
+def test_defaults_when_nothing_matches():
+    patterns = interaction_features.analyze_input_patterns("zzz")
+    assert (patterns["request_type"], patterns["formality_level"]) == ("mixed", "neutral")
+    assert interaction_features.extract_topic("zzz") == "general"
+    assert interaction_features.detect_sentiment("zzz") == "neutral"
+
+def test_keywords_stop_at_ten():
+    text = " ".join(f"word{chr(97 + i)}x" for i in range(5)) + " " + "alpha beta gamma delta epsilon zeta eta theta iota kappa"
+    assert len(interaction_features.analyze_input_patterns(text)["keywords"]) == 10
+
+def test_sentiment_counts_distinct_keywords():
+    assert interaction_features.detect_sentiment("good good good but bad and awful") == "negative"
+    assert interaction_features.detect_sentiment("great and amazing, a bit bad") == "positive"
+
+def test_analyze_interaction_document_shape():
+    features = interaction_features.analyze_interaction(
+        "I am looking for a career in software",
+        "**Plan**\n1. Learn SQL\n- Try a project. What do you think?"
+    )
+    assert set(features) == {"input_patterns", "response_format", "interaction_context"}
+    assert features["response_format"]["format_type"] == "structured"
+    context = features["interaction_context"]
+    assert context["topic"] == "technology"  # 'software' wins over 'career' by topic order
+    assert context["complexity"] == "simple"
+    assert context["success_indicators"] == {"follow_up_question": True, "personalization": True, "actionable": True}
+
+def test_matcher_reports_keywords_contained_in_longer_matches():
+    matcher = KeywordMatcher({"family": {"long": ["breakdown"], "short": ["break", "down"]}})
+    hits = matcher.scan("a breakdown")
+    assert hits["family"] == {"long": {"breakdown"}, "short": {"break", "down"}}
+    assert matcher.first_label(hits, "family", None) == "long"
+
+def test_acronyms_match_whole_words_only():
+    assert interaction_features.extract_topic("AI") == "technology"
+    assert interaction_features.extract_topic("what is ai?") == "technology"
+    assert interaction_features.extract_topic("artificial intelligence") == "technology"
+    assert interaction_features.extract_topic("explain it again") == "general"
+    assert interaction_features.extract_topic("thai food") == "general"
@@ -0,0 +1,30 @@
+import asyncio
+from services.interaction_writer import InteractionWriter
+
+class RecordingCollection:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.inserted.extend(documents)
+
+def test_inline_write_on_full_queue_releases_pending_ids():
+    collection = RecordingCollection()
+
+    async def run():
+        writer = InteractionWriter(lambda: collection, max_queue_size=1, flush_interval=0.01, put_timeout=0.01)
+        # Started without its consumer task, so the one-slot queue stays full
+        writer._queue = asyncio.Queue(maxsize=1)
+        writer._task = asyncio.ensure_future(asyncio.sleep(60))
+        try:
+            await writer.submit({"_id": "queued"})
+            await writer.submit({"_id": "inline"})
+            return writer
+        finally:
+            writer._task.cancel()
+
+    writer = asyncio.run(run())
+    assert [document["_id"] for document in collection.inserted] == ["inline"]
+    assert writer.inline_writes == 1
+    assert not writer.is_pending("inline")
+    assert writer.is_pending("queued")  # still waiting for the consumer
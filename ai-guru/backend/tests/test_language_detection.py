@@ -0,0 +1,28 @@
+import utils
+
+def test_ascii_text_has_no_indian_script():
+    assert utils.classify_script("what is machine learning") == (None, 0.0)
+    assert not utils.has_indian_script("café au lait")
+
+def test_dominant_script_and_ratio():
+    lang, ratio = utils.classify_script("మీరు ఎలా ఉన్నారు")
+    assert lang == "te"
+    assert ratio == 1.0
+
+    lang, ratio = utils.classify_script("mera naam नमस्ते")
+    assert lang == "hi"
+    assert 0 < ratio < 1
+
+def test_dominant_script_wins_over_priority():
+    # Mostly Tamil with one Telugu character: the old priority scan returned Telugu
+    assert utils.detect_mixed_indian_language("வணக்கம் நண்பா ఎ") == "ta"
+
+def test_equal_counts_fall_back_to_priority_order():
+    assert utils.detect_mixed_indian_language("क ఎ") == "te"
+
+def test_detect_language_uses_script_detection():
+    assert utils.detect_language("नमस्ते, आप कैसे हैं?") == ("hi", 0.95, True)
+
+def test_detect_language_many_matches_single_calls():
+    texts = ["Bonjour, comment allez-vous aujourd'hui?", "hi", "नमस्ते, आप कैसे हैं?", "hi"]
+    assert utils.detect_language_many(texts) == [utils.detect_language(text) for text in texts]
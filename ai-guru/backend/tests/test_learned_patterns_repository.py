@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+from pymongo.errors import DuplicateKeyError
+import repositories
+import services.preference_model as preference_model
+
+class LearnedPatternsCollection:
+    """One-document stand-in supporting the filters and operators LearnedPatternsRepository.learn uses"""
+    def __init__(self, document=None):
+        self.document = document
+
+    def _matches(self, query):
+        if self.document is None:
+            return False
+        return all(self.document.get(field) == value for field, value in query.items())
+
+    async def find_one(self, query, projection=None):
+        return dict(self.document) if self._matches(query) else None
+
+    async def update_one(self, query, update, upsert=False):
+        if not self._matches(query):
+            if not upsert:
+                return SimpleNamespace(matched_count=0)
+            self.document = dict(query, **update.get("$setOnInsert", {}))
+        preference_model.apply_increments(self.document, update.get("$inc", {}))
+        for path, factor in update.get("$mul", {}).items():
+            keyword = path.split(".", 1)[1]
+            self.document["keyword_scores"][keyword] *= factor
+        self.document.update(update.get("$set", {}))
+        return SimpleNamespace(matched_count=1)
+
+def test_learn_rebases_legacy_scores_before_incrementing(monkeypatch):
+    half_life = preference_model.KEYWORD_HALF_LIFE_SECONDS
+    landmark = preference_model.DECAY_EPOCH + preference_model.REBASE_HALF_LIVES * half_life
+    # Written before landmarks existed: scores relative to DECAY_EPOCH
+    collection = LearnedPatternsCollection({"session_id": "s1", "keyword_scores": {"history": 2.0 ** 40}})
+    monkeypatch.setattr(repositories.LearnedPatternsRepository, "collection", property(lambda self: collection))
+
+    increments = {"interaction_count": 1, "keyword_scores.python": 1.0}
+    applied = asyncio.run(repositories.learned_patterns.learn("s1", increments, landmark, now="now"))
+
+    assert applied == (increments, landmark)
+    assert collection.document["decay_landmark"] == landmark
+    assert collection.document["keyword_scores"] == {"history": 2.0 ** 8, "python": 1.0}
+    assert collection.document["interaction_count"] == 1
+
+def test_learn_upserts_new_sessions_on_the_current_landmark(monkeypatch):
+    collection = LearnedPatternsCollection()
+    monkeypatch.setattr(repositories.LearnedPatternsRepository, "collection", property(lambda self: collection))
+
+    asyncio.run(repositories.learned_patterns.learn("s2", {"keyword_scores.python": 1.0}, 1234, now="now"))
+
+    assert collection.document == {"session_id": "s2", "decay_landmark": 1234, "keyword_scores": {"python": 1.0}, "last_updated": "now"}
+
+class RacingCollection(LearnedPatternsCollection):
+    """Another request creates the session's document between our read and our upsert"""
+    def __init__(self, winner):
+        super().__init__()
+        self.winner = winner
+
+    async def update_one(self, query, update, upsert=False):
+        if upsert and self.winner is not None:
+            self.document, self.winner = self.winner, None
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await super().update_one(query, update, upsert)
+
+def test_learn_retries_when_a_concurrent_upsert_wins(monkeypatch):
+    collection = RacingCollection({"session_id": "s3", "decay_landmark": 1234, "interaction_count": 1})
+    monkeypatch.setattr(repositories.LearnedPatternsRepository, "collection", property(lambda self: collection))
+
+    asyncio.run(repositories.learned_patterns.learn("s3", {"interaction_count": 1}, 1234, now="now"))
+
+    assert collection.document["interaction_count"] == 2
+
+def test_apply_retries_when_a_concurrent_upsert_wins(monkeypatch):
+    collection = RacingCollection({"session_id": "s4", "feedback_count": 1})
+    monkeypatch.setattr(repositories.LearnedPatternsRepository, "collection", property(lambda self: collection))
+
+    asyncio.run(repositories.learned_patterns.apply("s4", {"$inc": {"feedback_count": 1}}))
+
+    assert collection.document["feedback_count"] == 2
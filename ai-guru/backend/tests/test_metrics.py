@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import metrics
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    """Metrics and collectors registered by a test are dropped when it ends"""
+    monkeypatch.setattr(metrics, "_registry", list(metrics._registry))
+    monkeypatch.setattr(metrics, "_collectors", list(metrics._collectors))
+
+@pytest.fixture
+def stages():
+    return metrics.Histogram("test_stage_seconds", "Test stages", labelnames=("stage",), buckets=(0.1, 1.0))
+
+def test_histogram_renders_cumulative_buckets(stages):
+    child = stages.labels("render")
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+    lines = metrics.render().splitlines()
+    assert '# TYPE test_stage_seconds histogram' in lines
+    assert 'test_stage_seconds_bucket{stage="render",le="0.1"} 1' in lines
+    assert 'test_stage_seconds_bucket{stage="render",le="1.0"} 2' in lines
+    assert 'test_stage_seconds_bucket{stage="render",le="+Inf"} 3' in lines
+    assert 'test_stage_seconds_count{stage="render"} 3' in lines
+
+def test_context_manager_and_decorators_observe_spans(stages):
+    with stages.labels("block").time():
+        pass
+
+    @stages.labels("sync").time()
+    def sync_stage():
+        return "done"
+
+    @stages.labels("async").time()
+    async def async_stage():
+        return "done"
+
+    assert sync_stage() == "done"
+    assert asyncio.run(async_stage()) == "done"
+    for stage in ("block", "sync", "async"):
+        assert sum(stages.labels(stage).snapshot()[0]) == 1
+
+def test_in_progress_gauge_returns_to_zero_after_errors():
+    child = metrics.Gauge("test_in_flight", "Test in-flight calls", labelnames=("kind",)).labels("text")
+    try:
+        with child.track_inprogress():
+            assert child.value == 1
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert child.value == 0
+
+def test_mongo_listener_records_command_latency_per_collection():
+    listener = metrics.MongoCommandMetrics()
+    started = SimpleNamespace(command_name="find", command={"find": "chat_history"}, connection_id=("h", 1), request_id=7)
+    succeeded = SimpleNamespace(command_name="find", connection_id=("h", 1), request_id=7, duration_micros=1500)
+    listener.started(started)
+    listener.succeeded(succeeded)
+    counts, total = metrics.MONGO_COMMAND_SECONDS.labels("find", "chat_history").snapshot()
+    assert sum(counts) >= 1 and total >= 0.0015
+
+    listener.started(SimpleNamespace(command_name="ping", command={"ping": 1}, connection_id=("h", 1), request_id=8))
+    assert listener._collections == {}
+
+def test_collectors_are_rendered_with_labels():
+    metrics.register_collector(lambda: [("test_cache_hits_total", "counter", "Hits", [({"cache": "demo"}, 4)])])
+    assert 'test_cache_hits_total{cache="demo"} 4' in metrics.render().splitlines()
+
+def test_test_metrics_do_not_leak_into_the_registry():
+    rendered = metrics.render()
+    assert "test_stage_seconds" not in rendered and "test_cache_hits_total" not in rendered
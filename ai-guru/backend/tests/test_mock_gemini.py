@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import pytest
+import genai_backend
+import mock_gemini
+import services.career_gps_service as career_gps_service
+
+@pytest.fixture
+def instant_mock(monkeypatch):
+    monkeypatch.setattr(mock_gemini.config, "MOCK_GEMINI_LATENCY_MS", 0)
+    monkeypatch.setattr(mock_gemini.config, "MOCK_GEMINI_TOKENS_PER_SECOND", 1e9)
+    monkeypatch.setattr(mock_gemini.config, "MOCK_GEMINI_ERROR_RATE", 0.0)
+    monkeypatch.setattr(career_gps_service, "model", mock_gemini.GenerativeModel("gemini-2.5-flash"))
+
+def test_career_prompts_get_parseable_canned_json(instant_mock):
+    recommendations, is_fallback = career_gps_service._generate_career_recommendations(
+        ["coding"], ["python"], "build apps", "", "", []
+    )
+    assert not is_fallback and len(recommendations) >= 3
+
+    learning_path, is_fallback = career_gps_service._generate_base_learning_path("UX Designer")
+    assert not is_fallback
+    assert learning_path["career_name"] == "UX Designer" and learning_path["phases"]
+
+    roadmap, is_fallback = career_gps_service._generate_base_roadmap("UX Designer")
+    assert not is_fallback and len(roadmap["milestones"]) == 5
+
+def test_streaming_yields_the_whole_answer(instant_mock):
+    async def collect():
+        response = await mock_gemini.GenerativeModel().generate_content_async("User: what is recursion?", stream=True)
+        return "".join([chunk.text async for chunk in response])
+
+    text = asyncio.run(collect())
+    assert text == mock_gemini.canned_response("User: what is recursion?")
+    assert "what is recursion?" in text
+
+def test_injected_errors_look_like_quota_errors(instant_mock, monkeypatch):
+    monkeypatch.setattr(mock_gemini.config, "MOCK_GEMINI_ERROR_RATE", 1.0)
+    with pytest.raises(mock_gemini.MockGeminiError, match="429"):
+        mock_gemini.GenerativeModel().generate_content("hello")
+
+def test_sdk_is_imported_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(genai_backend.config, "MOCK_GEMINI", True)
+    monkeypatch.setattr(genai_backend, "_genai", None)
+    configured_on = []
+    monkeypatch.setattr(mock_gemini, "configure", lambda **kwargs: configured_on.append(threading.current_thread()))
+
+    async def first_call():
+        await genai_backend.start_loading()
+        return await genai_backend.load()
+
+    assert asyncio.run(first_call()) is mock_gemini
+    assert configured_on and threading.main_thread() not in configured_on
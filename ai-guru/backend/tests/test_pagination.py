@@ -0,0 +1,29 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+import pagination
+
+def test_cursor_round_trip():
+    timestamp = datetime(2025, 3, 1, 12, 30, 5, 123000)
+    cursor = pagination.encode_cursor(timestamp, "abc-123")
+    assert pagination.decode_cursor(cursor) == (timestamp, "abc-123")
+
+def test_malformed_cursor_is_a_client_error():
+    with pytest.raises(HTTPException) as exc_info:
+        pagination.decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+def test_before_filter_breaks_timestamp_ties_on_id():
+    timestamp = datetime(2025, 3, 1)
+    assert pagination.before_filter(None) == {}
+    assert pagination.before_filter(pagination.encode_cursor(timestamp, "m5"), timestamp_field="latest_timestamp") == {"$or": [
+        {"latest_timestamp": {"$lt": timestamp}},
+        {"latest_timestamp": timestamp, "_id": {"$lt": "m5"}}
+    ]}
+
+def test_build_page_only_returns_a_cursor_when_more_items_exist():
+    items = [{"_id": f"m{i}", "timestamp": datetime(2025, 3, 1, 12, i)} for i in range(3, 0, -1)]
+    page, cursor = pagination.build_page(items, 2)
+    assert [item["_id"] for item in page] == ["m3", "m2"]
+    assert cursor == pagination.encode_cursor(datetime(2025, 3, 1, 12, 2), "m2")
+    assert pagination.build_page(items, 3) == (items, None)
@@ -0,0 +1,76 @@
+import services.preference_model as preference_model
+
+def _learn(model, request_type, keywords, timestamp):
+    patterns = {
+        "request_type": request_type,
+        "formality_level": "neutral",
+        "length_preference": "medium",
+        "keywords": keywords
+    }
+    preference_model.apply_increments(model, preference_model.build_interaction_increments(patterns, timestamp))
+
+def test_derive_preferences_uses_most_frequent_counters():
+    model = {}
+    _learn(model, "structured", ["python"], 1_750_000_000)
+    _learn(model, "structured", ["python"], 1_750_000_000)
+    _learn(model, "paragraph", ["history"], 1_750_000_000)
+
+    preferences = preference_model.derive_preferences(model)
+    assert preferences["preferred_format"] == "structured"
+    assert preferences["preferred_length"] == "medium"
+    assert model["interaction_count"] == 3
+
+def test_recent_keywords_outrank_older_ones():
+    model = {}
+    week = preference_model.KEYWORD_HALF_LIFE_SECONDS
+    _learn(model, "mixed", ["history"], 1_750_000_000)
+    _learn(model, "mixed", ["history"], 1_750_000_000)
+    _learn(model, "mixed", ["python"], 1_750_000_000 + 2 * week)  # Worth 4 older mentions
+
+    assert preference_model.derive_preferences(model)["topics_of_interest"][0] == "python"
+
+def test_feedback_shifts_length_preference():
+    model = {}
+    _learn(model, "mixed", [], 1_750_000_000)
+    preference_model.apply_increments(model, preference_model.build_feedback_increments("too_long", {}))
+
+    assert preference_model.derive_preferences(model)["preferred_length"] == "short"
+
+def test_legacy_snapshot_documents_are_still_readable():
+    legacy = {"user_preferences": {"preferred_format": "paragraph"}}
+    assert preference_model.derive_preferences(legacy) == {"preferred_format": "paragraph"}
+
+def test_weights_stay_bounded_far_from_the_epoch(monkeypatch):
+    monkeypatch.setattr(preference_model, "KEYWORD_HALF_LIFE_SECONDS", 86400)
+    ten_years = preference_model.DECAY_EPOCH + 3650 * 86400
+    assert preference_model.keyword_weight(ten_years) < 2 ** preference_model.REBASE_HALF_LIVES
+    # Even a timestamp far ahead of its landmark is clamped instead of overflowing
+    assert preference_model.keyword_weight(ten_years, landmark=preference_model.DECAY_EPOCH) == 2 ** preference_model.MAX_WEIGHT_EXPONENT
+
+def _apply_update(model, update):
+    for path, factor in update.get("$mul", {}).items():
+        keyword = path.split(".", 1)[1]
+        model["keyword_scores"][keyword] *= factor
+    model.update(update.get("$set", {}))
+
+def test_rebasing_keeps_relative_keyword_scores():
+    half_life = preference_model.KEYWORD_HALF_LIFE_SECONDS
+    period = preference_model.REBASE_HALF_LIVES * half_life
+    early = preference_model.DECAY_EPOCH + period - half_life
+    late = early + 2 * half_life  # In the next landmark period
+    early_landmark, late_landmark = preference_model.decay_landmark(early), preference_model.decay_landmark(late)
+    assert late_landmark == early_landmark + period
+
+    model = {"decay_landmark": early_landmark}
+    patterns = {"keywords": ["history"]}
+    for _ in range(3):
+        preference_model.apply_increments(model, preference_model.build_interaction_increments(patterns, early, early_landmark))
+    _apply_update(model, preference_model.build_rebase_update(model, late_landmark))
+    preference_model.apply_increments(
+        model, preference_model.build_interaction_increments({"keywords": ["python"]}, late, late_landmark)
+    )
+
+    # Three mentions two half-lives ago are worth 3/4 of one mention now, whatever the landmark
+    scores = model["keyword_scores"]
+    assert abs(scores["history"] / scores["python"] - 0.75) < 1e-9
+    assert model["decay_landmark"] == late_landmark
@@ -0,0 +1,65 @@
+import pytest
+import services.prompt_builder as prompt_builder
+import services.gemini_service as gemini_service
+import services.career_gps_service as career_gps_service
+
+TEMPLATE = prompt_builder.PromptTemplate("Intro {{json}}\n{topics}{context}Question: {question}")
+
+def build_sections():
+    return [
+        prompt_builder.Section("topics", ["alpha", "beta", "gamma"], priority=1, header="Topics: ", separator=", "),
+        prompt_builder.Section("context", ["User: old\nAI: " + "old " * 200, "User: new\nAI: newest answer"],
+                               priority=2, trim=prompt_builder.TRIM_OLDEST),
+        prompt_builder.Section("question", ["What is recursion?"], footer=""),
+    ]
+
+def test_template_is_compiled_once_into_slots():
+    assert TEMPLATE.slots == ["topics", "context", "question"]
+    assert TEMPLATE.render({"question": "q"}) == "Intro {json}\nQuestion: q"
+
+def test_everything_fits_a_generous_budget():
+    prompt, usage = prompt_builder.assemble(TEMPLATE, build_sections(), 10000, "test")
+    assert "Topics: alpha, beta, gamma" in prompt and "old old" in prompt
+    assert usage["trimmed"] == []
+    assert usage["total"] <= usage["budget"]
+
+def test_lowest_priority_and_oldest_context_are_trimmed_first():
+    full = prompt_builder.assemble(TEMPLATE, build_sections(), 10000, "test")[1]["total"]
+    prompt, usage = prompt_builder.assemble(TEMPLATE, build_sections(), full - 100, "test")
+    assert usage["trimmed"] == ["topics", "context"]
+    assert "Topics:" not in prompt
+    assert "User: old" not in prompt and "newest answer" in prompt
+    assert prompt.endswith("Question: What is recursion?")
+    assert usage["total"] <= usage["budget"]
+
+def test_required_sections_are_never_trimmed():
+    prompt, usage = prompt_builder.assemble(TEMPLATE, build_sections(), 1, "test")
+    assert "What is recursion?" in prompt
+    assert usage["total"] > usage["budget"]
+
+def test_chat_prompt_keeps_the_latest_exchange(monkeypatch):
+    monkeypatch.setattr(gemini_service.config, "PROMPT_CHAT_TOKEN_BUDGET", 300)
+    recent_context = "User: first\nAI: " + "long answer " * 400 + "\nUser: second\nAI: short answer"
+    prefs = {"preferred_format": "bullet_points", "topics_of_interest": ["python", "loops"]}
+    prompt = gemini_service._build_system_prompt("and now?", recent_context, prefs, "en", "English", False)
+    assert "User: second\nAI: short answer" in prompt
+    assert prompt_builder.count_tokens(prompt) <= 300
+
+def test_career_prompt_drops_profile_blocks_before_answers(monkeypatch):
+    monkeypatch.setattr(career_gps_service.config, "CAREER_GPS_PROMPT_TOKEN_BUDGET", 500)
+    profile = {"basic_info": {"about": "x" * 200}, "experience": [{"title": "Intern"}] * 3,
+               "skills": ["s%d" % i for i in range(40)]}
+    prompt = career_gps_service.build_recommendation_prompt(
+        ["coding"], ["python"], "build apps", "impact", "visual", career_gps_service.build_profile_sections(profile)
+    )
+    assert "Interests: coding" in prompt and "Goal: build apps" in prompt
+    assert "Existing Skills" not in prompt
+
+def test_tokens_are_estimated_while_the_encoding_loads(monkeypatch):
+    monkeypatch.setattr(prompt_builder, "_encoding", None)
+    monkeypatch.setattr(prompt_builder, "_loading", True)
+    monkeypatch.setattr(prompt_builder, "load_encoding", lambda: pytest.fail("loaded on the request path"))
+    template = prompt_builder.PromptTemplate("Question: {question}")
+    assert prompt_builder.count_tokens("x" * 40) == 10
+    assert template.literal_tokens == 3
+    assert template._literal_tokens is None  # the estimate is not cached
@@ -0,0 +1,50 @@
+import pytest
+from pymongo import MongoClient
+import config
+import database
+import query_diagnostics
+
+PLAN_CHECK_DB = "guru_multibot_plan_check"
+
+@pytest.fixture(scope="module")
+def plan_check_db():
+    client = MongoClient(config.MONGODB_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except Exception:
+        pytest.skip("MongoDB not reachable")
+    client.drop_database(PLAN_CHECK_DB)
+    db = client[PLAN_CHECK_DB]
+    database.ensure_indexes(db)
+    yield db
+    client.drop_database(PLAN_CHECK_DB)
+    client.close()
+
+def test_plan_stages_walks_nested_plans():
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    assert query_diagnostics.plan_stages(plan) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert "COLLSCAN" in query_diagnostics.plan_stages({"queryPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}})
+
+class _SortingCursor:
+    """Stands in for the database, its collections and cursors; every plan is an in-memory sort"""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def explain(self):
+        return {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "IXSCAN"}}}}
+
+def test_in_memory_sorts_are_not_ok():
+    results = query_diagnostics.explain_hot_queries(_SortingCursor())
+    assert {result["name"] for result in results} >= {"chat_history_export", "feedback_export"}
+    assert all(result["in_memory_sort"] and not result["collscan"] and not result["ok"] for result in results)
+
+def test_ensure_indexes_is_idempotent(plan_check_db):
+    assert database.ensure_indexes(plan_check_db) == database.ensure_indexes(plan_check_db)
+
+def test_no_hot_query_scans_a_whole_collection_or_sorts_in_memory(plan_check_db):
+    failing = [result["name"] for result in query_diagnostics.explain_hot_queries(plan_check_db) if not result["ok"]]
+    assert failing == []
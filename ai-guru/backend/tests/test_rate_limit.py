@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from rate_limit import InMemoryRateLimitBackend, RateLimiter
+
+def _acquire(backend, key, now, limit=3, window=60):
+    return asyncio.run(backend.acquire(key, limit, window, now=now))
+
+def test_limit_applies_within_window():
+    backend = InMemoryRateLimitBackend()
+    assert [_acquire(backend, "1.1.1.1", 6000 + i) for i in range(4)] == [True, True, True, False]
+    assert _acquire(backend, "2.2.2.2", 6004)  # Other clients are unaffected
+
+def test_previous_window_is_weighted_by_overlap():
+    backend = InMemoryRateLimitBackend()
+    for i in range(4):
+        _acquire(backend, "ip", 6000 + i, limit=4)
+
+    # 5s into the next window ~92% of the previous 4 hits still count: room for one more
+    assert _acquire(backend, "ip", 6065, limit=4)
+    assert not _acquire(backend, "ip", 6066, limit=4)
+
+def test_previous_window_fades_out():
+    backend = InMemoryRateLimitBackend()
+    for i in range(4):
+        _acquire(backend, "ip", 6000 + i, limit=4)
+
+    # 45s into the next window only 25% (one hit) carries over
+    assert [_acquire(backend, "ip", 6105, limit=4) for _ in range(4)] == [True, True, True, False]
+
+def test_idle_keys_are_evicted():
+    backend = InMemoryRateLimitBackend()
+    for i in range(100):
+        _acquire(backend, f"10.0.0.{i}", 6000)
+    assert len(backend) == 100
+
+    _acquire(backend, "fresh", 6000 + 180)  # Two windows later
+    assert len(backend) == 1
+
+def test_tracked_keys_are_bounded():
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    for i in range(50):
+        _acquire(backend, f"10.0.0.{i}", 6000)
+    assert len(backend) == 10
+
+def test_rate_limiter_raises_429():
+    limiter = RateLimiter(max_requests=1, time_window=60)
+    asyncio.run(limiter.check_rate_limit("ip"))
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(limiter.check_rate_limit("ip"))
+    assert exc_info.value.status_code == 429
@@ -0,0 +1,28 @@
+from datetime import datetime
+from pymongo import UpdateOne
+import services.session_summaries as session_summaries
+
+def test_session_title_truncates_long_messages():
+    assert session_summaries.session_title("short") == "short"
+    assert session_summaries.session_title("x" * 60) == "x" * 50 + "..."
+    assert session_summaries.session_title(None) == ""
+
+def test_one_upsert_per_session_in_a_batch():
+    documents = [
+        {"session_id": "a", "user_input": "first", "timestamp": datetime(2025, 1, 1, 10, 0)},
+        {"session_id": "b", "user_input": "other", "timestamp": datetime(2025, 1, 1, 10, 1)},
+        {"session_id": "a", "user_input": "second", "timestamp": datetime(2025, 1, 1, 10, 2)},
+        {"session_id": None, "user_input": "orphan", "timestamp": datetime(2025, 1, 1, 10, 3)},
+    ]
+    updates = session_summaries.build_session_updates(documents)
+    assert updates[0] == UpdateOne(
+        {"_id": "a"},
+        {
+            "$inc": {"message_count": 2},
+            "$max": {"latest_timestamp": datetime(2025, 1, 1, 10, 2)},
+            "$min": {"first_timestamp": datetime(2025, 1, 1, 10, 0)},
+            "$setOnInsert": {"session_title": "first"}
+        },
+        upsert=True
+    )
+    assert len(updates) == 2
@@ -0,0 +1,23 @@
+import io
+from PIL import Image
+from services import image_pipeline, vision_cache
+
+def upload_bytes(**save_options):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1200, 900), (30, 60, 90)).save(buffer, 'JPEG', quality=90, **save_options)
+    return buffer.getvalue()
+
+def test_reupload_with_different_metadata_shares_a_key():
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    plain = image_pipeline.prepare_image(upload_bytes())
+    tagged = image_pipeline.prepare_image(upload_bytes(exif=exif))
+    assert vision_cache.build_cache_key(plain, "What is this?", "en") == vision_cache.build_cache_key(tagged, "  what is THIS ", "en")
+
+def test_key_depends_on_image_prompt_and_language():
+    part = {"mime_type": "image/jpeg", "data": b"image-a"}
+    key = vision_cache.build_cache_key(part, "describe", "en")
+    assert key.startswith("vision:")
+    assert key != vision_cache.build_cache_key({"mime_type": "image/jpeg", "data": b"image-b"}, "describe", "en")
+    assert key != vision_cache.build_cache_key(part, "translate", "en")
+    assert key != vision_cache.build_cache_key(part, "describe", "hi")
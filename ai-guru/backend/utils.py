@@ -1,6 +1,9 @@
 import re
+from collections import Counter
+from functools import lru_cache
 from langdetect import detect, detect_langs, DetectorFactory
 from langdetect.lang_detect_exception import LangDetectException
+import config
 
 # Set seed for consistent language detection
 DetectorFactory.seed = 0
@@ -95,6 +98,51 @@ LANGUAGE_NAMES = {
     'ha': 'Hausa',
 }
 
+# Indian scripts by Unicode block. Every block is 128 code points wide and 128-aligned,
+# so `ord(char) >> 7` identifies it. Order is the tie-break priority for classify_script().
+INDIAN_SCRIPT_BLOCKS = {
+    0x0C00 >> 7: 'te',  # Telugu
+    0x0900 >> 7: 'hi',  # Devanagari (Hindi, Marathi, Nepali)
+    0x0980 >> 7: 'bn',  # Bengali
+    0x0B80 >> 7: 'ta',  # Tamil
+    0x0A80 >> 7: 'gu',  # Gujarati
+    0x0C80 >> 7: 'kn',  # Kannada
+    0x0D00 >> 7: 'ml',  # Malayalam
+    0x0A00 >> 7: 'pa',  # Gurmukhi (Punjabi)
+    0x0B00 >> 7: 'or',  # Oriya
+}
+_SCRIPT_PRIORITY = {lang: rank for rank, lang in enumerate(INDIAN_SCRIPT_BLOCKS.values())}
+
+def classify_script(text: str) -> tuple:
+    """
+    Single-pass script classifier.
+    Returns (language_code, ratio) for the dominant Indian script, where ratio is its share
+    of the non-whitespace characters, or (None, 0.0) if no Indian script is present.
+    """
+    if text.isascii():
+        return (None, 0.0)
+
+    # Counter does the per-character pass in C; the loop below only sees distinct characters
+    script_counts = {}
+    total = 0
+    for char, count in Counter(text).items():
+        if char.isspace():
+            continue
+        total += count
+        lang = INDIAN_SCRIPT_BLOCKS.get(ord(char) >> 7)
+        if lang:
+            script_counts[lang] = script_counts.get(lang, 0) + count
+
+    if not script_counts:
+        return (None, 0.0)
+    dominant = max(script_counts, key=lambda lang: (script_counts[lang], -_SCRIPT_PRIORITY[lang]))
+    return (dominant, script_counts[dominant] / total)
+
+@lru_cache(maxsize=config.LANGUAGE_DETECTION_CACHE_SIZE)
+def _detect_langs_cached(text: str) -> tuple:
+    """Memoized langdetect call; DetectorFactory.seed makes the result deterministic"""
+    return tuple((candidate.lang, candidate.prob) for candidate in detect_langs(text))
+
 def detect_language(text: str) -> tuple:
     """
     Detect the language of input text with confidence, handling mixed languages.
@@ -114,15 +162,13 @@ def detect_language(text: str) -> tuple:
             return (indian_lang, 0.95, True)  # High confidence for script detection
         
         # Get language probabilities for other languages
-        lang_probs = detect_langs(cleaned_text)
+        lang_probs = _detect_langs_cached(cleaned_text)
         
         if not lang_probs:
             return ('en', 0.0, False)
         
         # Get the most likely language and its confidence
-        top_lang = lang_probs[0]
-        language_code = top_lang.lang
-        confidence = top_lang.prob
+        language_code, confidence = lang_probs[0]
         
         # Filter out commonly mis-detected European languages for Indian English users
         problematic_codes = ['fi', 'da', 'no', 'sv', 'et', 'lv', 'lt', 'so', 'cy', 'eu', 'mt', 'ga', 'is', 'fo', 'ca', 'pt', 'ro', 'sk', 'cs', 'hr', 'sl']
@@ -138,59 +184,18 @@ def detect_language(text: str) -> tuple:
         print(f"Language detection error: {e}")
         return ('en', 0.0, False)  # Default to English, don't display
 
+def detect_language_many(texts) -> list:
+    """Batch detect_language(); identical texts are only analyzed once"""
+    results = {}
+    for text in texts:
+        if text not in results:
+            results[text] = detect_language(text)
+    return [results[text] for text in texts]
+
 def has_indian_script(text: str) -> bool:
     """Check if text contains Indian language scripts"""
-    indian_script_ranges = [
-        (0x0900, 0x097F),  # Devanagari (Hindi, Marathi, Nepali)
-        (0x0980, 0x09FF),  # Bengali
-        (0x0A00, 0x0A7F),  # Gurmukhi (Punjabi)
-        (0x0A80, 0x0AFF),  # Gujarati
-        (0x0B00, 0x0B7F),  # Oriya
-        (0x0B80, 0x0BFF),  # Tamil
-        (0x0C00, 0x0C7F),  # Telugu
-        (0x0C80, 0x0CFF),  # Kannada
-        (0x0D00, 0x0D7F),  # Malayalam
-    ]
-    
-    for char in text:
-        char_code = ord(char)
-        for start, end in indian_script_ranges:
-            if start <= char_code <= end:
-                return True
-    return False
+    return classify_script(text)[0] is not None
 
 def detect_mixed_indian_language(text: str) -> str:
     """Detect mixed Indian languages with English"""
-    # Check for Telugu script
-    if any('\u0c00' <= char <= '\u0c7f' for char in text):
-        return 'te'  # Telugu
-    
-    # Check for Hindi/Devanagari script
-    if any('\u0900' <= char <= '\u097f' for char in text):
-        return 'hi'  # Hindi
-    
-    # Check for Bengali script
-    if any('\u0980' <= char <= '\u09ff' for char in text):
-        return 'bn'  # Bengali
-    
-    # Check for Tamil script
-    if any('\u0b80' <= char <= '\u0bff' for char in text):
-        return 'ta'  # Tamil
-    
-    # Check for Gujarati script
-    if any('\u0a80' <= char <= '\u0aff' for char in text):
-        return 'gu'  # Gujarati
-    
-    # Check for Kannada script
-    if any('\u0c80' <= char <= '\u0cff' for char in text):
-        return 'kn'  # Kannada
-    
-    # Check for Malayalam script
-    if any('\u0d00' <= char <= '\u0d7f' for char in text):
-        return 'ml'  # Malayalam
-    
-    # Check for Punjabi script
-    if any('\u0a00' <= char <= '\u0a7f' for char in text):
-        return 'pa'  # Punjabi
-    
-    return None
+    return classify_script(text)[0]
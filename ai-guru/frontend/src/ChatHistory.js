@@ -15,24 +15,39 @@ const ChatHistory = ({
     setSelectedSession(session);
     setCurrentSessionId(session.session_id);
 
-    const displayMessages = [];
-    session.messages.forEach((msg) => {
-      displayMessages.push({
-        id: msg.id * 2 - 1,
-        text: msg.user_input,
-        sender: "user",
-      });
-      displayMessages.push({
-        id: msg.id * 2,
-        text: msg.bot_response,
-        sender: "ai",
-        detectedLanguage: msg.language_code,
-        languageName: msg.language_name,
-        sessionId: msg.session_id,
-        interactionId: msg._id || `${msg.session_id}_${msg.id * 2}`,
+    // Older messages may have moved to the cold archive; bring them back before loading
+    const rehydrated = session.archived_count > 0
+      ? fetch(`http://localhost:8001/sessions/${session.session_id}/rehydrate`, { method: "POST" })
+          .catch((err) => console.error("Failed to rehydrate session:", err))
+      : Promise.resolve();
+
+    // Summaries carry no messages; load the latest page of this session on demand
+    rehydrated
+      .then(() => fetch(`http://localhost:8001/sessions/${session.session_id}/messages?limit=100`))
+      .then((res) => res.json())
+      .then((data) => {
+        const displayMessages = [];
+        (data.messages || []).forEach((msg, index) => {
+          displayMessages.push({
+            id: index * 2 + 1,
+            text: msg.user_input,
+            sender: "user",
+          });
+          displayMessages.push({
+            id: index * 2 + 2,
+            text: msg.bot_response,
+            sender: "ai",
+            detectedLanguage: msg.language_code,
+            languageName: msg.language_name,
+            sessionId: msg.session_id,
+            interactionId: msg._id || `${msg.session_id}_${index * 2 + 2}`,
+          });
+        });
+        setMessages(displayMessages);
+      })
+      .catch((err) => {
+        console.error("Failed to fetch session messages:", err);
       });
-    });
-    setMessages(displayMessages);
   };
 
   return (